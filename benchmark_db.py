@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la capa de datos: cantidad de consultas y tiempo de pared
+
+Uso:
+    python benchmark_db.py                 # 1k, 10k y 100k productos
+    python benchmark_db.py 1000 5000       # tamaños personalizados
+    python benchmark_db.py --legado 1000   # comparar con la carga N+1 anterior
+    python benchmark_db.py --ingesta 10000 # crear_productos_bulk contra crear_producto
+    python benchmark_db.py --planes        # EXPLAIN QUERY PLAN de los filtros (sale con 1 si alguno recorre una tabla)
+    python benchmark_db.py --estres 8 20   # 8 procesos leyendo y escribiendo 20 s (sale con 1 si hubo errores de bloqueo)
+    python benchmark_db.py --estres --delete  # ídem con journal_mode DELETE, como en una unidad de red
+    python benchmark_db.py --aproximada    # búsqueda con errores de tipeo, en SQLite y en memoria
+    python benchmark_db.py --colores 1000  # colores parecidos (CIELAB) entre 1000 colores distintos
+    python benchmark_db.py --chips         # filtro de colores y cantidades por chip: bitmaps contra SQLite
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import time
+import multiprocessing
+from datetime import date, datetime
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.app_config import DatabaseConfig
+from database.db_manager import DatabaseManager
+from database.db_escritura import BaseOcupadaError, es_bloqueo
+from database.db_query import FiltroProductos
+from models.producto import Producto, ColorEspecificacion
+from utils.text_index import IndiceInvertido
+from utils.color_space import IndiceColores, np
+from utils.bitmap_index import BitmapColores
+
+
+TAMANOS_POR_DEFECTO = [1_000, 10_000, 100_000]
+
+COLORES = [
+    ('#000000', 'Negro'), ('#FFFFFF', 'Blanco'), ('#FF0000', 'Rojo'),
+    ('#00FF00', 'Verde'), ('#0000FF', 'Azul'), ('#FFFF00', 'Amarillo'),
+    ('#FFA500', 'Naranja'), ('#808080', 'Gris'), ('#800080', 'Morado'),
+]
+MATERIALES = ['PLA', 'PETG', 'ABS', 'TPU']
+NOMBRES = ['Soporte', 'Engranaje', 'Organizador', 'Robot', 'Maceta', 'Llavero', 'Caja']
+
+
+class DatabaseManagerInstrumentado(DatabaseManager):
+    """DatabaseManager que cuenta las sentencias ejecutadas"""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.consultas = 0
+
+    def get_connection(self):
+        conn = super().get_connection()
+        conn.set_trace_callback(self._contar)
+        return conn
+
+    def _contar(self, sentencia):
+        # Las sentencias internas de triggers y de FTS5 llegan con prefijo "--"
+        if not sentencia.lstrip().startswith('--'):
+            self.consultas += 1
+
+    def medir(self, funcion, *args):
+        """Ejecutar una función y devolver (resultado, consultas, segundos)"""
+        self.consultas = 0
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        return resultado, self.consultas, time.perf_counter() - inicio
+
+
+def poblar(db: DatabaseManager, cantidad: int, semilla: int = 42, nombres=None):
+    """Insertar productos sintéticos directamente con SQL (con ``nombres``, uno por producto)"""
+    rnd = random.Random(semilla)
+    ahora = datetime.now().isoformat()
+
+    productos, specs, piezas = [], [], []
+    spec_id = 0
+    for producto_id in range(1, cantidad + 1):
+        productos.append((
+            producto_id,
+            nombres[producto_id - 1] if nombres else f"{rnd.choice(NOMBRES)} {producto_id:06d}",
+            "Producto de prueba",
+            rnd.uniform(10, 300), "", rnd.randint(30, 900), rnd.choice(MATERIALES),
+            210, 60, None, "Altura de capa 0.2mm\nRelleno 20%", ahora, ahora
+        ))
+        for color_hex, nombre in rnd.sample(COLORES, rnd.randint(1, 3)):
+            spec_id += 1
+            specs.append((spec_id, producto_id, color_hex, nombre, rnd.uniform(5, 100), 5, ""))
+            for numero in range(rnd.randint(1, 3)):
+                piezas.append((spec_id, f"Pieza {numero + 1}"))
+
+    with db.get_connection() as conn:
+        conn.executemany('''
+            INSERT INTO productos (
+                id, nombre, descripcion, peso, color, tiempo_impresion, material,
+                temperatura_extrusor, temperatura_cama, imagen_path, guia_impresion,
+                fecha_creacion, fecha_modificacion
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', productos)
+        conn.executemany('''
+            INSERT INTO color_especificaciones (
+                id, producto_id, color_hex, nombre_color, peso_color, tiempo_adicional, notas
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', specs)
+        conn.executemany('''
+            INSERT INTO color_piezas (color_especificacion_id, nombre_pieza) VALUES (?, ?)
+        ''', piezas)
+        # Los trigramas no tienen triggers: se indexan como en el mantenimiento
+        db.trigramas.reconstruir(conn)
+        conn.commit()
+
+
+def cargar_n_mas_1(db: DatabaseManager):
+    """Carga anterior: una conexión por producto y una consulta por color"""
+    with db.get_connection() as conn:
+        ids = [row[0] for row in conn.execute('SELECT id FROM productos ORDER BY nombre')]
+
+    for producto_id in ids:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM productos WHERE id = ?', (producto_id,))
+            cursor.fetchone()
+            cursor.execute('''
+                SELECT * FROM color_especificaciones WHERE producto_id = ? ORDER BY peso_color DESC
+            ''', (producto_id,))
+            for color_row in cursor.fetchall():
+                cursor.execute('''
+                    SELECT nombre_pieza FROM color_piezas WHERE color_especificacion_id = ?
+                ''', (color_row[0],))
+                cursor.fetchall()
+    return ids
+
+
+def generar_productos(cantidad: int, semilla: int = 42):
+    """Generar productos sintéticos como objetos Producto"""
+    rnd = random.Random(semilla)
+    for numero in range(cantidad):
+        yield Producto(
+            nombre=f"{rnd.choice(NOMBRES)} {numero:06d}",
+            descripcion="Producto de prueba",
+            tiempo_impresion=rnd.randint(30, 900),
+            material=rnd.choice(MATERIALES),
+            guia_impresion="Altura de capa 0.2mm\nRelleno 20%",
+            colores_especificaciones=[
+                ColorEspecificacion(
+                    color_hex=color_hex, nombre_color=nombre, peso_color=rnd.uniform(5, 100),
+                    piezas=[f"Pieza {n + 1}" for n in range(rnd.randint(1, 3))]
+                )
+                for color_hex, nombre in rnd.sample(COLORES, rnd.randint(1, 3))
+            ]
+        )
+
+
+def ejecutar_ingesta(tamanos):
+    """Comparar la creación masiva por lotes con la creación producto a producto"""
+    for cantidad in tamanos:
+        with tempfile.TemporaryDirectory() as directorio:
+            db = DatabaseManagerInstrumentado(os.path.join(directorio, 'ingesta.db'))
+            db.init_database()
+
+            print(f"\n📥 {cantidad:,} productos")
+            imprimir_fila("crear_productos_bulk",
+                          *db.medir(db.crear_productos_bulk, generar_productos(cantidad)))
+
+            # Producto a producto solo sobre una muestra: a gran escala tarda demasiado
+            muestra = min(cantidad, 1_000)
+            resultado, consultas, segundos = db.medir(
+                lambda: [db.crear_producto(p) for p in generar_productos(muestra, semilla=7)]
+            )
+            imprimir_fila(f"crear_producto x{muestra:,}", resultado, consultas, segundos)
+            print(f"   {'(estimado para el total)':<32} {'':>8} {'':>14} {segundos * cantidad / muestra * 1000:>20.1f} ms")
+
+
+# Filtros que deben resolverse con índices. colores_ninguno no está: es un
+# anti-join y solo tiene sentido acompañado de otra condición.
+FILTROS_PLANES = {
+    "material": FiltroProductos.crear(materiales=['PETG']),
+    "peso entre 50 y 200 g": FiltroProductos.crear(peso=(50, 200)),
+    "más de 4 h": FiltroProductos.crear(tiempo_impresion=(240, None)),
+    "peso total entre 50 y 200 g": FiltroProductos.crear(peso_total=(50, 200)),
+    "tiempo total de más de 8 h": FiltroProductos.crear(tiempo_total=(480, None)),
+    "cama desde 80 °C": FiltroProductos.crear(temperatura_cama=(80, None)),
+    "extrusor hasta 205 °C": FiltroProductos.crear(temperatura_extrusor=(None, 205)),
+    "creados desde hoy": FiltroProductos.crear(fecha_creacion=(date.today(), None)),
+    "modificados hasta hoy": FiltroProductos.crear(fecha_modificacion=(None, date.today())),
+    "algún color": FiltroProductos.crear(alguno=['#FF0000', '#0000FF']),
+    "todos los colores": FiltroProductos.crear(todos=['#FF0000', '#000000']),
+    "PETG, > 4 h, cama ≥ 80, 50-200 g": FiltroProductos.crear(
+        materiales=['PETG'], tiempo_impresion=(240, None), temperatura_cama=(80, None), peso=(50, 200)
+    ),
+    "PLA o ABS, rojo, sin negro, 50-200 g": FiltroProductos.crear(
+        materiales=['PLA', 'ABS'], alguno=['#FF0000'], ninguno=['#000000'], peso=(50, 200)
+    ),
+}
+
+
+def planes_de(db: DatabaseManager, funcion, *args):
+    """Ejecutar una función y devolver el EXPLAIN QUERY PLAN de cada SELECT que hizo"""
+    conn = db.get_connection()
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)  # Con los parámetros ya expandidos
+    try:
+        funcion(*args)
+    finally:
+        conn.set_trace_callback(None)
+
+    return [
+        (sentencia, [fila[3] for fila in conn.execute(f'EXPLAIN QUERY PLAN {sentencia}')])
+        for sentencia in sentencias if sentencia.lstrip().upper().startswith('SELECT')
+    ]
+
+
+def ejecutar_planes(tamanos):
+    """Verificar con EXPLAIN QUERY PLAN que ningún filtro soportado recorre una tabla entera"""
+    fallidos = 0
+    for cantidad in tamanos:
+        with tempfile.TemporaryDirectory() as directorio:
+            db = DatabaseManager(os.path.join(directorio, 'planes.db'))
+            db.init_database()
+            poblar(db, cantidad)
+
+            # Sin estadísticas y con las que deja el mantenimiento
+            for analizado in (False, True):
+                if analizado:
+                    db.get_connection().execute('ANALYZE')
+                print(f"\n🔍 {cantidad:,} productos {'con' if analizado else 'sin'} ANALYZE")
+
+                for nombre, filtro in FILTROS_PLANES.items():
+                    db.cache.limpiar()
+                    planes = (planes_de(db, db.contar_productos, filtro)
+                              + planes_de(db, db.obtener_pagina_productos, 100, None, 'nombre',
+                                          False, True, filtro))
+                    # Con un filtro poco selectivo la página recorre idx_nombre
+                    # (el índice de orden) y se detiene al llenarse: no es un
+                    # recorrido completo
+                    recorridos = [
+                        (sentencia, paso) for sentencia, plan in planes
+                        for paso in plan if paso.startswith('SCAN ')
+                        and not ('idx_nombre' in paso and 'LIMIT' in sentencia)
+                    ]
+                    ordenado = any('idx_nombre' in paso for _, plan in planes for paso in plan)
+
+                    print(f"   {'✅' if not recorridos else '❌'} {nombre:<40} "
+                          f"{db.contar_productos(filtro):>8} filas"
+                          f"{'  (página por idx_nombre)' if ordenado else ''}")
+                    for sentencia, paso in recorridos:
+                        print(f"      {paso}  ←  {' '.join(sentencia.split())[:100]}")
+                    fallidos += bool(recorridos)
+            db.close()
+
+    return fallidos
+
+
+def _proceso_estres(ruta: str, journal_mode: str, segundos: float, semilla: int, resultados):
+    """Un proceso del test de estrés: lecturas y escrituras mezcladas durante ``segundos``"""
+    db = DatabaseManager(ruta, DatabaseConfig(journal_mode=journal_mode))
+    rnd = random.Random(semilla)
+    nuevos = generar_productos(10_000_000, semilla=semilla)
+    cuenta = {'lecturas': 0, 'escrituras': 0, 'abandonadas': 0, 'lecturas_bloqueadas': 0}
+
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        operacion = rnd.random()
+        try:
+            if operacion < 0.6:
+                db.obtener_pagina_productos(50, None, rnd.choice(['nombre', 'peso_total']), resumen=True)
+                cuenta['lecturas'] += 1
+            elif operacion < 0.85:
+                producto = db.obtener_producto(rnd.randint(1, 1000))
+                if producto is not None:
+                    producto.peso = rnd.uniform(10, 300)
+                    db.actualizar_producto(producto)
+                cuenta['escrituras'] += 1
+            elif operacion < 0.95:
+                db.crear_producto(next(nuevos))
+                cuenta['escrituras'] += 1
+            else:
+                db.eliminar_producto(rnd.randint(1001, 1_000_000))
+                cuenta['escrituras'] += 1
+        except BaseOcupadaError:
+            cuenta['abandonadas'] += 1
+        except sqlite3.OperationalError as e:
+            if not es_bloqueo(e):
+                raise
+            cuenta['lecturas_bloqueadas'] += 1
+
+    resultados.put((cuenta, db.escritura.metricas))
+    db.close()
+
+
+def ejecutar_estres(procesos: int, segundos: float, journal_mode: str = 'WAL') -> int:
+    """
+    Lanzar ``procesos`` procesos contra una base temporal y reportar
+    throughput y errores de bloqueo
+
+    Returns:
+        Cantidad de operaciones que fallaron por bloqueo
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'estres.db')
+        db = DatabaseManager(ruta, DatabaseConfig(journal_mode=journal_mode))
+        db.init_database()
+        poblar(db, 1_000)
+        db.close()
+
+        print(f"\n🔥 {procesos} procesos durante {segundos:.0f} s (journal_mode={journal_mode})")
+        resultados = multiprocessing.Queue()
+        trabajadores = [
+            multiprocessing.Process(target=_proceso_estres,
+                                    args=(ruta, journal_mode, segundos, semilla, resultados))
+            for semilla in range(procesos)
+        ]
+        inicio = time.perf_counter()
+        for trabajador in trabajadores:
+            trabajador.start()
+        reportes = [resultados.get() for _ in trabajadores]
+        for trabajador in trabajadores:
+            trabajador.join()
+        duracion = time.perf_counter() - inicio
+
+    errores = 0
+    totales = {'lecturas': 0, 'escrituras': 0}
+    for numero, (cuenta, metricas) in enumerate(reportes, 1):
+        print(f"   #{numero:<3} {cuenta['lecturas']:>6} lecturas {cuenta['escrituras']:>6} escrituras | {metricas}")
+        totales['lecturas'] += cuenta['lecturas']
+        totales['escrituras'] += cuenta['escrituras']
+        errores += cuenta['abandonadas'] + cuenta['lecturas_bloqueadas']
+        if cuenta['lecturas_bloqueadas']:
+            print(f"        ⚠️  {cuenta['lecturas_bloqueadas']} lecturas con 'database is locked'")
+
+    print(f"   {'Total':<4} {totales['lecturas'] / duracion:>8.1f} lecturas/s "
+          f"{totales['escrituras'] / duracion:>8.1f} escrituras/s | "
+          f"{'✅ sin errores de bloqueo' if not errores else f'❌ {errores} errores de bloqueo'}")
+    return errores
+
+
+# Sílabas para inventar nombres distintos (un vocabulario grande, a
+# diferencia de NOMBRES)
+SILABAS = [consonante + vocal for consonante in 'bcdfgjlmnprstvz' for vocal in 'aeiou']
+
+
+def nombres_inventados(cantidad: int, semilla: int = 7):
+    """Nombres distintos de dos palabras inventadas ("Kulame trisote")"""
+    rnd = random.Random(semilla)
+
+    def palabra():
+        return ''.join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 4)))
+
+    nombres = {}
+    while len(nombres) < cantidad:
+        nombres[f"{palabra().capitalize()} {palabra()}"] = None
+    return list(nombres)
+
+
+def con_error_de_tipeo(palabra: str, rnd: random.Random) -> str:
+    """La palabra con una letra de menos, de más, cambiada o dos letras invertidas"""
+    i = rnd.randrange(1, len(palabra) - 1)
+    error = rnd.choice(('omitir', 'agregar', 'cambiar', 'invertir'))
+    if error == 'omitir':
+        return palabra[:i] + palabra[i + 1:]
+    if error == 'agregar':
+        return palabra[:i] + rnd.choice('aeiou') + palabra[i:]
+    if error == 'cambiar':
+        return palabra[:i] + rnd.choice('bcdfglmnprst') + palabra[i + 1:]
+    return palabra[:i - 1] + palabra[i] + palabra[i - 1] + palabra[i + 1:]
+
+
+def ejecutar_aproximada(tamanos, consultas: int = 200):
+    """
+    Medir la búsqueda aproximada en SQLite (trigramas + FTS5) y en memoria
+
+    Cada producto tiene un nombre inventado distinto; se busca la primera
+    palabra del nombre de productos al azar con un error de tipeo y se
+    mide cuánto tarda cada camino y en cuántas el producto está entre
+    los resultados.
+    """
+    rnd = random.Random(11)
+    for cantidad in tamanos:
+        with tempfile.TemporaryDirectory() as directorio:
+            db = DatabaseManager(os.path.join(directorio, 'aproximada.db'))
+            db.init_database()
+            nombres = nombres_inventados(cantidad)
+            poblar(db, cantidad, nombres=nombres)
+
+            inicio = time.perf_counter()
+            indice = IndiceInvertido.desde_filas(db.obtener_filas_indice())
+            palabras = db.get_connection().execute(
+                'SELECT COUNT(DISTINCT palabra) FROM trigramas_nombres'
+            ).fetchone()[0]
+            print(f"\n🔤 {cantidad:,} nombres, {palabras:,} palabras distintas "
+                  f"(índice en memoria armado en {time.perf_counter() - inicio:.2f} s)")
+
+            caminos = {
+                'SQLite': lambda termino: db.buscar_ids_productos(termino),
+                'memoria': lambda termino: (indice.buscar(termino) or indice.buscar_aproximado(termino)),
+            }
+            tiempos = {camino: [] for camino in caminos}
+            encontrados = dict.fromkeys(caminos, 0)
+            for producto_id in rnd.sample(range(1, cantidad + 1), consultas):
+                palabra = nombres[producto_id - 1].split()[0].lower()
+                termino = con_error_de_tipeo(palabra, rnd)
+                for camino, buscar in caminos.items():
+                    inicio = time.perf_counter()
+                    ids = buscar(termino)
+                    tiempos[camino].append(time.perf_counter() - inicio)
+                    encontrados[camino] += producto_id in ids
+
+            for camino, medidos in tiempos.items():
+                medidos.sort()
+                print(f"   {camino:<8} mediana {medidos[len(medidos) // 2] * 1000:>6.2f} ms"
+                      f" | p95 {medidos[int(len(medidos) * 0.95)] * 1000:>6.2f} ms"
+                      f" | encontrado en {encontrados[camino] / consultas:>4.0%} de {consultas} búsquedas")
+            db.close()
+
+
+def ejecutar_colores(tamanos, consultas: int = 1000):
+    """Medir IndiceColores con colores al azar: armado, ΔE <= 5 y 8 más cercanos"""
+    rnd = random.Random(5)
+    print(f"Cálculo con {'NumPy' if np is not None else 'árbol k-d en Python'}")
+    for cantidad in tamanos:
+        colores = set()
+        while len(colores) < cantidad:
+            colores.add(f'#{rnd.randrange(1 << 24):06X}')
+
+        inicio = time.perf_counter()
+        indice = IndiceColores(colores)
+        armado = time.perf_counter() - inicio
+        print(f"\n🎨 {cantidad:,} colores (índice armado en {armado * 1000:.1f} ms)")
+
+        buscados = [f'#{rnd.randrange(1 << 24):06X}' for _ in range(consultas)]
+        for operacion, buscar in (('dentro_de ΔE <= 5', lambda c: indice.dentro_de(c, 5)),
+                                  ('cercanos k=8', lambda c: indice.cercanos(c, 8))):
+            inicio = time.perf_counter()
+            for color in buscados:
+                buscar(color)
+            print(f"   {operacion:<20} {(time.perf_counter() - inicio) / consultas * 1000:>8.3f} ms por consulta")
+
+
+def ejecutar_chips(tamanos, repeticiones: int = 200):
+    """
+    Medir lo que cuesta cambiar un chip de color: los productos que cumplen
+    el filtro y la cantidad por color, con BitmapColores y con SQLite
+    """
+    combinaciones = [
+        {'alguno': ['#FF0000', '#0000FF']},
+        {'todos': ['#FF0000', '#000000']},
+        {'alguno': ['#FFFFFF'], 'ninguno': ['#000000', '#00FF00']},
+    ]
+    for cantidad in tamanos:
+        with tempfile.TemporaryDirectory() as directorio:
+            db = DatabaseManager(os.path.join(directorio, 'chips.db'))
+            db.init_database()
+            poblar(db, cantidad)
+
+            inicio = time.perf_counter()
+            bitmaps = BitmapColores.desde_filas(db.obtener_colores_productos())
+            print(f"\n🏷️  {cantidad:,} productos (bitmaps armados en {(time.perf_counter() - inicio) * 1000:.0f} ms)")
+
+            for colores in combinaciones:
+                filtro = FiltroProductos.crear(**colores)
+                inicio = time.perf_counter()
+                for _ in range(repeticiones):
+                    total = len(bitmaps.filtrar(**colores))
+                    bitmaps.conteos()
+                en_memoria = (time.perf_counter() - inicio) / repeticiones
+
+                inicio = time.perf_counter()
+                total_sql = db.contar_productos(filtro)
+                db.obtener_colores_disponibles()
+                en_sql = time.perf_counter() - inicio
+
+                descripcion = ' '.join(f"{modo}={','.join(lista)}" for modo, lista in colores.items())
+                estado = "✅" if total == total_sql else "❌"
+                print(f"   {estado} {descripcion:<44} {total:>7} productos | "
+                      f"bitmaps {en_memoria * 1000:>6.3f} ms | SQLite {en_sql * 1000:>7.1f} ms")
+            db.close()
+
+
+def imprimir_fila(operacion, resultado, consultas, segundos):
+    print(f"   {operacion:<32} {len(resultado):>8} filas {consultas:>8} consultas {segundos * 1000:>10.1f} ms")
+
+
+def ejecutar(tamanos, incluir_legado=False):
+    """Ejecutar el benchmark para cada tamaño de catálogo"""
+    for cantidad in tamanos:
+        with tempfile.TemporaryDirectory() as directorio:
+            db = DatabaseManagerInstrumentado(os.path.join(directorio, 'benchmark.db'))
+            db.init_database()
+            poblar(db, cantidad)
+
+            print(f"\n📦 {cantidad:,} productos")
+            imprimir_fila("obtener_todos_productos", *db.medir(db.obtener_todos_productos))
+            imprimir_fila("buscar_productos_por_color", *db.medir(db.buscar_productos_por_color, '#FF0000'))
+            imprimir_fila("  con ΔE <= 10", *db.medir(db.buscar_productos_por_color, '#FF0000', 10))
+            imprimir_fila("buscar_productos 'robot rojo'", *db.medir(db.buscar_productos, 'robot rojo'))
+            imprimir_fila("buscar_productos 'maceta 0001'", *db.medir(db.buscar_productos, 'maceta 0001'))
+            imprimir_fila("buscar_productos 'robot'", *db.medir(db.buscar_productos, 'robot'))
+            imprimir_fila("  como ProductoResumen", *db.medir(db.buscar_productos, 'robot', 500, True))
+            imprimir_fila("obtener_estadisticas", *db.medir(db.obtener_estadisticas))
+            imprimir_fila("  recalculadas desde cero", *db.medir(lambda: db.stats.calcular(db.get_connection())))
+            if incluir_legado:
+                imprimir_fila("carga N+1 (anterior)", *db.medir(cargar_n_mas_1, db))
+
+
+def main():
+    """Función principal"""
+    argumentos = sys.argv[1:]
+    incluir_legado = '--legado' in argumentos
+    tamanos = [int(a) for a in argumentos if a.isdigit()] or TAMANOS_POR_DEFECTO
+
+    print("⏱️  BENCHMARK DE BASE DE DATOS")
+    print("=" * 50)
+    if '--ingesta' in argumentos:
+        ejecutar_ingesta(tamanos)
+    elif '--planes' in argumentos:
+        sys.exit(1 if ejecutar_planes([int(a) for a in argumentos if a.isdigit()] or [10_000]) else 0)
+    elif '--aproximada' in argumentos:
+        ejecutar_aproximada([int(a) for a in argumentos if a.isdigit()] or [100_000])
+    elif '--colores' in argumentos:
+        ejecutar_colores([int(a) for a in argumentos if a.isdigit()] or [1_000, 10_000])
+    elif '--chips' in argumentos:
+        ejecutar_chips([int(a) for a in argumentos if a.isdigit()] or [100_000])
+    elif '--estres' in argumentos:
+        numeros = [int(a) for a in argumentos if a.isdigit()]
+        procesos, segundos = (numeros + [4, 10][len(numeros):])[:2]
+        journal_mode = 'DELETE' if '--delete' in argumentos else 'WAL'
+        sys.exit(1 if ejecutar_estres(procesos, segundos, journal_mode) else 0)
+    else:
+        ejecutar(tamanos, incluir_legado)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ Configuración central de la aplicación 3D Print Manager
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Dict, Any
 
 
 @dataclass
@@ -24,6 +24,45 @@ class DatabaseConfig:
     db_path: str = "data/products.db"
     backup_enabled: bool = True
     backup_interval_hours: int = 24
+    backup_retention: int = 7  # Backups que se conservan en la carpeta de backups
+    backup_compress: bool = False  # Guardar los backups comprimidos con gzip
+    maintenance_on_idle: bool = True  # Limpiar huérfanos y optimizar con la app inactiva
+    maintenance_idle_minutes: int = 10
+
+    # Perfil de PRAGMAs aplicado al abrir cada conexión
+    # "AUTO": WAL si la base está en un disco local, DELETE si está en una
+    # unidad de red (donde WAL no funciona) o no se puede saber
+    journal_mode: str = "AUTO"
+    synchronous: str = "NORMAL"
+    foreign_keys: bool = True
+    cache_size_kb: int = 16384
+    mmap_size_mb: int = 256
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 2000  # Espera de SQLite por un bloqueo antes de "database is locked"
+
+    # Escrituras (CoordinadorEscritura): intentos de BEGIN IMMEDIATE cuando
+    # otro proceso tiene la base bloqueada más allá de busy_timeout
+    write_attempts: int = 4
+
+    # Guardar comprimidas con zlib las descripciones, guías y notas de al
+    # menos text_compression_min_bytes. Achica las filas de productos pero no
+    # el archivo (el índice FTS5 guarda los textos sin comprimir), y esos
+    # textos quedan ilegibles para el CLI de sqlite3, los visores de bases y
+    # las versiones anteriores de la app que usen la misma unidad compartida
+    text_compression: bool = False
+    text_compression_min_bytes: int = 4096
+
+    def get_pragmas(self) -> Dict[str, Any]:
+        """Obtener PRAGMAs a aplicar en cada conexión nueva"""
+        return {
+            'journal_mode': self.journal_mode,
+            'synchronous': self.synchronous,
+            'foreign_keys': 'ON' if self.foreign_keys else 'OFF',
+            'cache_size': -self.cache_size_kb,  # Negativo = KiB
+            'mmap_size': self.mmap_size_mb * 1024 * 1024,
+            'temp_store': self.temp_store,
+            'busy_timeout': self.busy_timeout_ms,
+        }
 
 
 @dataclass
@@ -33,6 +72,9 @@ class UIConfig:
     animation_enabled: bool = True
     notification_duration: int = 3000
     auto_save_interval: int = 300  # segundos
+    search_debounce_ms: int = 250  # Pausa al escribir antes de lanzar la búsqueda
+    memory_search_max_products: int = 50000  # Buscar en memoria hasta este tamaño (0: siempre SQLite)
+    color_filter_delta_e: float = 0.0  # Filtrar también por colores a esta diferencia ΔE (0: color exacto)
 
 
 @dataclass
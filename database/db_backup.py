@@ -0,0 +1,363 @@
+"""
+Copias de seguridad en caliente con la API de backup de SQLite
+"""
+
+import gzip
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+
+PREFIJO = "productos_backup_"
+MANIFIESTO = "manifiesto.json"
+
+
+class _CopiaReiniciada(Exception):
+    """La copia por pasos se reinició más de max_reinicios veces"""
+
+
+@dataclass
+class ResultadoBackup:
+    """Una copia de seguridad registrada en el manifiesto"""
+    archivo: str
+    fecha: str
+    bytes: int
+    comprimido: bool
+    token: Optional[int] = None  # Versión del registro de cambios copiada
+    verificado: bool = False
+
+
+class BackupService:
+    """
+    Crea, verifica, rota y restaura copias de la base de datos
+
+    La copia usa ``Connection.backup`` por pasos de ``paginas_por_paso``
+    páginas con una pausa entre pasos, así que la aplicación puede seguir
+    leyendo y escribiendo mientras tanto (si otra conexión escribe, SQLite
+    reinicia la copia y el resultado siempre es una instantánea coherente).
+    Si se reinicia más de ``max_reinicios`` veces, se copia de una vez:
+    las escrituras esperan a que termine, pero la copia termina.
+    Cada copia se revisa con ``PRAGMA integrity_check`` antes de guardarse.
+    """
+
+    def __init__(self, db_path, carpeta: str = "data/backups", intervalo_horas: float = 24,
+                 conservar: int = 7, comprimir: bool = False,
+                 paginas_por_paso: int = 256, pausa_paso: float = 0.005, max_reinicios: int = 3):
+        self.db_path = Path(db_path)
+        self.carpeta = Path(carpeta)
+        self.intervalo_horas = intervalo_horas
+        self.conservar = conservar
+        self.comprimir = comprimir
+        self.paginas_por_paso = paginas_por_paso
+        self.pausa_paso = pausa_paso
+        self.max_reinicios = max_reinicios
+
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @classmethod
+    def desde_config(cls, db_path, db_config, carpeta: str = "data/backups") -> 'BackupService':
+        """Crear el servicio con los campos backup_* de DatabaseConfig"""
+        return cls(
+            db_path, carpeta,
+            intervalo_horas=db_config.backup_interval_hours,
+            conservar=db_config.backup_retention,
+            comprimir=db_config.backup_compress,
+        )
+
+    # Copias
+
+    def crear_backup(self, forzar: bool = True,
+                     on_progreso: Optional[Callable[[int, int], None]] = None) -> Optional[ResultadoBackup]:
+        """
+        Copiar la base de datos en la carpeta de backups
+
+        Args:
+            forzar: Copiar aunque nada haya cambiado desde el último backup
+            on_progreso: Callback (páginas copiadas, páginas totales)
+
+        Returns:
+            El backup creado, o None si no hacía falta
+        """
+        if not self.db_path.exists():
+            return None
+
+        with self._lock:
+            self.carpeta.mkdir(parents=True, exist_ok=True)
+            origen = sqlite3.connect(str(self.db_path), timeout=30)
+            try:
+                token = self._token(origen)
+                ultimo = self.ultimo_backup()
+                if not forzar and ultimo and token is not None and ultimo.token == token:
+                    return None
+
+                nombre = f"{PREFIJO}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.db"
+                temporal = self.carpeta / (nombre + ".tmp")
+                destino = sqlite3.connect(str(temporal))
+                try:
+                    self._copiar(origen, destino, on_progreso)
+                    errores = self._verificar(destino)
+                    token = self._token(destino)  # El de la instantánea copiada
+                finally:
+                    destino.close()
+            finally:
+                origen.close()
+
+            if errores:
+                temporal.unlink(missing_ok=True)
+                raise sqlite3.DatabaseError(f"El backup no pasó la verificación: {errores[0]}")
+
+            if self.comprimir:
+                archivo = self.carpeta / (nombre + ".gz")
+                with open(temporal, 'rb') as entrada, gzip.open(archivo, 'wb', compresslevel=6) as salida:
+                    shutil.copyfileobj(entrada, salida)
+                temporal.unlink()
+            else:
+                archivo = self.carpeta / nombre
+                temporal.replace(archivo)
+
+            resultado = ResultadoBackup(
+                archivo=archivo.name,
+                fecha=datetime.now().isoformat(),
+                bytes=archivo.stat().st_size,
+                comprimido=self.comprimir,
+                token=token,
+                verificado=True,
+            )
+            backups = self.listar_backups() + [resultado]
+            self._guardar_manifiesto(self._rotar(backups))
+            return resultado
+
+    def _copiar(self, origen: sqlite3.Connection, destino: sqlite3.Connection,
+                on_progreso: Optional[Callable[[int, int], None]] = None):
+        """
+        Copiar por pasos y, si la copia se reinicia demasiado, de una vez
+
+        Cada escritura de otra conexión reinicia la copia por pasos desde la
+        primera página; con escrituras seguidas no terminaría nunca.
+        """
+        anterior = None
+        reinicios = 0
+
+        def progreso(estado, restantes, total):
+            nonlocal anterior, reinicios
+            if estado == sqlite3.SQLITE_OK:
+                # Sin reinicio, cada paso deja menos páginas por copiar
+                if anterior is not None and restantes >= anterior:
+                    reinicios += 1
+                    if reinicios > self.max_reinicios:
+                        raise _CopiaReiniciada()
+                anterior = restantes
+                self._pausar(estado, restantes, total)
+            if on_progreso:
+                on_progreso(total - restantes, total)
+
+        try:
+            origen.backup(destino, pages=self.paginas_por_paso, progress=progreso, sleep=self.pausa_paso)
+        except _CopiaReiniciada:
+            origen.backup(destino, pages=-1,
+                          progress=(lambda estado, restantes, total: on_progreso(total - restantes, total))
+                          if on_progreso else None)
+
+    def _pausar(self, estado, restantes, total):
+        """
+        Pausa entre dos pasos de la copia
+
+        ``sleep`` de Connection.backup solo espera cuando la base está
+        ocupada; esta pausa deja pasar a las demás conexiones en cada paso.
+        """
+        if estado == sqlite3.SQLITE_OK and self.pausa_paso > 0:
+            time.sleep(self.pausa_paso)
+
+    def restaurar(self, archivo, db_manager=None, destino: Optional[sqlite3.Connection] = None):
+        """
+        Reemplazar el contenido de la base de datos por el de un backup
+
+        La restauración también usa la API de backup, sobre una conexión
+        abierta, así que las demás conexiones ven el contenido nuevo sin
+        reabrirse. Con ``db_manager`` se copia en un turno de su
+        CoordinadorEscritura (sus transacciones esperan), se vacía su caché
+        y se reinicia el registro de cambios: las listas y los índices en
+        memoria, de este proceso o de otros, se recargan enteros.
+
+        Args:
+            archivo: Nombre (dentro de la carpeta) o ruta del backup
+            db_manager: DatabaseManager a restaurar
+            destino: Conexión a restaurar si no se da db_manager
+        """
+        ruta = Path(archivo)
+        if not ruta.exists():
+            ruta = self.carpeta / archivo
+
+        with self._lock, tempfile.TemporaryDirectory() as carpeta_temporal:
+            if ruta.suffix == '.gz':
+                descomprimido = Path(carpeta_temporal) / ruta.stem
+                with gzip.open(ruta, 'rb') as entrada, open(descomprimido, 'wb') as salida:
+                    shutil.copyfileobj(entrada, salida)
+                ruta = descomprimido
+
+            origen = sqlite3.connect(str(ruta))
+            try:
+                errores = self._verificar(origen)
+                if errores:
+                    raise sqlite3.DatabaseError(f"El backup está dañado: {errores[0]}")
+
+                if db_manager is None:
+                    origen.backup(destino, pages=self.paginas_por_paso, progress=self._pausar,
+                                  sleep=self.pausa_paso)
+                else:
+                    with db_manager.escritura.turno() as conn:
+                        token = db_manager.cambios.token(conn)
+                        origen.backup(conn, pages=self.paginas_por_paso, progress=self._pausar,
+                                      sleep=self.pausa_paso)
+            finally:
+                origen.close()
+
+        if db_manager is not None:
+            with db_manager.escritura.transaccion() as conn:
+                db_manager.cambios.reiniciar(conn, token)
+            db_manager.cache.limpiar()
+
+    def verificar_backup(self, archivo) -> List[str]:
+        """Revisar la integridad de un backup guardado (vacío si está bien)"""
+        ruta = self.carpeta / archivo
+        with tempfile.TemporaryDirectory() as carpeta_temporal:
+            if ruta.suffix == '.gz':
+                descomprimido = Path(carpeta_temporal) / ruta.stem
+                with gzip.open(ruta, 'rb') as entrada, open(descomprimido, 'wb') as salida:
+                    shutil.copyfileobj(entrada, salida)
+                ruta = descomprimido
+
+            conn = sqlite3.connect(str(ruta))
+            try:
+                return self._verificar(conn)
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _verificar(conn: sqlite3.Connection) -> List[str]:
+        """Errores de PRAGMA integrity_check (vacío si la base está bien)"""
+        filas = [fila[0] for fila in conn.execute('PRAGMA integrity_check')]
+        return [] if filas == ['ok'] else filas
+
+    @staticmethod
+    def _token(conn: sqlite3.Connection) -> Optional[int]:
+        """Versión del registro de cambios, para saltar backups sin cambios"""
+        try:
+            fila = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'cambios_productos'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return fila[0] if fila else None
+
+    # Manifiesto y rotación
+
+    def listar_backups(self) -> List[ResultadoBackup]:
+        """Backups registrados que siguen en disco, del más viejo al más nuevo"""
+        ruta = self.carpeta / MANIFIESTO
+        if not ruta.exists():
+            return []
+
+        try:
+            datos = json.loads(ruta.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Manifiesto de backups ilegible: {e}")
+            return []
+
+        backups = [ResultadoBackup(**b) for b in datos.get('backups', [])]
+        return [b for b in backups if (self.carpeta / b.archivo).exists()]
+
+    def ultimo_backup(self) -> Optional[ResultadoBackup]:
+        """El backup más reciente, si hay alguno"""
+        backups = self.listar_backups()
+        return backups[-1] if backups else None
+
+    def _rotar(self, backups: List[ResultadoBackup]) -> List[ResultadoBackup]:
+        """Borrar los backups que exceden ``conservar`` y devolver los que quedan"""
+        if self.conservar <= 0 or len(backups) <= self.conservar:
+            return backups
+
+        sobrantes, conservados = backups[:-self.conservar], backups[-self.conservar:]
+        for backup in sobrantes:
+            try:
+                (self.carpeta / backup.archivo).unlink(missing_ok=True)
+            except OSError as e:
+                print(f"⚠️  No se pudo borrar el backup {backup.archivo}: {e}")
+        return conservados
+
+    def _guardar_manifiesto(self, backups: List[ResultadoBackup]):
+        """Escribir el manifiesto de forma atómica"""
+        ruta = self.carpeta / MANIFIESTO
+        temporal = ruta.with_suffix('.tmp')
+        temporal.write_text(
+            json.dumps({'backups': [asdict(b) for b in backups]}, indent=2),
+            encoding='utf-8'
+        )
+        temporal.replace(ruta)
+
+    # Programación
+
+    def iniciar(self):
+        """Hacer backups periódicos en un hilo propio cada ``intervalo_horas``"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._programar, name="backup", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: Optional[float] = 5.0):
+        """Detener los backups periódicos (espera al que esté en curso)"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def segundos_hasta_proximo(self) -> float:
+        """Tiempo hasta el próximo backup programado, según el último hecho"""
+        ultimo = self.ultimo_backup()
+        if ultimo is None:
+            return 0.0
+        proximo = datetime.fromisoformat(ultimo.fecha) + timedelta(hours=self.intervalo_horas)
+        return max(0.0, (proximo - datetime.now()).total_seconds())
+
+    def _programar(self):
+        """Bucle del hilo de backups"""
+        while not self._detener.wait(self.segundos_hasta_proximo()):
+            try:
+                resultado = self.crear_backup(forzar=False)
+                if resultado is None:
+                    # Sin cambios: volver a mirar en el próximo intervalo
+                    self._detener.wait(self.intervalo_horas * 3600)
+                else:
+                    print(f"💾 Backup creado: {resultado.archivo}")
+            except Exception as e:
+                print(f"❌ Error creando backup: {e}")
+                self._detener.wait(self.intervalo_horas * 3600)
+
+
+# python -m database.db_backup [ruta.db] [--comprimir] [--verificar]
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    servicio = BackupService(argumentos[0] if argumentos else "data/productos.db",
+                             comprimir='--comprimir' in sys.argv)
+
+    if '--verificar' in sys.argv:
+        fallidos = 0
+        for backup in servicio.listar_backups():
+            errores = servicio.verificar_backup(backup.archivo)
+            fallidos += bool(errores)
+            print(f"{'✅' if not errores else '❌'} {backup.archivo}")
+        sys.exit(1 if fallidos else 0)
+
+    resultado = servicio.crear_backup()
+    if resultado:
+        print(f"💾 Backup creado: {resultado.archivo} ({resultado.bytes} bytes)")
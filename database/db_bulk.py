@@ -0,0 +1,135 @@
+"""
+Inserción masiva de productos por lotes
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from .db_piezas import SQL_INSERTAR_PIEZA, filas_de_piezas
+
+
+# Mientras carga_masiva tiene una fila, los triggers de inserción del índice
+# de texto, las estadísticas, el registro de cambios y los totales no hacen
+# nada. La fila solo existe dentro de la transacción de un lote: ninguna otra
+# conexión la llega a ver, y los triggers nunca se quitan ni se recrean
+SQL_TABLA_CARGA_MASIVA = '''
+    CREATE TABLE IF NOT EXISTS carga_masiva (id INTEGER PRIMARY KEY)
+'''
+
+# Condición WHEN de los triggers de inserción
+SIN_CARGA_MASIVA = 'NOT EXISTS (SELECT 1 FROM carga_masiva)'
+
+
+@contextmanager
+def carga_masiva(conn):
+    """
+    Apagar los triggers de inserción dentro de la transacción actual
+
+    Si el bloque falla, la transacción se revierte junto con la fila.
+    """
+    conn.execute('INSERT INTO carga_masiva DEFAULT VALUES')
+    yield
+    conn.execute('DELETE FROM carga_masiva')
+
+
+def dividir_en_lotes(productos: Iterable, tamano_lote: int) -> Iterator[List]:
+    """Recorrer un iterable en listas de hasta ``tamano_lote`` elementos"""
+    iterador = iter(productos)
+    while True:
+        lote = list(islice(iterador, tamano_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def _siguiente_id(cursor, tabla: str) -> int:
+    """
+    Primer ID libre de una tabla AUTOINCREMENT
+
+    Se consulta dentro de la transacción del lote (BEGIN IMMEDIATE), por lo
+    que ningún otro escritor puede tomar esos IDs mientras tanto.
+    """
+    cursor.execute(f'''
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = '{tabla}'), 0),
+            COALESCE((SELECT MAX(id) FROM {tabla}), 0)
+        ) + 1
+    ''')
+    return cursor.fetchone()[0]
+
+
+def insertar_lote(cursor, productos: List) -> List[int]:
+    """
+    Insertar un lote de productos con sus colores y piezas
+
+    Los IDs se asignan en Python a partir del primer ID libre de cada
+    tabla, así cada tabla se inserta con un único executemany sin leer
+    ``lastrowid`` fila por fila. Los IDs asignados quedan en los objetos.
+
+    Args:
+        cursor: Cursor dentro de una transacción de escritura
+        productos: Productos a insertar
+
+    Returns:
+        IDs de los productos insertados, en el mismo orden
+    """
+    ahora = datetime.now().isoformat()
+    producto_id = _siguiente_id(cursor, 'productos')
+    color_id = _siguiente_id(cursor, 'color_especificaciones')
+
+    filas_productos, filas_colores, filas_piezas, ids = [], [], [], []
+    for producto in productos:
+        producto.id = producto_id
+        ids.append(producto_id)
+        filas_productos.append((
+            producto_id,
+            producto.nombre,
+            producto.descripcion,
+            producto.peso,
+            producto.color,
+            producto.tiempo_impresion,
+            producto.material,
+            producto.temperatura_extrusor,
+            producto.temperatura_cama,
+            producto.imagen_path,
+            producto.guia_impresion,
+            ahora,
+            ahora
+        ))
+
+        for color_spec in producto.colores_especificaciones:
+            color_spec.id = color_id
+            filas_colores.append((
+                color_id,
+                producto_id,
+                color_spec.color_hex,
+                color_spec.nombre_color,
+                color_spec.peso_color,
+                color_spec.tiempo_adicional,
+                color_spec.notas
+            ))
+            filas_piezas.extend(filas_de_piezas(color_id, color_spec))
+            color_id += 1
+
+        producto_id += 1
+
+    cursor.executemany('''
+        INSERT INTO productos (
+            id, nombre, descripcion, peso, color, tiempo_impresion,
+            material, temperatura_extrusor, temperatura_cama,
+            imagen_path, guia_impresion, fecha_creacion, fecha_modificacion
+        ) VALUES (?, ?, comprimir_texto(?), ?, ?, ?, ?, ?, ?, ?, comprimir_texto(?), ?, ?)
+    ''', filas_productos)
+
+    cursor.executemany('''
+        INSERT INTO color_especificaciones (
+            id, producto_id, color_hex, nombre_color, peso_color,
+            tiempo_adicional, notas
+        ) VALUES (?, ?, ?, ?, ?, ?, comprimir_texto(?))
+    ''', filas_colores)
+
+    cursor.executemany(SQL_INSERTAR_PIEZA, filas_piezas)
+
+    return ids
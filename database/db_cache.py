@@ -0,0 +1,90 @@
+"""
+Caché de productos por ID (identity map) para la capa de datos
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class CacheProductos:
+    """
+    Identity map de productos cargados, etiquetados con fecha_modificacion
+
+    Guarda por separado los ``Producto`` completos y los ``ProductoResumen``
+    de la lista. Una entrada solo se reutiliza si su etiqueta coincide con
+    la fecha_modificacion actual de la fila, y las escrituras de
+    ``DatabaseManager`` la invalidan explícitamente. Los objetos devueltos
+    son compartidos: quien los modifique debe guardarlos o descartarlos.
+    """
+
+    def __init__(self, max_entradas: int = 5000):
+        self.max_entradas = max_entradas
+        self._entradas: Dict[bool, OrderedDict] = {False: OrderedDict(), True: OrderedDict()}
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def buscar(self, etiquetas: Iterable[Tuple[int, Optional[str]]],
+               resumen: bool = False) -> Tuple[List[Any], List[int]]:
+        """
+        Buscar productos por (id, fecha_modificacion)
+
+        Returns:
+            (lista en el mismo orden con None donde no hubo acierto, IDs faltantes)
+        """
+        entradas = self._entradas[resumen]
+        encontrados, faltantes = [], []
+
+        with self._lock:
+            for producto_id, etiqueta in etiquetas:
+                entrada = entradas.get(producto_id)
+                if entrada is not None and entrada[0] == etiqueta:
+                    entradas.move_to_end(producto_id)
+                    encontrados.append(entrada[1])
+                    self.aciertos += 1
+                else:
+                    encontrados.append(None)
+                    faltantes.append(producto_id)
+                    self.fallos += 1
+
+        return encontrados, faltantes
+
+    def guardar(self, productos: Iterable[Any], etiquetas: Dict[int, Optional[str]],
+                resumen: bool = False):
+        """Guardar productos recién cargados con su etiqueta"""
+        entradas = self._entradas[resumen]
+        with self._lock:
+            for producto in productos:
+                entradas[producto.id] = (etiquetas.get(producto.id), producto)
+                entradas.move_to_end(producto.id)
+            while len(entradas) > self.max_entradas:
+                entradas.popitem(last=False)
+
+    def invalidar(self, producto_id: int):
+        """Descartar un producto (completo y resumen) tras escribirlo"""
+        with self._lock:
+            for entradas in self._entradas.values():
+                entradas.pop(producto_id, None)
+            self.invalidaciones += 1
+
+    def limpiar(self):
+        """Descartar todo el contenido (por ejemplo, tras una carga masiva o restauración)"""
+        with self._lock:
+            for entradas in self._entradas.values():
+                entradas.clear()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores de uso de la caché"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else 0.0,
+                'productos': len(self._entradas[False]),
+                'resumenes': len(self._entradas[True]),
+            }
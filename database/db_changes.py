@@ -0,0 +1,229 @@
+"""
+Registro de cambios del catálogo para refrescar vistas sin recargarlas
+"""
+
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Set
+
+from .db_bulk import SIN_CARGA_MASIVA
+
+
+SQL_TABLA = '''
+    CREATE TABLE IF NOT EXISTS cambios_productos (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla TEXT NOT NULL,
+        producto_id INTEGER NOT NULL,
+        operacion TEXT NOT NULL CHECK (operacion IN ('I', 'U', 'D'))
+    )
+'''
+
+
+def _registrar(tabla: str, producto_id: str, operacion: str) -> str:
+    return f'''
+        INSERT INTO cambios_productos (tabla, producto_id, operacion)
+        VALUES ('{tabla}', {producto_id}, '{operacion}');'''
+
+
+def _registrar_producto_de(tabla: str, producto_id: str) -> str:
+    """Registrar un cambio en una tabla hija solo si su producto existe (no en cascadas)"""
+    return f'''
+        INSERT INTO cambios_productos (tabla, producto_id, operacion)
+        SELECT '{tabla}', id, 'U' FROM productos WHERE id = {producto_id};'''
+
+
+def _registrar_pieza(especificacion_id: str) -> str:
+    return f'''
+        INSERT INTO cambios_productos (tabla, producto_id, operacion)
+        SELECT 'color_piezas', p.id, 'U' FROM color_especificaciones ce
+        JOIN productos p ON p.id = ce.producto_id
+        WHERE ce.id = {especificacion_id};'''
+
+
+# Cada cuántas versiones se descartan las más viejas del registro
+INTERVALO_PODA = 1000
+CONSERVAR = 20000
+
+# Cada escritura deja en el registro el ID del producto afectado. Los cambios
+# en especificaciones y piezas cuentan como actualización de su producto.
+TRIGGERS = {
+    'trg_cambios_podar': f'''
+        AFTER INSERT ON cambios_productos
+        WHEN NEW.version % {INTERVALO_PODA} = 0 BEGIN
+            DELETE FROM cambios_productos WHERE version <= NEW.version - {CONSERVAR};
+        END''',
+    'trg_cambios_producto_insert': f'''
+        AFTER INSERT ON productos WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_registrar('productos', 'NEW.id', 'I')}
+        END''',
+    # Sin peso_total ni tiempo_total: los recalculan los triggers de
+    # db_totales cuando cambia el producto o sus colores, que ya se registran
+    'trg_cambios_producto_update': f'''
+        AFTER UPDATE OF nombre, descripcion, peso, color, tiempo_impresion, material,
+                        temperatura_extrusor, temperatura_cama, imagen_path, guia_impresion,
+                        fecha_creacion, fecha_modificacion ON productos BEGIN
+            {_registrar('productos', 'NEW.id', 'U')}
+        END''',
+    'trg_cambios_producto_delete': f'''
+        AFTER DELETE ON productos BEGIN
+            {_registrar('productos', 'OLD.id', 'D')}
+        END''',
+    'trg_cambios_color_insert': f'''
+        AFTER INSERT ON color_especificaciones WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_registrar_producto_de('color_especificaciones', 'NEW.producto_id')}
+        END''',
+    'trg_cambios_color_update': f'''
+        AFTER UPDATE ON color_especificaciones BEGIN
+            {_registrar_producto_de('color_especificaciones', 'NEW.producto_id')}
+        END''',
+    'trg_cambios_color_update_producto_viejo': f'''
+        AFTER UPDATE OF producto_id ON color_especificaciones
+        WHEN OLD.producto_id IS NOT NEW.producto_id BEGIN
+            {_registrar_producto_de('color_especificaciones', 'OLD.producto_id')}
+        END''',
+    'trg_cambios_color_delete': f'''
+        AFTER DELETE ON color_especificaciones BEGIN
+            {_registrar_producto_de('color_especificaciones', 'OLD.producto_id')}
+        END''',
+    'trg_cambios_pieza_insert': f'''
+        AFTER INSERT ON color_piezas WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_registrar_pieza('NEW.color_especificacion_id')}
+        END''',
+    'trg_cambios_pieza_update': f'''
+        AFTER UPDATE ON color_piezas BEGIN
+            {_registrar_pieza('NEW.color_especificacion_id')}
+        END''',
+    'trg_cambios_pieza_delete': f'''
+        AFTER DELETE ON color_piezas BEGIN
+            {_registrar_pieza('OLD.color_especificacion_id')}
+        END''',
+}
+
+
+@dataclass
+class CambiosProductos:
+    """Productos que cambiaron entre dos tokens del registro"""
+    desde: int
+    hasta: int
+    modificados: Set[int] = field(default_factory=set)  # Creados o actualizados
+    eliminados: Set[int] = field(default_factory=set)
+    por_tabla: Dict[str, Set[int]] = field(default_factory=dict)
+    completo: bool = False  # El registro ya no cubre 'desde': hay que recargar todo
+
+    @property
+    def vacio(self) -> bool:
+        """Indica si no hubo ningún cambio"""
+        return not self.completo and not self.modificados and not self.eliminados
+
+
+class RegistroCambios:
+    """
+    Registro de cambios por producto mantenido por triggers
+
+    El token es la última versión del registro. ``PRAGMA data_version``
+    cambia cuando otra conexión (otro hilo u otro proceso con el mismo
+    archivo) confirma una escritura, y ``total_changes`` cuando escribe la
+    propia; si ninguno cambió, el token se responde sin consultar.
+    """
+
+    def __init__(self, conservar: int = CONSERVAR):
+        self.conservar = conservar
+        self._local = threading.local()
+
+    def crear(self, conn: sqlite3.Connection):
+        """Crear la tabla y los triggers si no existen"""
+        conn.execute(SQL_TABLA)
+        self.crear_triggers(conn)
+
+    def crear_triggers(self, conn: sqlite3.Connection):
+        """Crear los triggers que falten"""
+        for nombre, cuerpo in TRIGGERS.items():
+            conn.execute(f'CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}')
+
+    def olvidar_token(self):
+        """Descartar los tokens recordados (tras reemplazar la base, p. ej. al restaurar)"""
+        self._local = threading.local()
+
+    def reiniciar(self, conn: sqlite3.Connection, despues_de: int = 0):
+        """
+        Vaciar el registro y llevar la versión más allá de ``despues_de``
+
+        Tras reemplazar la base (al restaurar un backup) el registro no
+        describe lo que cambió: con esto ningún token anterior queda cubierto
+        y cada vista o índice en memoria se recarga entero (``completo``).
+        """
+        conn.execute('DELETE FROM cambios_productos')
+        version = max(self.token(conn), despues_de) + 1
+        if conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'cambios_productos'",
+                        (version,)).rowcount == 0:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('cambios_productos', ?)",
+                         (version,))
+        self.olvidar_token()
+
+    def registrar_rango(self, conn: sqlite3.Connection, desde_id: int, hasta_id: int):
+        """Registrar como creados los productos con ID en el rango (cargas masivas)"""
+        conn.execute('''
+            INSERT INTO cambios_productos (tabla, producto_id, operacion)
+            SELECT 'productos', id, 'I' FROM productos WHERE id BETWEEN ? AND ?
+        ''', (desde_id, hasta_id))
+
+    def token(self, conn: sqlite3.Connection) -> int:
+        """Versión actual del registro"""
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        clave = (id(conn), data_version, conn.total_changes)
+        if getattr(self._local, 'clave', None) == clave:
+            return self._local.token
+
+        fila = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'cambios_productos'"
+        ).fetchone()
+        self._local.clave = clave
+        self._local.token = fila[0] if fila else 0
+        return self._local.token
+
+    def cambios_desde(self, conn: sqlite3.Connection, desde: int) -> CambiosProductos:
+        """
+        Productos que cambiaron después del token ``desde``
+
+        El estado final de cada producto es el de su último registro: si el
+        último es un borrado del producto, está en ``eliminados``.
+        """
+        hasta = self.token(conn)
+        cambios = CambiosProductos(desde=desde, hasta=hasta)
+        if desde == hasta:
+            return cambios
+
+        primera = conn.execute('SELECT MIN(version) FROM cambios_productos').fetchone()[0]
+        if desde > hasta or (primera or hasta + 1) > desde + 1:
+            cambios.completo = True
+            return cambios
+
+        cursor = conn.execute('''
+            SELECT tabla, producto_id, operacion FROM cambios_productos
+            WHERE version > ? AND version <= ?
+            ORDER BY version
+        ''', (desde, hasta))
+        for tabla, producto_id, operacion in cursor:
+            cambios.por_tabla.setdefault(tabla, set()).add(producto_id)
+            if operacion == 'D':
+                cambios.modificados.discard(producto_id)
+                cambios.eliminados.add(producto_id)
+            else:
+                cambios.eliminados.discard(producto_id)
+                cambios.modificados.add(producto_id)
+
+        return cambios
+
+    def podar(self, conn: sqlite3.Connection):
+        """
+        Descartar las versiones más viejas, conservando las últimas ``conservar``
+
+        El trigger trg_cambios_podar lo hace solo cada INTERVALO_PODA
+        versiones; esto es para después de una carga masiva.
+        """
+        conn.execute('''
+            DELETE FROM cambios_productos WHERE version <= (
+                SELECT seq FROM sqlite_sequence WHERE name = 'cambios_productos'
+            ) - ?
+        ''', (self.conservar,))
@@ -0,0 +1,175 @@
+"""
+Gestor de conexiones SQLite persistentes para la aplicación
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from .db_textos import registrar_funciones
+
+# Tipos de /proc/mounts de sistemas de archivos de red. WAL coordina a los
+# procesos con memoria compartida (el archivo -shm), que no funciona entre
+# equipos: en estas unidades la base tiene que usar journal_mode DELETE
+SISTEMAS_DE_RED = {
+    'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'afs', 'ncpfs', '9p',
+    'fuse.sshfs', 'davfs', 'fuse.davfs2', 'ceph', 'glusterfs', 'fuse.glusterfs',
+}
+
+
+def es_unidad_local(ruta: str) -> Optional[bool]:
+    """
+    Indica si un archivo está en un disco local
+
+    Returns:
+        True o False, o None si en este sistema no se puede saber
+    """
+    ruta = os.path.abspath(ruta)
+
+    if os.name == 'nt':
+        if ruta.startswith('\\\\'):  # Ruta UNC (\\servidor\carpeta)
+            return False
+        import ctypes
+        unidad = os.path.splitdrive(ruta)[0] + '\\'
+        return ctypes.windll.kernel32.GetDriveTypeW(unidad) == 3  # DRIVE_FIXED
+
+    try:
+        with open('/proc/mounts', encoding='utf-8') as montajes:
+            puntos = [linea.split()[1:3] for linea in montajes]
+    except OSError:
+        return None
+
+    # El punto de montaje más largo que contiene la ruta
+    ruta = os.path.realpath(ruta)
+    tipo, largo = None, -1
+    for punto, sistema in puntos:
+        punto = punto.replace('\\040', ' ')
+        if (ruta == punto or ruta.startswith(punto.rstrip('/') + '/')) and len(punto) > largo:
+            tipo, largo = sistema, len(punto)
+    return None if tipo is None else tipo not in SISTEMAS_DE_RED
+
+
+def elegir_journal_mode(db_path: str, journal_mode: str) -> str:
+    """
+    journal_mode a aplicar según dónde está la base
+
+    "AUTO" usa WAL solo si la base está en un disco local y DELETE en los
+    demás casos. WAL pedido explícitamente para una unidad de red también
+    pasa a DELETE, con un aviso.
+    """
+    modo = journal_mode.upper()
+    if modo not in ('AUTO', 'WAL'):
+        return journal_mode
+
+    local = es_unidad_local(db_path)
+    if local is False:
+        print(f"⚠️  La base está en una unidad de red: se usa journal_mode DELETE en lugar de WAL ({db_path})")
+        return 'DELETE'
+    if modo == 'AUTO':
+        return 'WAL' if local else 'DELETE'
+    return 'WAL'
+
+
+class ConnectionManager:
+    """
+    Mantiene una conexión SQLite abierta por hilo.
+
+    Cada conexión se abre una sola vez, con el perfil de PRAGMAs de
+    ``DatabaseConfig`` aplicado, y se reutiliza en todas las operaciones
+    de ese hilo hasta que se llama a ``close()``.
+    """
+
+    def __init__(self, db_path, db_config=None):
+        """
+        Inicializar el gestor de conexiones
+
+        Args:
+            db_path: Ruta del archivo de base de datos
+            db_config: DatabaseConfig con el perfil de PRAGMAs
+                (por defecto, la configuración global de la aplicación)
+        """
+        if db_config is None:
+            from config.app_config import get_database_config
+            db_config = get_database_config()
+
+        self.db_path = str(db_path) if isinstance(db_path, Path) else db_path
+        self.db_config = db_config
+        self.pragmas = db_config.get_pragmas()
+        self.pragmas['journal_mode'] = elegir_journal_mode(self.db_path, self.pragmas['journal_mode'])
+        # 0 = comprimir_texto() deja los textos como vienen
+        self.compresion_minima = db_config.text_compression_min_bytes if db_config.text_compression else 0
+
+        self._local = threading.local()
+        self._conexiones: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Obtener la conexión del hilo actual, abriéndola si no existe"""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, 'conexion', None)
+        if conn is None:
+            conn = self._abrir_conexion()
+            self._local.conexion = conn
+            with self._lock:
+                self._conexiones.append(conn)
+        return conn
+
+    def _abrir_conexion(self) -> sqlite3.Connection:
+        """Abrir una conexión nueva y aplicar el perfil de PRAGMAs"""
+        # check_same_thread=False solo para que close() pueda cerrar
+        # conexiones de otros hilos; cada hilo usa únicamente la suya
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # En una base nueva (todavía sin páginas) auto_vacuum va antes que
+        # todo: journal_mode = WAL ya escribe la cabecera, y después solo
+        # cambia con un VACUUM completo
+        if conn.execute('PRAGMA page_count').fetchone()[0] == 0:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        for nombre, valor in self.pragmas.items():
+            conn.execute(f'PRAGMA {nombre} = {valor}')
+        # Funciones de los textos comprimidos
+        registrar_funciones(conn, self.compresion_minima)
+        return conn
+
+    def get_open_connections(self) -> int:
+        """Obtener cantidad de conexiones abiertas"""
+        with self._lock:
+            return len(self._conexiones)
+
+    def cerrar_conexion_hilo(self):
+        """Cerrar solo la conexión del hilo actual (si vuelve a usarla, se abre otra)"""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, 'conexion', None)
+        if conn is None:
+            return
+        self._local.conexion = None
+        with self._lock:
+            self._conexiones = [otra for otra in self._conexiones if otra is not conn]
+
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error cerrando conexión: {e}")
+
+    def close(self):
+        """
+        Cerrar todas las conexiones abiertas por cualquier hilo
+
+        Solo cuando ningún otro hilo está usando la suya: cerrarla en medio
+        de una transacción la corta a la mitad.
+        """
+        with self._lock:
+            conexiones, self._conexiones = self._conexiones, []
+            self._local = threading.local()
+
+        for conn in conexiones:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error cerrando conexión: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
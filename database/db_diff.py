@@ -0,0 +1,193 @@
+"""
+Diferencias entre un producto editado y su versión guardada
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from models.pieza import Pieza
+from .db_piezas import valores_pieza
+
+# Campos de la fila de productos que se comparan y se escriben al actualizar
+CAMPOS_PRODUCTO = (
+    'nombre', 'descripcion', 'peso', 'color', 'tiempo_impresion', 'material',
+    'temperatura_extrusor', 'temperatura_cama', 'imagen_path', 'guia_impresion',
+)
+
+# Campos de color_especificaciones que se comparan y se escriben
+CAMPOS_COLOR = ('color_hex', 'nombre_color', 'peso_color', 'tiempo_adicional', 'notas')
+
+
+@dataclass
+class ReporteEscritura:
+    """Filas escritas por una actualización, por tabla y operación"""
+    encontrado: bool = False  # El producto existía en la base de datos
+    productos_actualizados: int = 0
+    colores_insertados: int = 0
+    colores_actualizados: int = 0
+    colores_eliminados: int = 0
+    piezas_insertadas: int = 0
+    piezas_actualizadas: int = 0
+    piezas_eliminadas: int = 0
+
+    @property
+    def filas_tocadas(self) -> int:
+        """Total de filas insertadas, actualizadas o eliminadas"""
+        return (self.productos_actualizados
+                + self.colores_insertados + self.colores_actualizados + self.colores_eliminados
+                + self.piezas_insertadas + self.piezas_actualizadas + self.piezas_eliminadas)
+
+    @property
+    def sin_cambios(self) -> bool:
+        """Indica si no hubo nada que escribir"""
+        return self.filas_tocadas == 0
+
+    def __str__(self):
+        return (f"{self.filas_tocadas} filas "
+                f"(producto: {self.productos_actualizados}, "
+                f"colores: +{self.colores_insertados} ~{self.colores_actualizados} -{self.colores_eliminados}, "
+                f"piezas: +{self.piezas_insertadas} ~{self.piezas_actualizadas} -{self.piezas_eliminadas})")
+
+
+@dataclass
+class ColorGuardado:
+    """Especificación de color tal como está en la base de datos"""
+    id: int
+    valores: Tuple  # En el orden de CAMPOS_COLOR
+    piezas: List[Tuple[int, Tuple]] = field(default_factory=list)  # (id, valores en orden de CAMPOS_PIEZA) por id
+
+
+@dataclass
+class PlanEscritura:
+    """Sentencias necesarias para llevar el grafo guardado al editado"""
+    actualizar_producto: bool = False
+    # (valores..., id) para UPDATE de color_especificaciones
+    colores_actualizar: List[Tuple] = field(default_factory=list)
+    # Especificaciones nuevas, con sus piezas
+    colores_insertar: List = field(default_factory=list)
+    colores_eliminar: List[int] = field(default_factory=list)
+    # (color_especificacion_id, valores...) en el orden de CAMPOS_PIEZA
+    piezas_insertar: List[Tuple] = field(default_factory=list)
+    # (valores..., id) para UPDATE de color_piezas
+    piezas_actualizar: List[Tuple] = field(default_factory=list)
+    piezas_eliminar: List[int] = field(default_factory=list)
+
+    @property
+    def sin_cambios(self) -> bool:
+        """Indica si no hay nada que escribir"""
+        return not (self.actualizar_producto or self.colores_actualizar or self.colores_insertar
+                    or self.colores_eliminar or self.piezas_insertar or self.piezas_actualizar
+                    or self.piezas_eliminar)
+
+
+def valores_color(color_spec) -> Tuple:
+    """Valores de una especificación en el orden de CAMPOS_COLOR"""
+    return (
+        color_spec.color_hex,
+        color_spec.nombre_color or "",
+        color_spec.peso_color or 0.0,
+        color_spec.tiempo_adicional or 0,
+        color_spec.notas or "",
+    )
+
+
+def _emparejar_colores(nuevos: List, guardados: Dict[int, ColorGuardado]) -> List[Optional[ColorGuardado]]:
+    """
+    Emparejar cada especificación editada con una guardada
+
+    Primero por ID y, para las que no lo tienen (creadas en el formulario),
+    por color_hex entre las guardadas que quedan libres.
+    """
+    libres = dict(guardados)
+    pares: List[Optional[ColorGuardado]] = [None] * len(nuevos)
+
+    for i, color_spec in enumerate(nuevos):
+        guardado = libres.pop(getattr(color_spec, 'id', None), None)
+        if guardado is not None:
+            pares[i] = guardado
+
+    for i, color_spec in enumerate(nuevos):
+        if pares[i] is not None:
+            continue
+        guardado = next((g for g in libres.values() if g.valores[0] == color_spec.color_hex), None)
+        if guardado is not None:
+            pares[i] = libres.pop(guardado.id)
+
+    return pares
+
+
+def _diferenciar_piezas(plan: PlanEscritura, color_id: int,
+                        guardadas: List[Tuple[int, Tuple]], nuevas: List[Tuple]):
+    """Comparar piezas por posición para conservar su orden (por id)"""
+    for (pieza_id, valores_guardados), valores_nuevos in zip(guardadas, nuevas):
+        if valores_guardados != valores_nuevos:
+            plan.piezas_actualizar.append(valores_nuevos + (pieza_id,))
+
+    for valores in nuevas[len(guardadas):]:
+        plan.piezas_insertar.append((color_id,) + valores)
+
+    for pieza_id, _ in guardadas[len(nuevas):]:
+        plan.piezas_eliminar.append(pieza_id)
+
+
+def _conservar_piezas_por_nombre(plan: PlanEscritura, color_id: int,
+                                 guardadas: List[Tuple[int, Tuple]], nombres: List[str]):
+    """
+    Comparar piezas solo por nombre, sin tocar las filas guardadas que siguen
+
+    Para especificaciones sin ``piezas_detalle`` (las que arma el formulario
+    con los nombres): su detalle sería el de Pieza.from_simple_name, no el
+    guardado. Los nombres nuevos se insertan y los que faltan se eliminan.
+    """
+    libres = list(guardadas)
+    for nombre in nombres:
+        guardada = next((pieza for pieza in libres if pieza[1][0] == nombre), None)
+        if guardada is None:
+            plan.piezas_insertar.append((color_id,) + valores_pieza(Pieza.from_simple_name(nombre)))
+        else:
+            libres.remove(guardada)
+
+    plan.piezas_eliminar.extend(pieza_id for pieza_id, _ in libres)
+
+
+def calcular_plan(producto, producto_guardado, colores_guardados: Dict[int, ColorGuardado]) -> PlanEscritura:
+    """
+    Calcular las escrituras mínimas para actualizar un producto
+
+    Args:
+        producto: Producto editado
+        producto_guardado: Producto tal como está en la base de datos
+        colores_guardados: Especificaciones guardadas por ID, con sus piezas
+
+    Returns:
+        PlanEscritura con las filas a actualizar, insertar y eliminar
+    """
+    plan = PlanEscritura()
+    plan.actualizar_producto = any(
+        getattr(producto, campo) != getattr(producto_guardado, campo) for campo in CAMPOS_PRODUCTO
+    )
+
+    pares = _emparejar_colores(producto.colores_especificaciones, colores_guardados)
+    emparejados = set()
+
+    for color_spec, guardado in zip(producto.colores_especificaciones, pares):
+        if guardado is None:
+            plan.colores_insertar.append(color_spec)
+            continue
+
+        emparejados.add(guardado.id)
+        valores = valores_color(color_spec)
+        if valores != guardado.valores:
+            plan.colores_actualizar.append(valores + (guardado.id,))
+        if color_spec.piezas_detalle:
+            _diferenciar_piezas(plan, guardado.id, guardado.piezas,
+                                [valores_pieza(pieza) for pieza in color_spec.get_piezas_como_objetos()])
+        else:
+            _conservar_piezas_por_nombre(plan, guardado.id, guardado.piezas, color_spec.piezas)
+
+    for color_id, guardado in colores_guardados.items():
+        if color_id not in emparejados:
+            plan.colores_eliminar.append(color_id)
+            plan.piezas_eliminar.extend(pieza_id for pieza_id, _ in guardado.piezas)
+
+    return plan
@@ -0,0 +1,224 @@
+"""
+Coordinación de escrituras entre hilos y procesos que comparten la base
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+
+# Mensajes de SQLite cuando otra conexión tiene el bloqueo
+MENSAJES_BLOQUEO = ('database is locked', 'database table is locked', 'database schema is locked')
+
+
+class BaseOcupadaError(sqlite3.OperationalError):
+    """La base siguió bloqueada por otra conexión después de todos los reintentos"""
+
+
+def es_bloqueo(error: BaseException) -> bool:
+    """Indica si el error es SQLITE_BUSY / SQLITE_LOCKED (y no otro fallo)"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    nombre = getattr(error, 'sqlite_errorname', '')
+    if nombre:
+        return nombre.startswith(('SQLITE_BUSY', 'SQLITE_LOCKED'))
+    return str(error).lower() in MENSAJES_BLOQUEO
+
+
+@dataclass
+class MetricasEscritura:
+    """Contadores de las transacciones de escritura de un proceso"""
+    transacciones: int = 0  # Confirmadas
+    revertidas: int = 0  # Por un error del cuerpo de la transacción
+    bloqueos: int = 0  # SQLITE_BUSY recibidos al empezar o al confirmar
+    reintentos: int = 0
+    abandonadas: int = 0  # Sin lograr el bloqueo tras todos los reintentos (BaseOcupadaError)
+    espera_cola: float = 0.0  # Segundos esperando a otros hilos del proceso
+    espera_bloqueo: float = 0.0  # Segundos esperando el bloqueo de escritura de la base
+    espera_maxima: float = 0.0  # Peor espera (cola + bloqueo) de una transacción
+
+    @property
+    def espera_promedio(self) -> float:
+        """Espera promedio por transacción intentada, en segundos"""
+        intentadas = self.transacciones + self.revertidas + self.abandonadas
+        return (self.espera_cola + self.espera_bloqueo) / intentadas if intentadas else 0.0
+
+    def __str__(self):
+        return (f"{self.transacciones} confirmadas, {self.revertidas} revertidas, "
+                f"{self.abandonadas} abandonadas | {self.bloqueos} bloqueos, {self.reintentos} reintentos "
+                f"| espera promedio {self.espera_promedio * 1000:.1f} ms, "
+                f"máxima {self.espera_maxima * 1000:.1f} ms")
+
+
+class _ColaEscritura:
+    """
+    Turnos de escritura del proceso, en orden de llegada
+
+    A diferencia de un Lock, atiende a los hilos en el orden en que
+    pidieron turno: un hilo que escribe en bucle no deja esperando a otro.
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._siguiente = 0
+        self._atendiendo = 0
+        self._duenio = None
+
+    @property
+    def es_duenio(self) -> bool:
+        """Indica si el hilo actual tiene el turno"""
+        return self._duenio == threading.get_ident()
+
+    def entrar(self):
+        with self._condicion:
+            turno = self._siguiente
+            self._siguiente += 1
+            while self._atendiendo != turno:
+                self._condicion.wait()
+            self._duenio = threading.get_ident()
+
+    def salir(self):
+        with self._condicion:
+            self._duenio = None
+            self._atendiendo += 1
+            self._condicion.notify_all()
+
+
+class CoordinadorEscritura:
+    """
+    Única puerta de las transacciones de escritura de un DatabaseManager
+
+    - Dentro del proceso, las transacciones se ejecutan de a una y en orden
+      de llegada, así los hilos no compiten entre sí por el bloqueo de SQLite.
+    - Entre procesos (varios equipos con la base en una unidad compartida),
+      cada transacción empieza con ``BEGIN IMMEDIATE``: el bloqueo de
+      escritura se toma al principio, donde esperar y reintentar es seguro,
+      y no a mitad de camino tras haber leído. SQLite espera hasta
+      ``busy_timeout`` (PRAGMA de la conexión) y, si la base sigue ocupada,
+      se reintenta con espera exponencial hasta ``intentos`` veces.
+    - Si no se logra, se lanza BaseOcupadaError para que la interfaz pueda
+      distinguirlo de un error real y ofrecer reintentar.
+    """
+
+    def __init__(self, connections, intentos: int = 4, espera_inicial: float = 0.05,
+                 espera_tope: float = 1.0):
+        """
+        Args:
+            connections: ConnectionManager de las conexiones por hilo
+            intentos: Intentos de BEGIN IMMEDIATE (y de COMMIT) ante SQLITE_BUSY
+            espera_inicial: Segundos antes del primer reintento (se duplica en cada uno)
+            espera_tope: Máximo de segundos entre dos intentos
+        """
+        self.connections = connections
+        self.intentos = max(1, intentos)
+        self.espera_inicial = espera_inicial
+        self.espera_tope = espera_tope
+        self._cola = _ColaEscritura()
+        self._metricas = MetricasEscritura()
+
+    @property
+    def metricas(self) -> MetricasEscritura:
+        """Copia de las métricas acumuladas"""
+        return replace(self._metricas)
+
+    def reiniciar_metricas(self):
+        """Volver los contadores a cero"""
+        self._metricas = MetricasEscritura()
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Transacción de escritura: ``with coordinador.transaccion() as conn:``
+
+        Confirma al salir del bloque y revierte si el bloque lanza una
+        excepción. Una transacción abierta dentro de otra en el mismo hilo
+        se suma a la de afuera.
+
+        Raises:
+            BaseOcupadaError: Otra conexión mantuvo el bloqueo en todos los intentos
+        """
+        conn = self.connections.get_connection()
+        if self._cola.es_duenio:
+            yield conn
+            return
+
+        inicio = time.perf_counter()
+        self._cola.entrar()
+        try:
+            espera_cola = time.perf_counter() - inicio
+            self._metricas.espera_cola += espera_cola
+            try:
+                self._ejecutar_con_reintentos(lambda: conn.execute('BEGIN IMMEDIATE'))
+            finally:
+                espera = time.perf_counter() - inicio
+                self._metricas.espera_bloqueo += espera - espera_cola
+                self._metricas.espera_maxima = max(self._metricas.espera_maxima, espera)
+
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                self._metricas.revertidas += 1
+                raise
+
+            try:
+                self._metricas.espera_bloqueo += self._ejecutar_con_reintentos(conn.commit)
+            except BaseException:
+                conn.rollback()
+                raise
+            self._metricas.transacciones += 1
+        finally:
+            self._cola.salir()
+
+    @contextmanager
+    def turno(self):
+        """
+        Turno de escritura sin transacción: ``with coordinador.turno() as conn:``
+
+        Para lo que SQLite no admite dentro de una transacción, como
+        restaurar un backup sobre la conexión. Las transacciones de los
+        demás hilos del proceso esperan a que termine el bloque.
+        """
+        if self._cola.es_duenio:
+            raise RuntimeError("El turno de escritura no se puede pedir dentro de una transacción")
+
+        conn = self.connections.get_connection()
+        inicio = time.perf_counter()
+        self._cola.entrar()
+        try:
+            self._metricas.espera_cola += time.perf_counter() - inicio
+            yield conn
+        finally:
+            self._cola.salir()
+
+    def _ejecutar_con_reintentos(self, paso) -> float:
+        """
+        Ejecutar BEGIN IMMEDIATE o COMMIT reintentando mientras la base esté ocupada
+
+        Un COMMIT que falla por SQLITE_BUSY deja la transacción abierta, así
+        que se puede volver a intentar sin repetir las escrituras.
+
+        Returns:
+            Segundos esperados por el bloqueo
+        """
+        inicio = time.perf_counter()
+        for intento in range(self.intentos):
+            try:
+                paso()
+                return time.perf_counter() - inicio
+            except sqlite3.OperationalError as e:
+                if not es_bloqueo(e):
+                    raise
+                self._metricas.bloqueos += 1
+                if intento == self.intentos - 1:
+                    self._metricas.abandonadas += 1
+                    raise BaseOcupadaError(
+                        f"La base de datos está ocupada por otro usuario ({e}); intente de nuevo"
+                    ) from e
+
+            self._metricas.reintentos += 1
+            espera = min(self.espera_tope, self.espera_inicial * 2 ** intento)
+            # Con azar, dos procesos que chocaron no vuelven a chocar al mismo tiempo
+            time.sleep(espera * random.uniform(0.5, 1.0))
@@ -0,0 +1,244 @@
+"""
+Mantenimiento de la base de datos: huérfanos, estadísticas del planificador y VACUUM
+
+Las bases nuevas se crean con auto_vacuum incremental (ver ConnectionManager).
+Las creadas antes necesitan una vez el VACUUM completo, con la aplicación
+cerrada:
+
+    python -m database.db_maintenance data/productos.db --completo
+
+Hasta entonces el VACUUM incremental no libera nada y el reporte lo avisa.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# Tablas cuyas filas se cuentan en el reporte
+TABLAS_REPORTE = ('productos', 'color_especificaciones', 'color_piezas')
+
+# Filas sin su fila padre; se borran en este orden (las piezas de una
+# especificación huérfana quedan huérfanas a su vez)
+SQL_HUERFANOS = {
+    'color_especificaciones': '''
+        SELECT ce.id FROM color_especificaciones ce
+        WHERE NOT EXISTS (SELECT 1 FROM productos p WHERE p.id = ce.producto_id)
+    ''',
+    'color_piezas': '''
+        SELECT cp.id FROM color_piezas cp
+        WHERE NOT EXISTS (
+            SELECT 1 FROM color_especificaciones ce WHERE ce.id = cp.color_especificacion_id
+        )
+    ''',
+}
+
+
+@dataclass
+class EstadoBase:
+    """Tamaño de la base de datos en un momento dado"""
+    filas: Dict[str, int] = field(default_factory=dict)
+    paginas: int = 0
+    paginas_libres: int = 0
+    tamano_pagina: int = 0
+    bytes_archivo: int = 0
+
+    def __str__(self):
+        filas = ', '.join(f"{tabla}: {cantidad}" for tabla, cantidad in self.filas.items())
+        return (f"{filas} | {self.paginas} páginas ({self.paginas_libres} libres) "
+                f"| {self.bytes_archivo / 1024:.0f} KiB")
+
+
+@dataclass
+class ReporteMantenimiento:
+    """Resultado de una pasada de mantenimiento"""
+    antes: EstadoBase
+    despues: Optional[EstadoBase] = None
+    huerfanos_eliminados: Dict[str, int] = field(default_factory=dict)
+    vacuum: str = ""  # el que se ejecutó: '', 'incremental' o 'completo'
+    avisos: List[str] = field(default_factory=list)
+    segundos: float = 0.0
+
+    @property
+    def bytes_liberados(self) -> int:
+        """Diferencia de tamaño del archivo"""
+        return self.antes.bytes_archivo - (self.despues.bytes_archivo if self.despues else 0)
+
+    def __str__(self):
+        huerfanos = ', '.join(f"{tabla}: {n}" for tabla, n in self.huerfanos_eliminados.items())
+        lineas = [
+            f"Antes:   {self.antes}",
+            f"Después: {self.despues}",
+            f"Huérfanos eliminados: {huerfanos or 'ninguno'}",
+            f"VACUUM: {self.vacuum or 'ninguno'}",
+            f"Duración: {self.segundos:.2f} s",
+        ]
+        lineas.extend(f"⚠️  {aviso}" for aviso in self.avisos)
+        return '\n'.join(lineas)
+
+
+class DatabaseMaintenance:
+    """
+    Tareas de mantenimiento sobre la conexión de un DatabaseManager
+
+    Cada lote de huérfanos se borra en su propia transacción corta para no
+    bloquear a los demás escritores. Los triggers de estadísticas, índice
+    de texto y registro de cambios ven esos borrados como cualquier otro.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def estado(self) -> EstadoBase:
+        """Filas por tabla, páginas y tamaño del archivo"""
+        conn = self.db_manager.get_connection()
+        estado = EstadoBase(
+            filas={
+                tabla: conn.execute(f'SELECT COUNT(*) FROM {tabla}').fetchone()[0]
+                for tabla in TABLAS_REPORTE
+            },
+            paginas=conn.execute('PRAGMA page_count').fetchone()[0],
+            paginas_libres=conn.execute('PRAGMA freelist_count').fetchone()[0],
+            tamano_pagina=conn.execute('PRAGMA page_size').fetchone()[0],
+        )
+        ruta = str(self.db_manager.db_path)
+        estado.bytes_archivo = sum(
+            os.path.getsize(ruta + sufijo) for sufijo in ('', '-wal') if os.path.exists(ruta + sufijo)
+        )
+        return estado
+
+    def contar_huerfanos(self) -> Dict[str, int]:
+        """Cantidad de filas huérfanas por tabla"""
+        conn = self.db_manager.get_connection()
+        return {
+            tabla: conn.execute(f'SELECT COUNT(*) FROM ({sql})').fetchone()[0]
+            for tabla, sql in SQL_HUERFANOS.items()
+        }
+
+    def eliminar_huerfanos(self, tamano_lote: int = 1000) -> Dict[str, int]:
+        """Borrar las filas huérfanas en lotes; devuelve cuántas se borraron por tabla"""
+        eliminados = {}
+
+        for tabla, sql in SQL_HUERFANOS.items():
+            eliminados[tabla] = 0
+            while True:
+                with self.db_manager.escritura.transaccion() as conn:
+                    cursor = conn.execute(
+                        f'DELETE FROM {tabla} WHERE id IN ({sql} LIMIT ?)', (tamano_lote,)
+                    )
+                if cursor.rowcount <= 0:
+                    break
+                eliminados[tabla] += cursor.rowcount
+
+        if any(eliminados.values()):
+            self.db_manager.cache.limpiar()
+        return eliminados
+
+    def sincronizar_trigramas(self):
+        """Poner al día los trigramas de los nombres, con los que escribieron otros programas"""
+        with self.db_manager.escritura.transaccion() as conn:
+            self.db_manager.trigramas.sincronizar(conn)
+
+    def optimizar(self, analizar: bool = False):
+        """Actualizar las estadísticas del planificador (ANALYZE o PRAGMA optimize)"""
+        conn = self.db_manager.get_connection()
+        conn.execute('ANALYZE' if analizar else 'PRAGMA optimize')
+        conn.commit()
+
+    def vacuum_incremental(self, paginas: int = 0) -> bool:
+        """
+        Devolver al sistema páginas libres (todas si ``paginas`` es 0)
+
+        Returns:
+            False si la base no usa auto_vacuum incremental (ver ``vacuum_completo``)
+        """
+        conn = self.db_manager.get_connection()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return False
+
+        # executescript recorre la sentencia hasta el final; con execute el
+        # PRAGMA libera una sola página por paso
+        conn.executescript(f'PRAGMA incremental_vacuum({int(paginas)})')
+        return True
+
+    def vacuum_completo(self):
+        """
+        Reescribir la base entera y dejarla en auto_vacuum incremental
+
+        Bloquea la base mientras dura; después alcanza con ``vacuum_incremental``.
+        """
+        conn = self.db_manager.get_connection()
+        conn.commit()
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+
+    def ejecutar(self, vacuum: str = "", analizar: bool = False, tamano_lote: int = 1000,
+                 on_paso: Optional[Callable[[str], None]] = None) -> ReporteMantenimiento:
+        """
+        Pasada completa: huérfanos, trigramas, estadísticas del planificador y VACUUM opcional
+
+        Args:
+            vacuum: '' (ninguno), 'incremental' o 'completo'
+            analizar: ANALYZE completo en lugar de PRAGMA optimize
+            tamano_lote: Filas huérfanas por transacción
+            on_paso: Callback con la descripción de cada paso
+
+        Returns:
+            ReporteMantenimiento con el estado antes y después
+        """
+        if vacuum not in ('', 'incremental', 'completo'):
+            raise ValueError(f"Modo de VACUUM desconocido: {vacuum}")
+
+        def paso(descripcion):
+            if on_paso:
+                on_paso(descripcion)
+
+        inicio = time.perf_counter()
+        reporte = ReporteMantenimiento(antes=self.estado())
+
+        paso("Eliminando filas huérfanas")
+        reporte.huerfanos_eliminados = self.eliminar_huerfanos(tamano_lote)
+
+        paso("Actualizando los trigramas de los nombres")
+        self.sincronizar_trigramas()
+
+        paso("Actualizando estadísticas del planificador")
+        self.optimizar(analizar)
+
+        if vacuum == 'incremental':
+            paso("Liberando páginas libres")
+            if self.vacuum_incremental():
+                reporte.vacuum = vacuum
+            else:
+                reporte.avisos.append(
+                    "La base no usa auto_vacuum incremental y no se liberó espacio; ejecute una vez "
+                    "con la aplicación cerrada: python -m database.db_maintenance <ruta.db> --completo"
+                )
+        elif vacuum == 'completo':
+            paso("Compactando la base de datos")
+            self.vacuum_completo()
+            reporte.vacuum = vacuum
+
+        if reporte.vacuum:
+            # En modo WAL el archivo solo se achica al volcar el WAL
+            self.db_manager.get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+
+        reporte.despues = self.estado()
+        reporte.segundos = time.perf_counter() - inicio
+        return reporte
+
+
+# python -m database.db_maintenance [ruta.db] [--incremental | --completo] [--analizar]
+if __name__ == "__main__":
+    from database.db_manager import DatabaseManager
+
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    modo = 'completo' if '--completo' in sys.argv else 'incremental' if '--incremental' in sys.argv else ''
+
+    with DatabaseManager(*argumentos[:1]) as db:
+        db.init_database()
+        print(DatabaseMaintenance(db).ejecutar(
+            vacuum=modo, analizar='--analizar' in sys.argv, on_paso=lambda p: print(f"🔧 {p}...")
+        ))
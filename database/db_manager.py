@@ -4,28 +4,119 @@ Gestor de base de datos SQLite para la aplicación
 
 import sqlite3
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Callable
 from datetime import datetime
+from functools import partial
 import json
 
 from models.producto import Producto, ColorEspecificacion
+from models.producto_resumen import ProductoResumen, SEPARADOR_CAMPO, SEPARADOR_COLOR
+from .db_connection import ConnectionManager
+from .db_search import SearchIndex, SQL_COLORES_MEMORIA, SQL_FILAS_MEMORIA
+from .db_stats import CatalogStats
+from .db_totales import TotalesProductos, SQL_PESO_COLOR
+from .db_trigramas import IndiceTrigramas
+from .db_cache import CacheProductos
+from .db_changes import RegistroCambios, CambiosProductos
+from .db_escritura import CoordinadorEscritura
+from .db_migration import DatabaseMigrator
+from .db_query import FiltroProductos, combinar_condiciones
+from .db_pagination import (
+    PaginaProductos, CursorPagina, COLUMNAS_ORDENABLES, construir_keyset, construir_keyset_hasta
+)
+from .db_bulk import SQL_TABLA_CARGA_MASIVA, carga_masiva, dividir_en_lotes, insertar_lote
+from .db_piezas import (
+    CAMPOS_PIEZA, COLUMNAS_PIEZA, SQL_INSERTAR_PIEZA, filas_de_piezas, normalizar_valores,
+    pieza_desde_valores
+)
+from .db_diff import (
+    ReporteEscritura, ColorGuardado, PlanEscritura, CAMPOS_COLOR, CAMPOS_PRODUCTO, calcular_plan,
+    valores_color
+)
+from .db_textos import CAMPOS_TEXTO_PRODUCTO, cargar_textos, leer, marcador
+from utils.color_space import IndiceColores, normalizar_hex
+
+
+# Cantidad máxima de IDs por consulta "p.id IN (...)"
+LOTE_IDS = 500
+
+# Columnas de productos en el orden de _row_to_producto
+COLUMNAS_PRODUCTO = (
+    'id', 'nombre', 'descripcion', 'peso', 'color', 'tiempo_impresion', 'material',
+    'temperatura_extrusor', 'temperatura_cama', 'imagen_path', 'guia_impresion',
+    'fecha_creacion', 'fecha_modificacion',
+)
+
+
+def _columnas_producto(con_textos: bool = True) -> str:
+    """SELECT de COLUMNAS_PRODUCTO sobre el alias p; sin textos, los largos van como NULL"""
+    return ', '.join(
+        leer(columna, 'p') if con_textos or columna not in CAMPOS_TEXTO_PRODUCTO else 'NULL'
+        for columna in COLUMNAS_PRODUCTO
+    )
 
 
 class DatabaseManager:
     """Clase para gestionar las operaciones de base de datos"""
 
-    def __init__(self, db_path: str = "data/productos.db"):
-        """Inicializar el gestor de base de datos"""
+    def __init__(self, db_path: str = "data/productos.db", db_config=None):
+        """
+        Inicializar el gestor de base de datos
+
+        Args:
+            db_path: Ruta del archivo de base de datos
+            db_config: DatabaseConfig con el perfil de PRAGMAs de las conexiones
+        """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
+        self.connections = ConnectionManager(self.db_path, db_config)
+        self.search_index = SearchIndex()
+        self.stats = CatalogStats()
+        self.cache = CacheProductos()
+        self.cambios = RegistroCambios()
+        self.totales = TotalesProductos()
+        self.trigramas = IndiceTrigramas()
+        self._indice_colores: Optional[IndiceColores] = None
+        self._colores_indexados: tuple = ()
+        # Todas las escrituras pasan por el coordinador (BEGIN IMMEDIATE con reintentos)
+        self.escritura = CoordinadorEscritura(self.connections, intentos=self.connections.db_config.write_attempts)
+        self.migrator = DatabaseMigrator(self.db_path, self.connections)
 
     def get_connection(self):
-        """Obtener conexión a la base de datos"""
-        return sqlite3.connect(str(self.db_path))
+        """Obtener la conexión persistente del hilo actual"""
+        return self.connections.get_connection()
+
+    def close(self):
+        """Cerrar todas las conexiones abiertas"""
+        self.connections.close()
+
+    def cerrar_conexion_hilo(self):
+        """Cerrar la conexión del hilo actual (p. ej. al terminar el hilo de base de datos)"""
+        self.connections.cerrar_conexion_hilo()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
 
     def init_database(self):
-        """Inicializar la base de datos y crear tablas si no existen"""
+        """
+        Inicializar la base de datos y crear tablas si no existen
+
+        Si ``user_version`` indica que el esquema está al día, no hace más
+        que esa lectura. Si no, crea el esquema base en una transacción,
+        respalda la base si ya tenía datos y aplica las migraciones.
+        """
+        if self.migrator.is_up_to_date():
+            return
+
+        if self.migrator.has_data():
+            self.migrator.backup_database()
+
         with self.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
             cursor = conn.cursor()
 
             # Crear tabla de productos
@@ -92,11 +183,38 @@ class DatabaseManager:
                 ON color_especificaciones(producto_id)
             ''')
 
-            conn.commit()
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_pieza_color
+                ON color_piezas(color_especificacion_id)
+            ''')
+
+            # Índices para ordenar y paginar listados por keyset
+            for columna in ('peso', 'tiempo_impresion', 'fecha_creacion', 'fecha_modificacion'):
+                cursor.execute(f'''
+                    CREATE INDEX IF NOT EXISTS idx_{columna}
+                    ON productos({columna})
+                ''')
+
+            # Marca de carga masiva que leen los triggers de inserción
+            cursor.execute(SQL_TABLA_CARGA_MASIVA)
+
+            # Índice de texto completo (si SQLite incluye FTS5)
+            self.search_index.crear(conn)
+
+            # Estadísticas del catálogo mantenidas por triggers
+            self.stats.crear(conn)
+
+            # Registro de cambios para refrescar listas por diferencias
+            self.cambios.crear(conn)
+
+        results = self.migrator.run_migrations()
+        if not results['success']:
+            raise sqlite3.DatabaseError('; '.join(results['errors']))
 
     def crear_producto(self, producto: Producto) -> int:
         """Crear un nuevo producto en la base de datos"""
-        with self.get_connection() as conn:
+        # El índice de texto se actualiza una vez, no por cada color y pieza
+        with self.escritura.transaccion() as conn, self.search_index.indexado_diferido(conn) as reindexar:
             cursor = conn.cursor()
 
             # Insertar producto principal
@@ -105,7 +223,7 @@ class DatabaseManager:
                     nombre, descripcion, peso, color, tiempo_impresion,
                     material, temperatura_extrusor, temperatura_cama,
                     imagen_path, guia_impresion, fecha_creacion, fecha_modificacion
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, comprimir_texto(?), ?, ?, ?, ?, ?, ?, ?, comprimir_texto(?), ?, ?)
             ''', (
                 producto.nombre,
                 producto.descripcion,
@@ -129,7 +247,7 @@ class DatabaseManager:
                     INSERT INTO color_especificaciones (
                         producto_id, color_hex, nombre_color, peso_color, 
                         tiempo_adicional, notas
-                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    ) VALUES (?, ?, ?, ?, ?, comprimir_texto(?))
                 ''', (
                     producto_id,
                     color_spec.color_hex,
@@ -140,163 +258,641 @@ class DatabaseManager:
                 ))
 
                 color_spec_id = cursor.lastrowid
+                color_spec.id = color_spec_id
 
-                # Insertar piezas del color
-                for pieza in color_spec.piezas:
-                    cursor.execute('''
-                        INSERT INTO color_piezas (color_especificacion_id, nombre_pieza)
-                        VALUES (?, ?)
-                    ''', (color_spec_id, pieza))
+                # Insertar piezas del color con su detalle
+                cursor.executemany(SQL_INSERTAR_PIEZA, filas_de_piezas(color_spec_id, color_spec))
 
-            conn.commit()
+            self.trigramas.indexar_nombres(conn, [producto.nombre])
+            reindexar.add(producto_id)
             return producto_id
 
+    def crear_productos_bulk(self, productos: Iterable[Producto], tamano_lote: int = 1000,
+                             on_progreso: Optional[Callable[[int, Optional[int]], None]] = None) -> List[int]:
+        """
+        Crear muchos productos en lotes
+
+        Cada lote se inserta con un executemany por tabla dentro de su
+        propia transacción, y se confirma antes de leer el siguiente, por lo
+        que ``productos`` puede ser un generador de cualquier tamaño. Si un
+        lote falla se revierte solo ese lote; los anteriores quedan guardados.
+
+        Args:
+            productos: Productos a crear (lista o generador)
+            tamano_lote: Productos por transacción
+            on_progreso: Callback (creados hasta ahora, total o None si se desconoce)
+
+        Returns:
+            IDs de los productos creados, en el mismo orden
+        """
+        total = len(productos) if hasattr(productos, '__len__') else None
+        ids: List[int] = []
+
+        for lote in dividir_en_lotes(productos, tamano_lote):
+            with self.escritura.transaccion() as conn:
+                # Con los triggers de inserción apagados, el índice de texto,
+                # las estadísticas, el registro de cambios y los totales se
+                # actualizan una vez por lote, no por fila
+                with carga_masiva(conn):
+                    ids_lote = insertar_lote(conn.cursor(), lote)
+
+                self.totales.recalcular_rango(conn, ids_lote[0], ids_lote[-1])
+                self.trigramas.indexar_nombres(conn, (producto.nombre for producto in lote))
+                self.cambios.registrar_rango(conn, ids_lote[0], ids_lote[-1])
+                self.stats.sumar_rango(conn, ids_lote[0], ids_lote[-1])
+                if self.search_index.disponible(conn):
+                    self.search_index.indexar_rango(conn, ids_lote[0], ids_lote[-1])
+
+                ids.extend(ids_lote)
+
+            if on_progreso:
+                on_progreso(len(ids), total)
+
+        if ids:
+            with self.escritura.transaccion() as conn:
+                self.cambios.podar(conn)
+
+        return ids
+
     def obtener_producto(self, producto_id: int) -> Optional[Producto]:
         """Obtener un producto por su ID"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM productos WHERE id = ?', (producto_id,))
-            row = cursor.fetchone()
-
-            if row:
-                producto = self._row_to_producto(row)
-
-                # Obtener especificaciones de color
-                cursor.execute('''
-                    SELECT * FROM color_especificaciones 
-                    WHERE producto_id = ?
-                    ORDER BY peso_color DESC
-                ''', (producto_id,))
-
-                color_rows = cursor.fetchall()
-
-                for color_row in color_rows:
-                    color_spec = ColorEspecificacion(
-                        color_hex=color_row[2],
-                        nombre_color=color_row[3] or "",
-                        peso_color=color_row[4] or 0.0,
-                        tiempo_adicional=color_row[5] or 0,
-                        notas=color_row[6] or ""
-                    )
-
-                    # Obtener piezas del color
-                    cursor.execute('''
-                        SELECT nombre_pieza FROM color_piezas
-                        WHERE color_especificacion_id = ?
-                    ''', (color_row[0],))
-
-                    color_spec.piezas = [p[0] for p in cursor.fetchall()]
-                    producto.colores_especificaciones.append(color_spec)
-
-                return producto
-            return None
+            productos = self._cargar(cursor, 'p.id = ?', (producto_id,))
+            return productos[0] if productos else None
 
     def obtener_todos_productos(self) -> List[Producto]:
-        """Obtener todos los productos"""
+        """
+        Obtener todos los productos, con sus textos
+
+        Es el camino de la exportación, que lee la descripción y la guía de
+        cada producto: diferirlas costaría una consulta por producto.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT id FROM productos ORDER BY nombre')
-            ids = cursor.fetchall()
+            return self._hidratar_productos(cursor, con_textos=True)
 
-            productos = []
-            for (producto_id,) in ids:
-                producto = self.obtener_producto(producto_id)
-                if producto:
-                    productos.append(producto)
+    def contar_productos(self, filtro: Optional[FiltroProductos] = None) -> int:
+        """Obtener cantidad total de productos (que cumplen el filtro, salvo su texto)"""
+        condicion, parametros = (filtro or FiltroProductos()).condicion()
+        where = f"WHERE {condicion}" if condicion else ""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT COUNT(*) FROM productos p {where}', parametros)
+            return cursor.fetchone()[0]
+
+    def obtener_ids_listado(self, hasta: Optional[CursorPagina] = None,
+                            orden: str = 'nombre', descendente: bool = False,
+                            filtro: Optional[FiltroProductos] = None) -> List[int]:
+        """
+        IDs del listado ordenado hasta el cursor incluido (todos si es None)
+
+        Solo recorre el índice de orden; sirve para reubicar en una lista ya
+        cargada los productos que cambiaron sin volver a cargar el resto.
+        """
+        keyset, orden_sql, parametros_keyset = construir_keyset_hasta(orden, descendente, hasta)
+        condicion, parametros = combinar_condiciones(
+            (keyset, parametros_keyset), (filtro or FiltroProductos()).condicion()
+        )
+        where = f"WHERE {condicion}" if condicion else ""
 
-            return productos
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT p.id FROM productos p {where} ORDER BY {orden_sql}', parametros)
+            return [fila[0] for fila in cursor.fetchall()]
 
-    def buscar_productos(self, termino: str) -> List[Producto]:
-        """Buscar productos por nombre o descripción"""
+    def obtener_productos_por_ids(self, ids: Iterable[int], resumen: bool = False) -> List[Any]:
+        """Obtener productos (o resúmenes) por ID, en el orden de ``ids``; los que no existen se omiten"""
+        ids = list(ids)
+        productos = []
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            termino_busqueda = f"%{termino}%"
+            for inicio in range(0, len(ids), LOTE_IDS):
+                lote = ids[inicio:inicio + LOTE_IDS]
+                productos.extend(self._cargar(
+                    cursor, f"p.id IN ({', '.join('?' * len(lote))})", tuple(lote), 'p.id', resumen
+                ))
+        posicion = {producto_id: i for i, producto_id in enumerate(ids)}
+        return sorted(productos, key=lambda p: posicion[p.id])
 
-            cursor.execute('''
-                SELECT * FROM productos 
-                WHERE nombre LIKE ? OR descripcion LIKE ? OR color LIKE ? OR material LIKE ?
-                ORDER BY nombre
-            ''', (termino_busqueda, termino_busqueda, termino_busqueda, termino_busqueda))
+    def obtener_filas_indice(self, ids: Optional[Iterable[int]] = None) -> List[tuple]:
+        """
+        Textos y colores de productos para el índice en memoria (utils.text_index)
 
-            rows = cursor.fetchall()
-            return [self._row_to_producto(row) for row in rows]
+        Args:
+            ids: Productos a leer; None para todo el catálogo
+        """
+        return self._leer_filas_memoria(SQL_FILAS_MEMORIA, ids)
+
+    def obtener_colores_productos(self, ids: Optional[Iterable[int]] = None) -> List[tuple]:
+        """
+        (id, colores hex separados por comas) de productos, para utils.bitmap_index
+
+        Args:
+            ids: Productos a leer; None para todo el catálogo
+        """
+        return self._leer_filas_memoria(SQL_COLORES_MEMORIA, ids)
+
+    def _leer_filas_memoria(self, sql: str, ids: Optional[Iterable[int]]) -> List[tuple]:
+        """Filas de una consulta con {filtro} para todo el catálogo o por lotes de IDs"""
+        with self.get_connection() as conn:
+            if ids is None:
+                return conn.execute(sql.format(filtro='')).fetchall()
+
+            ids = list(ids)
+            filas = []
+            for inicio in range(0, len(ids), LOTE_IDS):
+                lote = ids[inicio:inicio + LOTE_IDS]
+                filas.extend(conn.execute(
+                    sql.format(filtro=f"WHERE p.id IN ({', '.join('?' * len(lote))})"), lote
+                ))
+            return filas
+
+    def obtener_token_cambios(self) -> int:
+        """Token del estado actual del catálogo, para pedir luego lo que cambió"""
+        with self.get_connection() as conn:
+            return self.cambios.token(conn)
+
+    def obtener_cambios_desde(self, token: int) -> CambiosProductos:
+        """
+        Productos creados, modificados o eliminados desde el token
+
+        Incluye las escrituras de otras conexiones y de otros procesos que
+        usen el mismo archivo. Si ``completo`` es True el registro ya no
+        cubre ese token y hay que recargar la vista entera.
+        """
+        with self.get_connection() as conn:
+            cambios = self.cambios.cambios_desde(conn, token)
+
+        # La caché se etiqueta con fecha_modificacion, que otro proceso
+        # podría no actualizar: el registro dice con certeza qué cambió
+        if cambios.completo:
+            self.cache.limpiar()
+        for producto_id in cambios.modificados | cambios.eliminados:
+            self.cache.invalidar(producto_id)
+        return cambios
+
+    def obtener_pagina_productos(self, limite: int = 100,
+                                 despues_de: Optional[CursorPagina] = None,
+                                 orden: str = 'nombre',
+                                 descendente: bool = False,
+                                 resumen: bool = False,
+                                 filtro: Optional[FiltroProductos] = None) -> PaginaProductos:
+        """
+        Obtener una página del catálogo usando paginación por keyset
+
+        A diferencia de OFFSET, el costo de cada página no crece con su
+        posición: se continúa desde el cursor (valor, id) de la página anterior.
+
+        Args:
+            limite: Tamaño de la página
+            despues_de: Cursor devuelto por la página anterior
+            orden: Columna de COLUMNAS_ORDENABLES
+            descendente: Orden descendente
+            resumen: Cargar ProductoResumen en lugar de productos completos
+            filtro: Condiciones de color, material y rango del listado (el
+                texto se ignora; para buscar texto usar ``buscar_productos``)
+
+        Returns:
+            PaginaProductos con los productos, el cursor siguiente y el total
+            (del listado filtrado)
+        """
+        filtro = filtro or FiltroProductos()
+        columna = COLUMNAS_ORDENABLES[orden]
+        filtrado = filtro.condicion()
+        where_total = f"WHERE {filtrado[0]}" if filtrado[0] else ""
 
-    def actualizar_producto(self, producto: Producto) -> bool:
-        """Actualizar un producto existente"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            # Actualizar producto principal
-            cursor.execute('''
-                UPDATE productos SET
-                    nombre = ?,
-                    descripcion = ?,
-                    peso = ?,
-                    color = ?,
-                    tiempo_impresion = ?,
-                    material = ?,
-                    temperatura_extrusor = ?,
-                    temperatura_cama = ?,
-                    imagen_path = ?,
-                    guia_impresion = ?,
-                    fecha_modificacion = ?
-                WHERE id = ?
-            ''', (
-                producto.nombre,
-                producto.descripcion,
-                producto.peso,
-                producto.color,
-                producto.tiempo_impresion,
-                producto.material,
-                producto.temperatura_extrusor,
-                producto.temperatura_cama,
-                producto.imagen_path,
-                producto.guia_impresion,
-                datetime.now().isoformat(),
-                producto.id
-            ))
+            cursor.execute(f'SELECT COUNT(*) FROM productos p {where_total}', filtrado[1])
+            total = cursor.fetchone()[0]
+
+            # Recorrer el índice de orden descartando filas cuesta del orden de
+            # limite * catálogo / total; buscar por el índice del filtro y
+            # ordenar, del orden de total. Sin rangos ni material el
+            # planificador ya elige bien (los colores dan una lista de IDs).
+            indice_orden = (not filtro.tiene_atributos
+                            or total * total >= limite * self.stats.total_productos(conn))
+            keyset, orden_sql, parametros_keyset = construir_keyset(
+                orden, descendente, despues_de, indice_orden
+            )
+            condicion, parametros = combinar_condiciones((keyset, parametros_keyset), filtrado)
+            where = f"WHERE {condicion}" if condicion else ""
+
+            # Recorrer el índice para obtener solo los IDs de la página
+            cursor.execute(f'''
+                SELECT p.id, {columna} FROM productos p
+                {where}
+                ORDER BY {orden_sql}
+                LIMIT ?
+            ''', parametros + (limite + 1,))
+            filas = cursor.fetchall()
+
+            hay_mas = len(filas) > limite
+            filas = filas[:limite]
 
-            # Eliminar especificaciones de color existentes
-            cursor.execute('DELETE FROM color_especificaciones WHERE producto_id = ?', (producto.id,))
+            productos = []
+            if filas:
+                marcadores = ', '.join('?' * len(filas))
+                productos = self._cargar(
+                    cursor, f'p.id IN ({marcadores})', tuple(f[0] for f in filas), orden_sql, resumen
+                )
 
-            # Insertar nuevas especificaciones de color
-            for color_spec in producto.colores_especificaciones:
-                cursor.execute('''
-                    INSERT INTO color_especificaciones (
-                        producto_id, color_hex, nombre_color, peso_color, 
-                        tiempo_adicional, notas
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    producto.id,
-                    color_spec.color_hex,
-                    color_spec.nombre_color,
-                    color_spec.peso_color,
-                    color_spec.tiempo_adicional,
-                    color_spec.notas
-                ))
+            return PaginaProductos(
+                productos=productos,
+                cursor_siguiente=(filas[-1][1], filas[-1][0]) if hay_mas else None,
+                total=total
+            )
+
+    def _cargar(self, cursor, condicion: str = "", parametros=(),
+                orden: str = "p.nombre", resumen: bool = False) -> List[Any]:
+        """
+        Cargar productos o resúmenes pasando por la caché
+
+        Primero lee solo (id, fecha_modificacion) de las filas pedidas; los
+        productos cuya etiqueta coincide con la caché se reutilizan y solo
+        se cargan desde disco los que faltan o cambiaron.
+
+        Args:
+            cursor: Cursor de una conexión abierta
+            condicion: Filtro SQL opcional sobre el alias ``p`` de productos
+            parametros: Parámetros de la condición (tupla o diccionario)
+            orden: Expresión ORDER BY de los productos
+            resumen: Cargar ProductoResumen en lugar de productos completos
+
+        Returns:
+            Lista en el orden pedido
+        """
+        cargar = self._cargar_resumenes if resumen else self._hidratar_productos
+        filtro = f"WHERE {condicion}" if condicion else ""
+
+        cursor.execute(f'''
+            SELECT p.id, p.fecha_modificacion FROM productos p
+            {filtro}
+            ORDER BY {orden}
+        ''', parametros)
+        etiquetas = cursor.fetchall()
+
+        productos, faltantes = self.cache.buscar(etiquetas, resumen)
+        if not faltantes:
+            return productos
 
-                color_spec_id = cursor.lastrowid
+        if len(faltantes) == len(etiquetas):
+            cargados = cargar(cursor, condicion, parametros, orden)
+        else:
+            cargados = []
+            for inicio in range(0, len(faltantes), LOTE_IDS):
+                lote = faltantes[inicio:inicio + LOTE_IDS]
+                cargados.extend(cargar(cursor, f"p.id IN ({', '.join('?' * len(lote))})", tuple(lote)))
+
+        self.cache.guardar(cargados, dict(etiquetas), resumen)
+        por_id = {producto.id: producto for producto in cargados}
+        return [
+            producto if producto is not None else por_id[producto_id]
+            for (producto_id, _), producto in zip(etiquetas, productos)
+            if producto is not None or producto_id in por_id
+        ]
+
+    def _hidratar_productos(self, cursor, condicion: str = "", parametros=(),
+                            orden: str = "p.nombre", con_textos: bool = False) -> List[Producto]:
+        """
+        Cargar productos completos con un recorrido ordenado por tabla.
+
+        En lugar de consultar colores y piezas fila por fila, lee productos,
+        especificaciones de color y piezas en tres consultas y arma el grafo
+        de objetos en memoria. Salvo con ``con_textos``, la descripción y la
+        guía de impresión no se leen: cada producto las trae de la base al
+        usarlas por primera vez.
+
+        Args:
+            cursor: Cursor de una conexión abierta
+            condicion: Filtro SQL opcional sobre el alias ``p`` de productos
+            parametros: Parámetros de la condición (tupla o diccionario)
+            orden: Expresión ORDER BY de los productos
+            con_textos: Leer también los textos largos en la misma consulta
+
+        Returns:
+            Lista de productos en el orden pedido
+        """
+        filtro = f"WHERE {condicion}" if condicion else ""
+
+        cursor.execute(f'''
+            SELECT {_columnas_producto(con_textos)} FROM productos p
+            {filtro}
+            ORDER BY {orden}
+        ''', parametros)
+        productos = [self._row_to_producto(row) for row in cursor.fetchall()]
+        if not productos:
+            return []
+
+        if not con_textos:
+            for producto in productos:
+                producto.diferir_textos(partial(self.cargar_textos, producto.id), CAMPOS_TEXTO_PRODUCTO)
+
+        productos_por_id = {producto.id: producto for producto in productos}
+
+        # Especificaciones de color de los productos cargados
+        cursor.execute(f'''
+            SELECT ce.id, ce.producto_id, ce.color_hex, ce.nombre_color,
+                   ce.peso_color, ce.tiempo_adicional, {leer('notas', 'ce')}
+            FROM color_especificaciones ce
+            JOIN productos p ON p.id = ce.producto_id
+            {filtro}
+            ORDER BY ce.producto_id, ce.peso_color DESC
+        ''', parametros)
+
+        specs_por_id = {}
+        for color_row in cursor.fetchall():
+            color_spec = ColorEspecificacion(
+                id=color_row[0],
+                color_hex=color_row[2],
+                nombre_color=color_row[3] or "",
+                peso_color=color_row[4] or 0.0,
+                tiempo_adicional=color_row[5] or 0,
+                notas=color_row[6] or ""
+            )
+            specs_por_id[color_row[0]] = color_spec
+            productos_por_id[color_row[1]].colores_especificaciones.append(color_spec)
+
+        if not specs_por_id:
+            return productos
 
-                # Insertar piezas del color
-                for pieza in color_spec.piezas:
-                    cursor.execute('''
-                        INSERT INTO color_piezas (color_especificacion_id, nombre_pieza)
-                        VALUES (?, ?)
-                    ''', (color_spec_id, pieza))
+        # Piezas de cada especificación de color, con su detalle
+        cursor.execute(f'''
+            SELECT cp.color_especificacion_id, cp.id, {COLUMNAS_PIEZA}
+            FROM color_piezas cp
+            JOIN color_especificaciones ce ON ce.id = cp.color_especificacion_id
+            JOIN productos p ON p.id = ce.producto_id
+            {filtro}
+            ORDER BY cp.color_especificacion_id, cp.id
+        ''', parametros)
+
+        for color_spec_id, pieza_id, *valores in cursor.fetchall():
+            pieza = pieza_desde_valores(pieza_id, valores)
+            color_spec = specs_por_id[color_spec_id]
+            color_spec.piezas.append(pieza.nombre)
+            color_spec.piezas_detalle.append(pieza)
+
+        return productos
+
+    def _cargar_resumenes(self, cursor, condicion: str = "", parametros=(),
+                          orden: str = "p.nombre") -> List[ProductoResumen]:
+        """
+        Cargar resúmenes de productos para la lista con una sola consulta
+
+        Los colores se agregan con group_concat; el peso y el tiempo totales
+        son las columnas que mantiene db_totales, sin leer descripción, guía
+        de impresión ni piezas.
+
+        Args:
+            cursor: Cursor de una conexión abierta
+            condicion: Filtro SQL opcional sobre el alias ``p`` de productos
+            parametros: Parámetros de la condición (tupla o diccionario)
+            orden: Expresión ORDER BY de los productos
+
+        Returns:
+            Lista de resúmenes en el orden pedido
+        """
+        filtro = f"WHERE {condicion}" if condicion else ""
+
+        cursor.execute(f'''
+            SELECT p.id, p.nombre, p.material, p.tiempo_impresion, p.peso, p.color,
+                   group_concat(
+                       ce.color_hex || '{SEPARADOR_CAMPO}' || COALESCE(ce.nombre_color, '')
+                       || '{SEPARADOR_CAMPO}' || {SQL_PESO_COLOR},
+                       '{SEPARADOR_COLOR}'
+                   ),
+                   p.peso_total, p.tiempo_total
+            FROM productos p
+            LEFT JOIN color_especificaciones ce ON ce.producto_id = p.id
+            {filtro}
+            GROUP BY p.id
+            ORDER BY {orden}
+        ''', parametros)
+        return [ProductoResumen.from_row(row) for row in cursor.fetchall()]
+
+    def buscar_productos(self, termino: str, limite: int = 500, resumen: bool = False,
+                         filtro: Optional[FiltroProductos] = None) -> List[Producto]:
+        """
+        Buscar productos por texto
+
+        Usa el índice FTS5 (nombre, descripción, material, colores, piezas,
+        notas y guía) con búsqueda por prefijo y ranking bm25. Si no encuentra
+        nada, prueba cambiando las palabras mal escritas por las parecidas de
+        los nombres (db_trigramas). Si SQLite no tiene FTS5, recurre a LIKE
+        sobre los mismos campos.
+
+        Args:
+            termino: Texto a buscar
+            limite: Cantidad máxima de resultados
+            resumen: Devolver ProductoResumen en lugar de productos completos
+            filtro: Condiciones de color, material y rango a cumplir además del texto
+
+        Returns:
+            Productos ordenados por relevancia
+        """
+        return self.obtener_productos_por_ids(
+            self.buscar_ids_productos(termino, limite, filtro), resumen=resumen
+        )
 
-            conn.commit()
-            return cursor.rowcount > 0
+    def buscar_ids_productos(self, termino: str, limite: int = 500,
+                             filtro: Optional[FiltroProductos] = None,
+                             aproximada: bool = True) -> List[int]:
+        """
+        IDs de los productos que encuentra ``buscar_productos``, sin cargarlos
+
+        Separa la consulta de la carga: quien busca mientras se escribe puede
+        medir cada paso o no cargar nada si la búsqueda ya quedó vieja.
+
+        Args:
+            aproximada: Si no hay resultados exactos, tolerar errores de tipeo
+        """
+        filtro = filtro or FiltroProductos()
 
-    def eliminar_producto(self, producto_id: int) -> bool:
-        """Eliminar un producto"""
         with self.get_connection() as conn:
+            if self.search_index.disponible(conn) and self.search_index.construir_consulta(termino):
+                condicion = filtro.condicion('rowid')
+                ids = self.search_index.buscar_ids(conn, termino, limite, *condicion)
+                if ids or not aproximada:
+                    return ids
+
+                consulta = self.trigramas.construir_consulta(conn, termino)
+                if not consulta:
+                    return []
+                return self.search_index.buscar_ids_consulta(conn, consulta, limite, *condicion)
+
+            return self._buscar_ids_like(conn.cursor(), termino, limite, filtro)
+
+    def _buscar_ids_like(self, cursor, termino: str, limite: int,
+                         filtro: FiltroProductos) -> List[int]:
+        """Búsqueda de respaldo con LIKE cuando FTS5 no está disponible"""
+        termino_busqueda = f"%{termino}%"
+
+        campos_producto = ('p.nombre', leer('descripcion', 'p'), 'p.color', 'p.material',
+                           leer('guia_impresion', 'p'))
+        campos_color = ('ce.nombre_color', 'ce.color_hex', leer('notas', 'ce'), 'cp.nombre_pieza')
+        condicion_texto = f'''
+            {' OR '.join(f'{campo} LIKE ?' for campo in campos_producto)}
+            OR EXISTS (
+                SELECT 1 FROM color_especificaciones ce
+                LEFT JOIN color_piezas cp ON cp.color_especificacion_id = ce.id
+                WHERE ce.producto_id = p.id
+                  AND ({' OR '.join(f'{campo} LIKE ?' for campo in campos_color)})
+            )'''
+        parametros_texto = (termino_busqueda,) * (len(campos_producto) + len(campos_color))
+
+        condicion, parametros = combinar_condiciones(
+            (condicion_texto, parametros_texto), filtro.condicion()
+        )
+
+        cursor.execute(f'''
+            SELECT p.id FROM productos p
+            WHERE {condicion}
+            ORDER BY p.nombre
+            LIMIT ?
+        ''', parametros + (limite,))
+        return [fila[0] for fila in cursor.fetchall()]
+
+    def actualizar_producto(self, producto: Producto) -> bool:
+        """Actualizar un producto existente"""
+        return self.actualizar_producto_con_reporte(producto).encontrado
+
+    def actualizar_producto_con_reporte(self, producto: Producto) -> ReporteEscritura:
+        """
+        Actualizar un producto escribiendo solo lo que cambió
+
+        Compara el producto con el grafo guardado (producto, colores y piezas)
+        y ejecuta únicamente los UPDATE/INSERT/DELETE necesarios, agrupados
+        con executemany, en una sola transacción.
+
+        Args:
+            producto: Producto editado (con ``id``)
+
+        Returns:
+            ReporteEscritura con las filas tocadas por tabla
+        """
+        try:
+            return self._escribir_diferencias(producto)
+        finally:
+            self.cache.invalidar(producto.id)
+
+    def _escribir_diferencias(self, producto: Producto) -> ReporteEscritura:
+        """Calcular y ejecutar el plan de escritura de actualizar_producto_con_reporte"""
+        reporte = ReporteEscritura()
+
+        # La lectura del grafo guardado va dentro de la transacción de
+        # escritura: otro proceso no puede cambiarlo entre la lectura y el plan
+        with self.escritura.transaccion() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM productos WHERE id = ?', (producto_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+
+            cursor.execute(f'SELECT {_columnas_producto()} FROM productos p WHERE p.id = ?', (producto.id,))
+            fila = cursor.fetchone()
+            if fila is None:
+                return reporte
+            reporte.encontrado = True
+
+            plan = calcular_plan(producto, self._row_to_producto(fila),
+                                 self._cargar_colores_guardados(cursor, producto.id))
+            if plan.sin_cambios:
+                return reporte
+
+            # El índice de texto se actualiza una vez, no por cada fila escrita
+            with self.search_index.indexado_diferido(conn) as reindexar:
+                self._ejecutar_plan(cursor, producto, plan, reporte)
+                reindexar.add(producto.id)
+            return reporte
+
+    def _ejecutar_plan(self, cursor, producto: Producto, plan: PlanEscritura, reporte: ReporteEscritura):
+        """Ejecutar las sentencias de un PlanEscritura y contarlas en el reporte"""
+        # Piezas primero: las de colores eliminados no dependen de ON DELETE CASCADE
+        if plan.piezas_eliminar:
+            cursor.executemany('DELETE FROM color_piezas WHERE id = ?',
+                               [(pieza_id,) for pieza_id in plan.piezas_eliminar])
+            reporte.piezas_eliminadas = len(plan.piezas_eliminar)
+
+        if plan.colores_eliminar:
+            cursor.executemany('DELETE FROM color_especificaciones WHERE id = ?',
+                               [(color_id,) for color_id in plan.colores_eliminar])
+            reporte.colores_eliminados = len(plan.colores_eliminar)
+
+        if plan.colores_actualizar:
+            asignaciones = ', '.join(f'{campo} = {marcador(campo)}' for campo in CAMPOS_COLOR)
+            cursor.executemany(f'UPDATE color_especificaciones SET {asignaciones} WHERE id = ?',
+                               plan.colores_actualizar)
+            reporte.colores_actualizados = len(plan.colores_actualizar)
+
+        if plan.piezas_actualizar:
+            asignaciones = ', '.join(f'{campo} = ?' for campo in CAMPOS_PIEZA)
+            cursor.executemany(f'UPDATE color_piezas SET {asignaciones} WHERE id = ?',
+                               plan.piezas_actualizar)
+            reporte.piezas_actualizadas = len(plan.piezas_actualizar)
+
+        # Los colores nuevos necesitan su ID para insertar sus piezas
+        for color_spec in plan.colores_insertar:
+            cursor.execute(f'''
+                INSERT INTO color_especificaciones (producto_id, {', '.join(CAMPOS_COLOR)})
+                VALUES (?, {', '.join(marcador(campo) for campo in CAMPOS_COLOR)})
+            ''', (producto.id,) + valores_color(color_spec))
+            color_spec.id = cursor.lastrowid
+            plan.piezas_insertar.extend(filas_de_piezas(color_spec.id, color_spec))
+        reporte.colores_insertados = len(plan.colores_insertar)
+
+        if plan.piezas_insertar:
+            cursor.executemany(SQL_INSERTAR_PIEZA, plan.piezas_insertar)
+            reporte.piezas_insertadas = len(plan.piezas_insertar)
+
+        # La fila del producto solo se toca si cambió algo del grafo
+        if plan.actualizar_producto or not reporte.sin_cambios:
+            asignaciones = ', '.join(f'{campo} = {marcador(campo)}' for campo in CAMPOS_PRODUCTO)
+            cursor.execute(
+                f'UPDATE productos SET {asignaciones}, fecha_modificacion = ? WHERE id = ?',
+                tuple(getattr(producto, campo) for campo in CAMPOS_PRODUCTO)
+                + (datetime.now().isoformat(), producto.id)
+            )
+            reporte.productos_actualizados = 1
+            self.trigramas.indexar_nombres(cursor.connection, [producto.nombre])
+
+    def _cargar_colores_guardados(self, cursor, producto_id: int) -> Dict[int, ColorGuardado]:
+        """Leer las especificaciones y piezas guardadas de un producto"""
+        cursor.execute(f'''
+            SELECT id, color_hex, COALESCE(nombre_color, ''), COALESCE(peso_color, 0.0),
+                   COALESCE(tiempo_adicional, 0), COALESCE({leer('notas')}, '')
+            FROM color_especificaciones
+            WHERE producto_id = ?
+        ''', (producto_id,))
+        colores = {fila[0]: ColorGuardado(id=fila[0], valores=tuple(fila[1:])) for fila in cursor.fetchall()}
+
+        cursor.execute(f'''
+            SELECT cp.color_especificacion_id, cp.id, {COLUMNAS_PIEZA}
+            FROM color_piezas cp
+            JOIN color_especificaciones ce ON ce.id = cp.color_especificacion_id
+            WHERE ce.producto_id = ?
+            ORDER BY cp.color_especificacion_id, cp.id
+        ''', (producto_id,))
+        for color_id, pieza_id, *valores in cursor.fetchall():
+            colores[color_id].piezas.append((pieza_id, normalizar_valores(valores)))
+
+        return colores
+
+    def eliminar_producto(self, producto_id: int) -> bool:
+        """Eliminar un producto"""
+        try:
+            # Los colores y piezas borrados en cascada no reindexan el producto uno por uno
+            with self.escritura.transaccion() as conn, self.search_index.indexado_diferido(conn) as reindexar:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM productos WHERE id = ?', (producto_id,))
+                reindexar.add(producto_id)
+                return cursor.rowcount > 0
+        finally:
+            self.cache.invalidar(producto_id)
+
+    def cargar_textos(self, producto_id: int) -> Optional[Dict[str, str]]:
+        """Descripción y guía de impresión de un producto (cargador de Producto.diferir_textos)"""
+        return cargar_textos(self.get_connection(), producto_id)
 
     def _row_to_producto(self, row) -> Producto:
-        """Convertir una fila de la base de datos a objeto Producto"""
+        """Convertir una fila de COLUMNAS_PRODUCTO a objeto Producto"""
         return Producto(
             id=row[0],
             nombre=row[1],
@@ -314,29 +910,75 @@ class DatabaseManager:
             colores_especificaciones=[]  # Se cargan por separado
         )
 
-    def buscar_productos_por_color(self, color_hex: str) -> List[Producto]:
-        """Buscar productos que contengan un color específico"""
+    def buscar_productos_por_color(self, color_hex: str, delta_e: float = 0.0) -> List[Producto]:
+        """
+        Buscar productos que contengan un color específico
+
+        Args:
+            color_hex: Código hex o nombre del color ("Rojo")
+            delta_e: Con más de 0 también valen los colores en uso a lo
+                sumo a esa diferencia ΔE*ab ("#FE0101" para "#FF0000")
+        """
+        colores = {color_hex}
+        if delta_e > 0 or normalizar_hex(color_hex) is None:
+            codigo = self.resolver_color(color_hex)
+            if codigo is None:
+                return []
+            colores = self.indice_colores().parecidos([codigo], delta_e)
+
+        # Productos con esos colores, con colores y piezas completos
+        condicion, parametros = FiltroProductos.crear(alguno=colores).condicion_colores()
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Buscar productos con el color especificado
-            cursor.execute('''
-                SELECT DISTINCT p.* 
-                FROM productos p
-                JOIN color_especificaciones ce ON p.id = ce.producto_id
-                WHERE ce.color_hex = ?
-                ORDER BY p.nombre
-            ''', (color_hex,))
-
-            rows = cursor.fetchall()
-            productos = []
+            return self._cargar(conn.cursor(), condicion, parametros)
 
-            for row in rows:
-                producto = self.obtener_producto(row[0])  # Obtener producto completo con colores
-                if producto:
-                    productos.append(producto)
+    def indice_colores(self) -> IndiceColores:
+        """
+        Índice CIELAB de los colores en uso (los de estadisticas_color)
 
-            return productos
+        Leer la lista es barato; el índice solo se rearma si cambió.
+        """
+        with self.get_connection() as conn:
+            colores = tuple(fila[0] for fila in conn.execute(
+                'SELECT color_hex FROM estadisticas_color ORDER BY color_hex'
+            ))
+        if self._indice_colores is None or colores != self._colores_indexados:
+            self._indice_colores, self._colores_indexados = IndiceColores(colores), colores
+        return self._indice_colores
+
+    def resolver_color(self, color: str) -> Optional[str]:
+        """Código hex de un color dado por código o por el nombre de sus especificaciones"""
+        if normalizar_hex(color) is not None:
+            return color
+        with self.get_connection() as conn:
+            fila = conn.execute('''
+                SELECT color_hex FROM color_especificaciones
+                WHERE nombre_color = ? COLLATE NOCASE
+                GROUP BY color_hex
+                ORDER BY COUNT(*) DESC
+                LIMIT 1
+            ''', (color.strip(),)).fetchone()
+        return fila[0] if fila else None
+
+    def colores_cercanos(self, color: str, k: int = 5,
+                         delta_e: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Los k colores en uso más parecidos a uno (código hex o nombre)
+
+        Args:
+            delta_e: Si se da, solo los que están a lo sumo a esa diferencia
+
+        Returns:
+            [{'color_hex', 'delta_e'}] del más parecido al menos
+        """
+        codigo = self.resolver_color(color)
+        if codigo is None:
+            return []
+        cercanos = self.indice_colores().cercanos(codigo, k)
+        return [
+            {'color_hex': codigo_cercano, 'delta_e': round(diferencia, 2)}
+            for codigo_cercano, diferencia in cercanos
+            if delta_e is None or diferencia <= delta_e
+        ]
 
     def obtener_colores_disponibles(self) -> List[Dict[str, Any]]:
         """Obtener lista de todos los colores disponibles con su frecuencia"""
@@ -347,7 +989,7 @@ class DatabaseManager:
                 SELECT color_hex, nombre_color, COUNT(DISTINCT producto_id) as cantidad
                 FROM color_especificaciones
                 GROUP BY color_hex
-                ORDER BY cantidad DESC
+                ORDER BY cantidad DESC, color_hex
             ''')
 
             return [
@@ -360,44 +1002,6 @@ class DatabaseManager:
             ]
 
     def obtener_estadisticas(self) -> Dict[str, Any]:
-        """Obtener estadísticas de la base de datos"""
+        """Obtener estadísticas de la base de datos (mantenidas por triggers)"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Total de productos
-            cursor.execute('SELECT COUNT(*) FROM productos')
-            total_productos = cursor.fetchone()[0]
-
-            # Productos por material
-            cursor.execute('''
-                SELECT material, COUNT(*) 
-                FROM productos 
-                GROUP BY material
-            ''')
-            productos_por_material = dict(cursor.fetchall())
-
-            # Tiempo promedio de impresión
-            cursor.execute('SELECT AVG(tiempo_impresion) FROM productos')
-            tiempo_promedio = cursor.fetchone()[0] or 0
-
-            # Total de colores únicos
-            cursor.execute('SELECT COUNT(DISTINCT color_hex) FROM color_especificaciones')
-            total_colores = cursor.fetchone()[0] or 0
-
-            # Promedio de colores por producto
-            cursor.execute('''
-                SELECT AVG(color_count) FROM (
-                    SELECT COUNT(*) as color_count 
-                    FROM color_especificaciones 
-                    GROUP BY producto_id
-                )
-            ''')
-            promedio_colores = cursor.fetchone()[0] or 0
-
-            return {
-                'total_productos': total_productos,
-                'productos_por_material': productos_por_material,
-                'tiempo_promedio_impresion': round(tiempo_promedio, 2),
-                'total_colores': total_colores,
-                'promedio_colores_por_producto': round(promedio_colores, 1)
-            }
\ No newline at end of file
+            return self.stats.leer(conn)
@@ -4,143 +4,272 @@ Migración de base de datos para soporte avanzado de piezas
 """
 
 import sqlite3
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .db_connection import ConnectionManager
+from .db_backup import BackupService
+from .db_search import SearchIndex, TRIGGERS as TRIGGERS_BUSQUEDA
+from .db_changes import TRIGGERS as TRIGGERS_CAMBIOS
+from .db_totales import TotalesProductos
+from .db_trigramas import IndiceTrigramas
 
 
 class DatabaseMigrator:
-    """Manejador de migraciones de base de datos"""
+    """
+    Manejador de migraciones de base de datos
+
+    La versión del esquema se guarda en ``PRAGMA user_version``: comprobar
+    que la base está al día es una sola lectura. Cada migración pendiente
+    se aplica en la conexión del migrador dentro de su propia transacción
+    (``BEGIN IMMEDIATE``) junto con el cambio de versión, así que si falla
+    no deja el esquema a medias. ``schema_versions`` queda como historial.
+    """
     
-    def __init__(self, db_path: str = "data/productos.db"):
+    def __init__(self, db_path: str = "data/productos.db",
+                 connections: Optional[ConnectionManager] = None):
         self.db_path = Path(db_path)
+        self.connections = connections or ConnectionManager(self.db_path)
         self.migrations = {
             1: self._migration_001_add_piece_details,
-            # Aquí puedes agregar más migraciones futuras
+            2: self._migration_002_filter_indexes,
+            3: self._migration_003_piece_metadata,
+            4: self._migration_004_product_totals,
+            5: self._migration_005_compressed_texts,
+            6: self._migration_006_name_trigrams,
+            # Aquí puedes agregar más migraciones futuras. Todo cambio al
+            # esquema de DatabaseManager.init_database necesita una, porque
+            # las bases al día ya no vuelven a ejecutar init_database.
         }
+
+    @property
+    def latest_version(self) -> int:
+        """Versión del esquema después de aplicar todas las migraciones"""
+        return max(self.migrations)
     
     def get_connection(self):
-        """Obtener conexión a la base de datos"""
-        return sqlite3.connect(str(self.db_path))
+        """Obtener la conexión persistente del hilo actual"""
+        return self.connections.get_connection()
+
+    def close(self):
+        """Cerrar las conexiones del migrador"""
+        self.connections.close()
     
     def get_current_version(self) -> int:
-        """Obtener versión actual de la base de datos"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Crear tabla de versiones si no existe
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS schema_versions (
-                    version INTEGER PRIMARY KEY,
-                    applied_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Obtener versión actual
-            cursor.execute('SELECT MAX(version) FROM schema_versions')
-            result = cursor.fetchone()
-            return result[0] if result[0] is not None else 0
-    
-    def set_version(self, version: int):
-        """Establecer versión de la base de datos"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO schema_versions (version) VALUES (?)', 
-                (version,)
-            )
-            conn.commit()
+        """Obtener versión actual de la base de datos (PRAGMA user_version)"""
+        return self.get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+    def is_up_to_date(self) -> bool:
+        """Verificar con una sola lectura si no hay migraciones pendientes"""
+        return self.get_current_version() >= self.latest_version
+
+    def has_data(self) -> bool:
+        """Verificar si la base ya tiene el esquema de productos (para decidir un backup)"""
+        return self.get_connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos'"
+        ).fetchone() is not None
+
+    def _legacy_version(self, conn: sqlite3.Connection) -> int:
+        """Versión registrada en schema_versions por el migrador anterior a user_version"""
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_versions'"
+        ).fetchone()
+        if not existe:
+            return 0
+        return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_versions').fetchone()[0]
     
     def run_migrations(self) -> Dict[str, Any]:
         """Ejecutar todas las migraciones pendientes"""
-        current_version = self.get_current_version()
         results = {
             'success': True,
             'migrations_applied': [],
-            'errors': []
+            'errors': [],
+            'timings': {},
         }
-        
+
+        # Camino rápido: una sola lectura de PRAGMA
+        if self.is_up_to_date():
+            return results
+
+        conn = self.get_connection()
+        current_version = max(self.get_current_version(), self._legacy_version(conn))
         print(f"📊 Versión actual de la base de datos: {current_version}")
-        
-        for version, migration_func in self.migrations.items():
-            if version > current_version:
-                try:
+
+        inicio_total = time.perf_counter()
+        for version, migration_func in sorted(self.migrations.items()):
+            if version <= current_version:
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+
+                    # Otro proceso pudo migrar mientras esperábamos el bloqueo
+                    if conn.execute('PRAGMA user_version').fetchone()[0] >= version:
+                        continue
+
                     print(f"🔄 Ejecutando migración {version}...")
-                    migration_func()
-                    self.set_version(version)
-                    results['migrations_applied'].append(version)
-                    print(f"✅ Migración {version} completada")
-                except Exception as e:
-                    error_msg = f"Migración {version} falló: {str(e)}"
-                    print(f"❌ {error_msg}")
-                    results['errors'].append(error_msg)
-                    results['success'] = False
-                    break
-        
-        if not results['migrations_applied']:
+                    migration_func(conn)
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS schema_versions ('
+                        'version INTEGER PRIMARY KEY, applied_at TEXT DEFAULT CURRENT_TIMESTAMP)'
+                    )
+                    conn.execute('INSERT OR REPLACE INTO schema_versions (version) VALUES (?)', (version,))
+                    conn.execute(f'PRAGMA user_version = {int(version)}')
+            except Exception as e:
+                error_msg = f"Migración {version} falló: {str(e)}"
+                print(f"❌ {error_msg}")
+                results['errors'].append(error_msg)
+                results['success'] = False
+                break
+
+            duracion = time.perf_counter() - inicio
+            results['migrations_applied'].append(version)
+            results['timings'][version] = round(duracion, 4)
+            print(f"✅ Migración {version} completada en {duracion:.3f} s")
+
+        # Bases migradas por el migrador anterior: solo falta registrar la versión
+        if results['success'] and self.get_current_version() < current_version:
+            with conn:
+                conn.execute(f'PRAGMA user_version = {int(current_version)}')
+
+        if results['migrations_applied']:
+            print(f"⏱️  Migraciones aplicadas en {time.perf_counter() - inicio_total:.3f} s")
+        elif results['success']:
             print("✅ Base de datos actualizada, no hay migraciones pendientes")
         
         return results
     
-    def _migration_001_add_piece_details(self):
+    def _migration_001_add_piece_details(self, conn: sqlite3.Connection):
         """Migración 001: Agregar campos detallados para piezas"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Verificar si ya están los nuevos campos
-            cursor.execute("PRAGMA table_info(color_piezas)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Lista de nuevos campos a agregar
-            new_fields = [
-                ('peso_pieza', 'REAL DEFAULT 0.0'),
-                ('descripcion_pieza', 'TEXT'),
-                ('tiempo_impresion_pieza', 'INTEGER DEFAULT 0'),
-                ('orientacion_recomendada', 'TEXT'),
-                ('requiere_soportes', 'BOOLEAN DEFAULT 0'),
-                ('nivel_dificultad', 'TEXT DEFAULT "Fácil"'),
-                ('notas_postproceso', 'TEXT'),
-                ('orden_ensamblaje', 'INTEGER DEFAULT 0'),
-                ('tipo_union', 'TEXT DEFAULT "Encaje"'),  # Encaje, Pegamento, Tornillo, etc.
-                ('tolerancia_encaje', 'REAL DEFAULT 0.2'),  # mm de tolerancia
-            ]
-            
-            # Agregar campos que no existan
-            for field_name, field_definition in new_fields:
-                if field_name not in columns:
-                    query = f'ALTER TABLE color_piezas ADD COLUMN {field_name} {field_definition}'
-                    cursor.execute(query)
-                    print(f"   ✅ Agregado campo: {field_name}")
-            
-            # Crear índices para mejorar rendimiento
-            indexes = [
-                'CREATE INDEX IF NOT EXISTS idx_piezas_peso ON color_piezas(peso_pieza)',
-                'CREATE INDEX IF NOT EXISTS idx_piezas_dificultad ON color_piezas(nivel_dificultad)',
-                'CREATE INDEX IF NOT EXISTS idx_piezas_orden ON color_piezas(orden_ensamblaje)',
-            ]
-            
-            for index_query in indexes:
-                cursor.execute(index_query)
-            
-            conn.commit()
-    
-    def backup_database(self) -> str:
-        """Crear backup de la base de datos antes de migrar"""
-        import shutil
-        from datetime import datetime
+        cursor = conn.cursor()
         
-        if not self.db_path.exists():
-            return ""
+        # Verificar si ya están los nuevos campos
+        cursor.execute("PRAGMA table_info(color_piezas)")
+        columns = [column[1] for column in cursor.fetchall()]
         
-        # Crear directorio de backup
-        backup_dir = Path("data/backups")
-        backup_dir.mkdir(parents=True, exist_ok=True)
+        # Lista de nuevos campos a agregar
+        new_fields = [
+            ('peso_pieza', 'REAL DEFAULT 0.0'),
+            ('descripcion_pieza', 'TEXT'),
+            ('tiempo_impresion_pieza', 'INTEGER DEFAULT 0'),
+            ('orientacion_recomendada', 'TEXT'),
+            ('requiere_soportes', 'BOOLEAN DEFAULT 0'),
+            ('nivel_dificultad', 'TEXT DEFAULT "Fácil"'),
+            ('notas_postproceso', 'TEXT'),
+            ('orden_ensamblaje', 'INTEGER DEFAULT 0'),
+            ('tipo_union', 'TEXT DEFAULT "Encaje"'),  # Encaje, Pegamento, Tornillo, etc.
+            ('tolerancia_encaje', 'REAL DEFAULT 0.2'),  # mm de tolerancia
+        ]
         
-        # Generar nombre del backup
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = backup_dir / f"productos_backup_{timestamp}.db"
+        # Agregar campos que no existan
+        for field_name, field_definition in new_fields:
+            if field_name not in columns:
+                query = f'ALTER TABLE color_piezas ADD COLUMN {field_name} {field_definition}'
+                cursor.execute(query)
+                print(f"   ✅ Agregado campo: {field_name}")
         
-        # Copiar base de datos
-        shutil.copy2(self.db_path, backup_path)
+        # Crear índices para mejorar rendimiento
+        indexes = [
+            'CREATE INDEX IF NOT EXISTS idx_piezas_peso ON color_piezas(peso_pieza)',
+            'CREATE INDEX IF NOT EXISTS idx_piezas_dificultad ON color_piezas(nivel_dificultad)',
+            'CREATE INDEX IF NOT EXISTS idx_piezas_orden ON color_piezas(orden_ensamblaje)',
+        ]
+        
+        for index_query in indexes:
+            cursor.execute(index_query)
+    
+    def _migration_002_filter_indexes(self, conn: sqlite3.Connection):
+        """Migración 002: Índices para los filtros por material y rango (db_query)"""
+        indexes = [
+            'CREATE INDEX IF NOT EXISTS idx_temperatura_extrusor ON productos(temperatura_extrusor)',
+            'CREATE INDEX IF NOT EXISTS idx_temperatura_cama ON productos(temperatura_cama)',
+            # Material casi siempre va acompañado de un rango: igualdad + rango en un índice
+            'CREATE INDEX IF NOT EXISTS idx_material_peso ON productos(material, peso)',
+            'CREATE INDEX IF NOT EXISTS idx_material_tiempo ON productos(material, tiempo_impresion)',
+        ]
+
+        for index_query in indexes:
+            conn.execute(index_query)
+    
+    def _migration_003_piece_metadata(self, conn: sqlite3.Connection):
+        """Migración 003: Metadatos de piezas (MetadataPieza) en color_piezas"""
+        columns = [column[1] for column in conn.execute("PRAGMA table_info(color_piezas)")]
+
+        new_fields = [
+            ('es_critica', 'BOOLEAN DEFAULT 0'),
+            ('permite_colores_alternativos', 'BOOLEAN DEFAULT 1'),
+            ('es_decorativa', 'BOOLEAN DEFAULT 0'),
+            ('es_funcional', 'BOOLEAN DEFAULT 1'),
+        ]
+
+        for field_name, field_definition in new_fields:
+            if field_name not in columns:
+                conn.execute(f'ALTER TABLE color_piezas ADD COLUMN {field_name} {field_definition}')
+                print(f"   ✅ Agregado campo: {field_name}")
+
+    def _migration_004_product_totals(self, conn: sqlite3.Connection):
+        """Migración 004: Peso y tiempo totales por producto (db_totales)"""
+        # Los triggers de UPDATE del índice de texto y del registro de cambios
+        # pasan a dispararse solo con sus columnas, no con el UPDATE de los totales
+        self._reemplazar_triggers(conn, {
+            'trg_fts_producto_update': TRIGGERS_BUSQUEDA['trg_fts_producto_update'],
+            'trg_cambios_producto_update': TRIGGERS_CAMBIOS['trg_cambios_producto_update'],
+        })
+
+        TotalesProductos().crear(conn)
+
+    def _migration_005_compressed_texts(self, conn: sqlite3.Connection):
+        """Migración 005: Textos largos comprimidos (db_textos)"""
+        # comprimir_texto deja igual lo que no alcanza el mínimo configurado,
+        # y todo si la compresión está desactivada (por defecto)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE productos SET
+                descripcion = comprimir_texto(descripcion),
+                guia_impresion = comprimir_texto(guia_impresion)
+            WHERE comprimir_texto(descripcion) IS NOT descripcion
+               OR comprimir_texto(guia_impresion) IS NOT guia_impresion
+        ''')
+        cambiados = cursor.rowcount
+        cursor.execute('''
+            UPDATE color_especificaciones SET notas = comprimir_texto(notas)
+            WHERE comprimir_texto(notas) IS NOT notas
+        ''')
+        cambiados += cursor.rowcount
+
+        # Los triggers del índice de texto leen un texto comprimido como vacío
+        indice = SearchIndex()
+        if cambiados and indice.disponible(conn):
+            indice.reconstruir(conn)
+
+    def _migration_006_name_trigrams(self, conn: sqlite3.Connection):
+        """Migración 006: Trigramas de los nombres para la búsqueda aproximada (db_trigramas)"""
+        IndiceTrigramas().crear(conn)
+
+    @staticmethod
+    def _reemplazar_triggers(conn: sqlite3.Connection, reemplazar: Dict[str, str]):
+        """Cambiar la definición de los triggers que existen (los que faltan no se crean)"""
+        for nombre, cuerpo in reemplazar.items():
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (nombre,)
+            ).fetchone()
+            if existe:
+                conn.execute(f'DROP TRIGGER {nombre}')
+                conn.execute(f'CREATE TRIGGER {nombre} {cuerpo}')
+
+    def backup_database(self) -> str:
+        """Crear backup de la base de datos antes de migrar"""
+        # La API de backup copia una instantánea coherente aunque haya
+        # escrituras en curso (y también lo que todavía está en el WAL)
+        servicio = BackupService(self.db_path)
+        backup = servicio.crear_backup()
+        if backup is None:
+            return ""
+
+        backup_path = servicio.carpeta / backup.archivo
         print(f"📋 Backup creado: {backup_path}")
         
         return str(backup_path)
@@ -151,12 +280,15 @@ def run_database_migration():
     print("🚀 Iniciando migración de base de datos...")
     
     migrator = DatabaseMigrator()
-    
-    # Crear backup
-    backup_path = migrator.backup_database()
+
+    # Crear backup solo si hay algo que migrar
+    backup_path = ""
+    if not migrator.is_up_to_date() and migrator.has_data():
+        backup_path = migrator.backup_database()
     
     # Ejecutar migraciones
     results = migrator.run_migrations()
+    migrator.close()
     
     if results['success']:
         print("🎉 ¡Migración completada exitosamente!")
@@ -0,0 +1,125 @@
+"""
+Paginación por keyset (cursor) para listados de productos
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+# Columnas por las que se puede ordenar un listado, con su expresión SQL.
+# Todas tienen índice, por lo que (columna, id) se recorre sin ordenar en memoria.
+COLUMNAS_ORDENABLES = {
+    'nombre': 'p.nombre',
+    'material': 'p.material',
+    'peso': 'p.peso',
+    'tiempo_impresion': 'p.tiempo_impresion',
+    'peso_total': 'p.peso_total',
+    'tiempo_total': 'p.tiempo_total',
+    'fecha_creacion': 'p.fecha_creacion',
+    'fecha_modificacion': 'p.fecha_modificacion',
+    'id': 'p.id',
+}
+
+# Columnas NOT NULL. En las demás el keyset contempla los NULL, que SQLite
+# ordena antes que cualquier valor: (columna, id) > (?, ?) es NULL para
+# esas filas, y sin tratarlas aparte el listado se cortaría en ellas
+COLUMNAS_NO_NULAS = {'p.nombre', 'p.id'}
+
+# Cursor de una página: (valor de la columna de orden, id) de la última fila
+CursorPagina = Tuple[Any, int]
+
+
+@dataclass
+class PaginaProductos:
+    """Una página de un listado de productos"""
+    productos: List[Any] = field(default_factory=list)
+    cursor_siguiente: Optional[CursorPagina] = None  # None si es la última página
+    total: int = 0  # Total de productos del listado completo
+
+    @property
+    def hay_mas(self) -> bool:
+        """Indica si existen más páginas después de esta"""
+        return self.cursor_siguiente is not None
+
+
+def construir_keyset(orden: str, descendente: bool = False,
+                     despues_de: Optional[CursorPagina] = None,
+                     indice_orden: bool = True) -> Tuple[str, str, tuple]:
+    """
+    Construir la condición y el ORDER BY de una página
+
+    Args:
+        orden: Nombre de columna de COLUMNAS_ORDENABLES
+        descendente: Orden descendente
+        despues_de: Cursor de la página anterior
+        indice_orden: Con False el ORDER BY usa ``+columna``, que impide al
+            planificador recorrer el índice de orden: busca por el índice
+            del filtro y ordena en memoria (mejor si el filtro deja pocas filas)
+
+    Returns:
+        (condición WHERE, expresión ORDER BY, parámetros)
+    """
+    if orden not in COLUMNAS_ORDENABLES:
+        raise ValueError(f"No se puede ordenar por '{orden}'")
+
+    columna = COLUMNAS_ORDENABLES[orden]
+    direccion = 'DESC' if descendente else 'ASC'
+    orden_sql = f'{columna if indice_orden else "+" + columna} {direccion}, p.id {direccion}'
+
+    if despues_de is None:
+        return '', orden_sql, ()
+
+    condicion, parametros = _despues_de(columna, descendente, *despues_de)
+    return condicion, orden_sql, parametros
+
+
+def _despues_de(columna: str, descendente: bool, valor: Any, ultimo_id: int) -> Tuple[str, tuple]:
+    """Condición de las filas que van después del cursor (valor, ultimo_id)"""
+    comparador = '<' if descendente else '>'
+    if columna == 'p.id':
+        return f'p.id {comparador} ?', (ultimo_id,)
+    if columna in COLUMNAS_NO_NULAS:
+        return f'({columna}, p.id) {comparador} (?, ?)', (valor, ultimo_id)
+
+    # Los NULL van primero en orden ascendente y al final en descendente
+    if valor is None:
+        if descendente:
+            return f'({columna} IS NULL AND p.id < ?)', (ultimo_id,)
+        return f'({columna} IS NOT NULL OR p.id > ?)', (ultimo_id,)
+    if descendente:
+        return f'(({columna}, p.id) < (?, ?) OR {columna} IS NULL)', (valor, ultimo_id)
+    return f'({columna}, p.id) > (?, ?)', (valor, ultimo_id)
+
+
+def _hasta(columna: str, descendente: bool, valor: Any, ultimo_id: int) -> Tuple[str, tuple]:
+    """Condición de las filas hasta el cursor incluido (complemento de _despues_de)"""
+    comparador = '>=' if descendente else '<='
+    if columna == 'p.id':
+        return f'p.id {comparador} ?', (ultimo_id,)
+    if columna in COLUMNAS_NO_NULAS:
+        return f'({columna}, p.id) {comparador} (?, ?)', (valor, ultimo_id)
+
+    if valor is None:
+        if descendente:
+            return f'({columna} IS NOT NULL OR p.id >= ?)', (ultimo_id,)
+        return f'({columna} IS NULL AND p.id <= ?)', (ultimo_id,)
+    if descendente:
+        return f'({columna}, p.id) >= (?, ?)', (valor, ultimo_id)
+    return f'(({columna}, p.id) <= (?, ?) OR {columna} IS NULL)', (valor, ultimo_id)
+
+
+def construir_keyset_hasta(orden: str, descendente: bool = False,
+                           hasta: Optional[CursorPagina] = None) -> Tuple[str, str, tuple]:
+    """
+    Construir la condición y el ORDER BY de todas las filas hasta un cursor
+
+    Es el complemento de ``construir_keyset``: las filas hasta el cursor
+    incluido son las de las páginas ya cargadas.
+
+    Returns:
+        (condición WHERE, expresión ORDER BY, parámetros)
+    """
+    _, orden_sql, _ = construir_keyset(orden, descendente)
+    if hasta is None:
+        return '', orden_sql, ()
+    condicion, parametros = _hasta(COLUMNAS_ORDENABLES[orden], descendente, *hasta)
+    return condicion, orden_sql, parametros
@@ -0,0 +1,98 @@
+"""
+Columnas de color_piezas y su conversión a objetos Pieza
+"""
+
+from typing import Any, List, Sequence, Tuple
+
+from models.pieza import (
+    Pieza, ConfiguracionImpresion, Ensamblaje, MetadataPieza,
+    NivelDificultad, OrientacionImpresion, TipoUnion
+)
+
+# Columnas de color_piezas que se leen y se escriben (además de id y
+# color_especificacion_id), en el orden de valores_pieza
+CAMPOS_PIEZA = (
+    'nombre_pieza', 'descripcion_pieza', 'peso_pieza', 'tiempo_impresion_pieza',
+    'nivel_dificultad', 'orientacion_recomendada', 'requiere_soportes', 'tolerancia_encaje',
+    'orden_ensamblaje', 'tipo_union', 'notas_postproceso',
+    'es_critica', 'permite_colores_alternativos', 'es_decorativa', 'es_funcional',
+)
+
+# Columnas calificadas con el alias cp, para los SELECT
+COLUMNAS_PIEZA = ', '.join(f'cp.{campo}' for campo in CAMPOS_PIEZA)
+
+# INSERT de una fila de filas_de_piezas
+SQL_INSERTAR_PIEZA = f'''
+    INSERT INTO color_piezas (color_especificacion_id, {', '.join(CAMPOS_PIEZA)})
+    VALUES (?, {', '.join('?' * len(CAMPOS_PIEZA))})
+'''
+
+
+def _enum(tipo, valor, defecto):
+    """Miembro del enum con ese valor, o el defecto si es NULL o desconocido"""
+    try:
+        return tipo(valor) if valor is not None else defecto
+    except ValueError:
+        return defecto
+
+
+def valores_pieza(pieza: Pieza) -> Tuple:
+    """Valores de una pieza en el orden de CAMPOS_PIEZA"""
+    return (
+        pieza.nombre,
+        pieza.descripcion or "",
+        pieza.peso_g or 0.0,
+        pieza.tiempo_impresion_min or 0,
+        pieza.dificultad.value,
+        pieza.configuracion.orientacion.value,
+        int(pieza.configuracion.requiere_soportes),
+        pieza.configuracion.tolerancia_encaje,
+        pieza.ensamblaje.orden,
+        pieza.ensamblaje.tipo_union.value,
+        pieza.ensamblaje.notas_postproceso or "",
+        int(pieza.metadata.critica),
+        int(pieza.metadata.permite_colores_alternativos),
+        int(pieza.metadata.es_decorativa),
+        int(pieza.metadata.es_funcional),
+    )
+
+
+def filas_de_piezas(color_id: int, color_spec) -> List[Tuple]:
+    """Filas (color_especificacion_id, valores...) para insertar las piezas de un color"""
+    return [(color_id,) + valores_pieza(pieza) for pieza in color_spec.get_piezas_como_objetos()]
+
+
+def normalizar_valores(fila: Sequence[Any]) -> Tuple:
+    """Valores leídos de la base (con NULL de filas viejas) como los de valores_pieza"""
+    return valores_pieza(pieza_desde_valores(None, fila))
+
+
+def pieza_desde_valores(pieza_id, fila: Sequence[Any]) -> Pieza:
+    """Armar una Pieza a partir de una fila en el orden de CAMPOS_PIEZA"""
+    (nombre, descripcion, peso, tiempo, dificultad, orientacion, soportes, tolerancia,
+     orden, tipo_union, notas, critica, colores_alternativos, decorativa, funcional) = fila
+
+    return Pieza(
+        id=pieza_id,
+        nombre=nombre,
+        descripcion=descripcion or "",
+        peso_g=peso or 0.0,
+        tiempo_impresion_min=tiempo or 0,
+        dificultad=_enum(NivelDificultad, dificultad, NivelDificultad.FACIL),
+        configuracion=ConfiguracionImpresion(
+            orientacion=_enum(OrientacionImpresion, orientacion, OrientacionImpresion.CUALQUIERA),
+            requiere_soportes=bool(soportes),
+            tolerancia_encaje=0.2 if tolerancia is None else tolerancia,
+        ),
+        ensamblaje=Ensamblaje(
+            orden=orden or 0,
+            tipo_union=_enum(TipoUnion, tipo_union, TipoUnion.ENCAJE),
+            notas_postproceso=notas or "",
+        ),
+        metadata=MetadataPieza(
+            critica=bool(critica),
+            permite_colores_alternativos=True if colores_alternativos is None else bool(colores_alternativos),
+            es_decorativa=bool(decorativa),
+            es_funcional=True if funcional is None else bool(funcional),
+        ),
+    )
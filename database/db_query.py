@@ -0,0 +1,240 @@
+"""
+Filtros de productos resueltos en SQL
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
+from typing import Any, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+# Columnas de productos que se pueden filtrar por rango, con su expresión SQL.
+# Todas tienen índice propio y peso y tiempo_impresion además uno compuesto
+# con material, así que ningún filtro soportado recorre la tabla entera.
+COLUMNAS_RANGO = {
+    'peso': 'p.peso',
+    'tiempo_impresion': 'p.tiempo_impresion',
+    'peso_total': 'p.peso_total',
+    'tiempo_total': 'p.tiempo_total',
+    'temperatura_extrusor': 'p.temperatura_extrusor',
+    'temperatura_cama': 'p.temperatura_cama',
+    'fecha_creacion': 'p.fecha_creacion',
+    'fecha_modificacion': 'p.fecha_modificacion',
+}
+
+
+def _marcadores(valores) -> str:
+    return ', '.join('?' * len(valores))
+
+
+def _valor_sql(valor: Any) -> Any:
+    """Las fechas se guardan como texto ISO 8601, que se compara en orden"""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+@dataclass(frozen=True)
+class Rango:
+    """
+    Intervalo cerrado [minimo, maximo]; un extremo None no limita
+
+    Para las fechas, un ``date`` como máximo incluye todo ese día.
+    """
+    minimo: Optional[Any] = None
+    maximo: Optional[Any] = None
+
+    def __post_init__(self):
+        if self.minimo is not None and self.maximo is not None and self.minimo > self.maximo:
+            raise ValueError(f"Rango vacío: {self.minimo} > {self.maximo}")
+
+    @property
+    def vacio(self) -> bool:
+        """Indica si el rango no limita nada"""
+        return self.minimo is None and self.maximo is None
+
+    def condicion(self, expresion: str) -> Tuple[str, tuple]:
+        """Condición SQL del rango sobre la expresión (vacía si no limita)"""
+        condiciones: List[str] = []
+        parametros: List[Any] = []
+
+        if self.minimo is not None:
+            condiciones.append(f'{expresion} >= ?')
+            parametros.append(_valor_sql(self.minimo))
+
+        if isinstance(self.maximo, date) and not isinstance(self.maximo, datetime):
+            condiciones.append(f'{expresion} < ?')
+            parametros.append((self.maximo + timedelta(days=1)).isoformat())
+        elif self.maximo is not None:
+            condiciones.append(f'{expresion} <= ?')
+            parametros.append(_valor_sql(self.maximo))
+
+        return ' AND '.join(condiciones), tuple(parametros)
+
+
+@dataclass(frozen=True)
+class FiltroProductos:
+    """
+    Filtro de productos por texto, colores, material y rangos numéricos
+
+    Los conjuntos de colores son códigos hexadecimales:
+    - colores_alguno: el producto usa al menos uno
+    - colores_todos: el producto usa todos
+    - colores_ninguno: el producto no usa ninguno
+
+    Es inmutable: los métodos ``con_*`` devuelven un filtro nuevo, así que
+    se puede componer paso a paso, p. ej.
+    ``FiltroProductos().con_materiales('PETG').con_rango('tiempo_impresion', minimo=240)``.
+    """
+    texto: str = ""
+    colores_alguno: FrozenSet[str] = field(default_factory=frozenset)
+    colores_todos: FrozenSet[str] = field(default_factory=frozenset)
+    colores_ninguno: FrozenSet[str] = field(default_factory=frozenset)
+    materiales: FrozenSet[str] = field(default_factory=frozenset)  # El producto es de alguno
+    peso: Optional[Rango] = None  # Gramos
+    tiempo_impresion: Optional[Rango] = None  # Minutos
+    peso_total: Optional[Rango] = None  # Gramos, como Producto.get_peso_total
+    tiempo_total: Optional[Rango] = None  # Minutos, como Producto.get_tiempo_total
+    temperatura_extrusor: Optional[Rango] = None
+    temperatura_cama: Optional[Rango] = None
+    fecha_creacion: Optional[Rango] = None
+    fecha_modificacion: Optional[Rango] = None
+
+    @classmethod
+    def crear(cls, texto: str = "", alguno: Iterable[str] = (), todos: Iterable[str] = (),
+              ninguno: Iterable[str] = (), materiales: Iterable[str] = (),
+              **rangos: Union[Rango, Tuple[Any, Any]]) -> 'FiltroProductos':
+        """
+        Crear un filtro a partir de listas de colores y materiales
+
+        Los rangos se pasan por nombre de columna de COLUMNAS_RANGO, como
+        Rango o como tupla (mínimo, máximo), p. ej. ``peso=(50, 200)``.
+        """
+        filtro = cls(texto.strip(), frozenset(alguno), frozenset(todos), frozenset(ninguno),
+                     frozenset(materiales))
+        for columna, rango in rangos.items():
+            filtro = filtro.con_rango(columna, *((rango.minimo, rango.maximo)
+                                                 if isinstance(rango, Rango) else rango))
+        return filtro
+
+    def con_texto(self, texto: str) -> 'FiltroProductos':
+        """Copia del filtro con otro texto de búsqueda"""
+        return replace(self, texto=texto.strip())
+
+    def con_colores(self, alguno: Iterable[str] = (), todos: Iterable[str] = (),
+                    ninguno: Iterable[str] = ()) -> 'FiltroProductos':
+        """Copia del filtro con otras condiciones de color"""
+        return replace(self, colores_alguno=frozenset(alguno), colores_todos=frozenset(todos),
+                       colores_ninguno=frozenset(ninguno))
+
+    def con_materiales(self, *materiales: str) -> 'FiltroProductos':
+        """Copia del filtro limitada a esos materiales (ninguno: cualquiera)"""
+        return replace(self, materiales=frozenset(materiales))
+
+    def con_rango(self, columna: str, minimo: Any = None, maximo: Any = None) -> 'FiltroProductos':
+        """Copia del filtro con el rango de una columna de COLUMNAS_RANGO (None lo quita)"""
+        if columna not in COLUMNAS_RANGO:
+            raise ValueError(f"No se puede filtrar por rango de '{columna}'")
+        rango = Rango(minimo, maximo)
+        return replace(self, **{columna: None if rango.vacio else rango})
+
+    @property
+    def rangos(self) -> List[Tuple[str, Rango]]:
+        """(columna, rango) de los rangos que limitan algo"""
+        return [
+            (columna, getattr(self, columna)) for columna in COLUMNAS_RANGO
+            if getattr(self, columna) is not None and not getattr(self, columna).vacio
+        ]
+
+    @property
+    def tiene_colores(self) -> bool:
+        """Indica si hay alguna condición de color"""
+        return bool(self.colores_alguno or self.colores_todos or self.colores_ninguno)
+
+    @property
+    def tiene_atributos(self) -> bool:
+        """Indica si hay alguna condición de material o de rango"""
+        return bool(self.materiales or self.rangos)
+
+    @property
+    def vacio(self) -> bool:
+        """Indica si el filtro no restringe nada"""
+        return not self.texto and not self.tiene_colores and not self.tiene_atributos
+
+    def condicion(self, columna_id: str = 'p.id') -> Tuple[str, tuple]:
+        """
+        Condición SQL de colores, material y rangos (todo salvo el texto)
+
+        Returns:
+            (condición, parámetros); condición vacía si no hay ninguna
+        """
+        return combinar_condiciones(
+            self.condicion_atributos(columna_id), self.condicion_colores(columna_id)
+        )
+
+    def condicion_atributos(self, columna_id: str = 'p.id') -> Tuple[str, tuple]:
+        """
+        Condición SQL de material y rangos sobre la columna con el ID del producto
+
+        Sobre ``p.id`` las condiciones van directas sobre las columnas de
+        ``p`` para que el planificador use sus índices; sobre otra columna
+        (p. ej. el rowid del índice FTS) se resuelven con una subconsulta.
+
+        Returns:
+            (condición, parámetros); condición vacía si no hay material ni rangos
+        """
+        partes = [rango.condicion(COLUMNAS_RANGO[columna]) for columna, rango in self.rangos]
+        if self.materiales:
+            materiales = sorted(self.materiales)
+            partes.insert(0, (f'p.material IN ({_marcadores(materiales)})', tuple(materiales)))
+
+        condicion, parametros = combinar_condiciones(*partes)
+        if not condicion or columna_id == 'p.id':
+            return condicion, parametros
+        return f'{columna_id} IN (SELECT p.id FROM productos p WHERE {condicion})', parametros
+
+    def condicion_colores(self, columna_id: str = 'p.id') -> Tuple[str, tuple]:
+        """
+        Condición SQL de los colores sobre la columna con el ID del producto
+
+        Cada conjunto se resuelve con una subconsulta sobre
+        color_especificaciones que usa el índice idx_color_hex.
+
+        Returns:
+            (condición, parámetros); condición vacía si no hay colores
+        """
+        condiciones: List[str] = []
+        parametros: List[str] = []
+
+        if self.colores_alguno:
+            colores = sorted(self.colores_alguno)
+            condiciones.append(f'''{columna_id} IN (
+                SELECT producto_id FROM color_especificaciones
+                WHERE color_hex IN ({_marcadores(colores)})
+            )''')
+            parametros.extend(colores)
+
+        if self.colores_todos:
+            # Intersección de una búsqueda por color: un GROUP BY producto_id
+            # llevaría al planificador a recorrer entero idx_producto_color
+            colores = sorted(self.colores_todos)
+            por_color = ' INTERSECT '.join(
+                'SELECT producto_id FROM color_especificaciones WHERE color_hex = ?' for _ in colores
+            )
+            condiciones.append(f'{columna_id} IN ({por_color})')
+            parametros.extend(colores)
+
+        if self.colores_ninguno:
+            colores = sorted(self.colores_ninguno)
+            condiciones.append(f'''{columna_id} NOT IN (
+                SELECT producto_id FROM color_especificaciones
+                WHERE color_hex IN ({_marcadores(colores)})
+            )''')
+            parametros.extend(colores)
+
+        return ' AND '.join(condiciones), tuple(parametros)
+
+
+def combinar_condiciones(*partes: Tuple[str, tuple]) -> Tuple[str, tuple]:
+    """Unir con AND varias (condición, parámetros), ignorando las vacías"""
+    condiciones = [condicion for condicion, _ in partes if condicion]
+    parametros = tuple(p for condicion, params in partes if condicion for p in params)
+    return ' AND '.join(f'({c})' for c in condiciones), parametros
@@ -0,0 +1,293 @@
+"""
+Índice de búsqueda de texto completo (FTS5) para productos
+"""
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from .db_bulk import SIN_CARGA_MASIVA
+from .db_textos import texto_sql
+
+
+# Mientras indexado_diferido tiene una fila, los triggers que reindexan un
+# producto por cada color o pieza que cambia no hacen nada: la aplicación lo
+# reindexa una sola vez al terminar de escribirlo (ver indexado_diferido).
+# Como carga_masiva, la fila solo existe dentro de la transacción que lo
+# escribe; las escrituras de otros programas siguen pasando por los triggers
+SQL_TABLA_INDEXADO_DIFERIDO = '''
+    CREATE TABLE IF NOT EXISTS indexado_diferido (id INTEGER PRIMARY KEY)
+'''
+
+SIN_INDEXADO_DIFERIDO = 'NOT EXISTS (SELECT 1 FROM indexado_diferido)'
+
+# Columnas indexadas y su peso en el ranking bm25
+COLUMNAS_INDICE = [
+    ('nombre', 10.0),
+    ('descripcion', 3.0),
+    ('material', 2.0),
+    ('color', 2.0),
+    ('colores', 4.0),
+    ('piezas', 3.0),
+    ('notas', 1.0),
+    ('guia', 1.0),
+]
+
+# Filas del índice; {filtro} restringe los productos a indexar. Los textos
+# largos pueden estar comprimidos (db_textos): {descripcion}, {notas} y
+# {guia} son las expresiones que los leen (ver filas_indice)
+SQL_FILAS_INDICE = '''
+    INSERT INTO productos_fts (
+        rowid, nombre, descripcion, material, color, colores, piezas, notas, guia
+    )
+    SELECT p.id, p.nombre, {descripcion}, p.material, p.color,
+           (SELECT group_concat(ce.color_hex || ' ' || COALESCE(ce.nombre_color, ''), ' ')
+            FROM color_especificaciones ce WHERE ce.producto_id = p.id),
+           (SELECT group_concat(cp.nombre_pieza, ' ')
+            FROM color_piezas cp
+            JOIN color_especificaciones ce ON ce.id = cp.color_especificacion_id
+            WHERE ce.producto_id = p.id),
+           (SELECT group_concat({notas}, ' ')
+            FROM color_especificaciones ce WHERE ce.producto_id = p.id),
+           {guia}
+    FROM productos p
+    {filtro};
+'''
+
+# Filas del índice en memoria (utils.text_index.IndiceInvertido): nombre,
+# descripción, material, colores y piezas; {filtro} restringe los productos
+SQL_FILAS_MEMORIA = '''
+    SELECT p.id, p.nombre, texto_plano(p.descripcion), p.material, p.color,
+           (SELECT group_concat(ce.color_hex, ',')
+            FROM color_especificaciones ce WHERE ce.producto_id = p.id),
+           (SELECT group_concat(ce.nombre_color, ' ')
+            FROM color_especificaciones ce WHERE ce.producto_id = p.id),
+           (SELECT group_concat(cp.nombre_pieza, ' ')
+            FROM color_piezas cp
+            JOIN color_especificaciones ce ON ce.id = cp.color_especificacion_id
+            WHERE ce.producto_id = p.id)
+    FROM productos p
+    {filtro}
+'''
+
+# Colores de cada producto para los bitmaps en memoria (utils.bitmap_index)
+SQL_COLORES_MEMORIA = '''
+    SELECT p.id,
+           (SELECT group_concat(ce.color_hex, ',')
+            FROM color_especificaciones ce WHERE ce.producto_id = p.id)
+    FROM productos p
+    {filtro}
+'''
+
+
+def _texto_plano(columna: str) -> str:
+    return f'texto_plano({columna})'
+
+
+def filas_indice(filtro: str, leer_texto: Callable[[str], str] = _texto_plano) -> str:
+    """
+    SQL para indexar los productos que cumplen ``filtro``
+
+    Las consultas de la aplicación leen los textos con texto_plano(); los
+    triggers, con db_textos.texto_sql, que no necesita funciones propias.
+    """
+    return SQL_FILAS_INDICE.format(filtro=filtro, descripcion=leer_texto('p.descripcion'),
+                                   notas=leer_texto('ce.notas'), guia=leer_texto('p.guia_impresion'))
+
+
+def _indexar(producto_id: str) -> str:
+    """SQL para indexar un producto dentro de un trigger; producto_id es una expresión SQL"""
+    return filas_indice(f'WHERE p.id = {producto_id}', texto_sql)
+
+
+def _desindexar(producto_id: str) -> str:
+    """SQL para quitar un producto del índice"""
+    return f'DELETE FROM productos_fts WHERE rowid = {producto_id};'
+
+
+def _reindexar(producto_id: str) -> str:
+    """SQL para volver a indexar un producto dentro de un trigger"""
+    return _desindexar(producto_id) + _indexar(producto_id)
+
+
+PIEZA_NUEVA = '(SELECT producto_id FROM color_especificaciones WHERE id = NEW.color_especificacion_id)'
+PIEZA_VIEJA = '(SELECT producto_id FROM color_especificaciones WHERE id = OLD.color_especificacion_id)'
+
+# Triggers que mantienen el índice sincronizado con las tres tablas
+TRIGGERS = {
+    'trg_fts_producto_insert': f'''
+        AFTER INSERT ON productos WHEN {SIN_CARGA_MASIVA} AND {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_indexar('NEW.id')}
+        END''',
+    # Solo las columnas indexadas: el UPDATE de peso_total y tiempo_total
+    # (db_totales) no reindexa el producto
+    'trg_fts_producto_update': f'''
+        AFTER UPDATE OF nombre, descripcion, material, color, guia_impresion ON productos
+        WHEN {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_desindexar('OLD.id')}
+            {_indexar('NEW.id')}
+        END''',
+    'trg_fts_producto_delete': f'''
+        AFTER DELETE ON productos BEGIN
+            {_desindexar('OLD.id')}
+        END''',
+    'trg_fts_color_insert': f'''
+        AFTER INSERT ON color_especificaciones WHEN {SIN_CARGA_MASIVA} AND {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_reindexar('NEW.producto_id')}
+        END''',
+    'trg_fts_color_update': f'''
+        AFTER UPDATE ON color_especificaciones WHEN {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_reindexar('OLD.producto_id')}
+            {_reindexar('NEW.producto_id')}
+        END''',
+    'trg_fts_color_delete': f'''
+        AFTER DELETE ON color_especificaciones WHEN {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_reindexar('OLD.producto_id')}
+        END''',
+    'trg_fts_pieza_insert': f'''
+        AFTER INSERT ON color_piezas WHEN {SIN_CARGA_MASIVA} AND {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_reindexar(PIEZA_NUEVA)}
+        END''',
+    'trg_fts_pieza_update': f'''
+        AFTER UPDATE ON color_piezas WHEN {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_reindexar(PIEZA_VIEJA)}
+            {_reindexar(PIEZA_NUEVA)}
+        END''',
+    'trg_fts_pieza_delete': f'''
+        AFTER DELETE ON color_piezas WHEN {SIN_INDEXADO_DIFERIDO} BEGIN
+            {_reindexar(PIEZA_VIEJA)}
+        END''',
+}
+
+
+class SearchIndex:
+    """Índice FTS5 de productos, colores, piezas, notas y guías"""
+
+    def __init__(self):
+        self._disponible: Optional[bool] = None
+
+    def disponible(self, conn: sqlite3.Connection) -> bool:
+        """Verificar si SQLite fue compilado con FTS5"""
+        if self._disponible is None:
+            try:
+                conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_prueba USING fts5(texto)')
+                conn.execute('DROP TABLE temp.fts5_prueba')
+                self._disponible = True
+            except sqlite3.OperationalError:
+                self._disponible = False
+        return self._disponible
+
+    def crear(self, conn: sqlite3.Connection) -> bool:
+        """
+        Crear la tabla virtual y sus triggers si no existen
+
+        Returns:
+            True si el índice está disponible
+        """
+        if not self.disponible(conn):
+            return False
+
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+        )
+        existia = cursor.fetchone() is not None
+
+        columnas = ', '.join(nombre for nombre, _ in COLUMNAS_INDICE)
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                {columnas},
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+
+        cursor.execute(SQL_TABLA_INDEXADO_DIFERIDO)
+        self.crear_triggers(conn)
+
+        if not existia:
+            self.reconstruir(conn)
+        return True
+
+    def reconstruir(self, conn: sqlite3.Connection):
+        """Volver a indexar todos los productos"""
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM productos_fts')
+        cursor.execute(filas_indice(''))
+
+    def crear_triggers(self, conn: sqlite3.Connection):
+        """Crear los triggers que falten"""
+        cursor = conn.cursor()
+        for nombre, cuerpo in TRIGGERS.items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}')
+
+    def indexar_rango(self, conn: sqlite3.Connection, desde_id: int, hasta_id: int):
+        """Indexar los productos con ID entre desde_id y hasta_id (nuevos, de una carga masiva)"""
+        conn.execute(filas_indice('WHERE p.id BETWEEN ? AND ?'), (desde_id, hasta_id))
+
+    def reindexar_rango(self, conn: sqlite3.Connection, desde_id: int, hasta_id: int):
+        """Volver a indexar productos ya indexados (los que ya no existen solo se quitan)"""
+        conn.execute('DELETE FROM productos_fts WHERE rowid BETWEEN ? AND ?', (desde_id, hasta_id))
+        self.indexar_rango(conn, desde_id, hasta_id)
+
+    @contextmanager
+    def indexado_diferido(self, conn: sqlite3.Connection):
+        """
+        Reindexar cada producto escrito una sola vez, al final del bloque
+
+        Da un conjunto donde el bloque agrega los IDs de los productos que
+        escribe. Sin esto cada color y cada pieza escritos vuelven a indexar
+        el producto entero. El reindexado final lee además los textos
+        comprimidos, que los triggers indexan como vacíos (ver texto_sql).
+        Si el bloque falla, la transacción se revierte junto con la fila.
+        """
+        productos = set()
+        if not self.disponible(conn):
+            yield productos
+            return
+
+        conn.execute('INSERT INTO indexado_diferido DEFAULT VALUES')
+        yield productos
+        conn.execute('DELETE FROM indexado_diferido')
+        for producto_id in productos:
+            self.reindexar_rango(conn, producto_id, producto_id)
+
+    @staticmethod
+    def construir_consulta(termino: str) -> Optional[str]:
+        """
+        Convertir el texto del usuario en una consulta MATCH de prefijos
+
+        "soporte pet" -> '"soporte"* "pet"*' (todas las palabras, por prefijo)
+        """
+        palabras = re.findall(r'\w+', termino.lower())
+        if not palabras:
+            return None
+        return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+    def buscar_ids(self, conn: sqlite3.Connection, termino: str, limite: int,
+                   condicion: str = "", parametros: tuple = ()) -> List[int]:
+        """
+        Buscar IDs de productos ordenados por relevancia (bm25)
+
+        Args:
+            condicion: Filtro SQL adicional sobre ``rowid`` (el ID del producto)
+            parametros: Parámetros de la condición
+        """
+        consulta = self.construir_consulta(termino)
+        if not consulta:
+            return []
+        return self.buscar_ids_consulta(conn, consulta, limite, condicion, parametros)
+
+    def buscar_ids_consulta(self, conn: sqlite3.Connection, consulta: str, limite: int,
+                            condicion: str = "", parametros: tuple = ()) -> List[int]:
+        """Como buscar_ids, con una consulta MATCH ya armada (p. ej. la de db_trigramas)"""
+        pesos = ', '.join(str(peso) for _, peso in COLUMNAS_INDICE)
+        filtro = f"AND {condicion}" if condicion else ""
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT rowid FROM productos_fts
+            WHERE productos_fts MATCH ? {filtro}
+            ORDER BY bm25(productos_fts, {pesos})
+            LIMIT ?
+        ''', (consulta,) + tuple(parametros) + (limite,))
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,367 @@
+"""
+Estadísticas del catálogo mantenidas por triggers
+"""
+
+import sqlite3
+import sys
+from typing import Any, Dict, List
+
+from .db_bulk import SIN_CARGA_MASIVA
+
+
+# Fila única con los totales del catálogo
+SQL_TABLAS = [
+    '''
+    CREATE TABLE IF NOT EXISTS estadisticas (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_productos INTEGER NOT NULL DEFAULT 0,
+        suma_tiempo INTEGER NOT NULL DEFAULT 0,
+        productos_con_tiempo INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    # Productos por material
+    '''
+    CREATE TABLE IF NOT EXISTS estadisticas_material (
+        material TEXT PRIMARY KEY,
+        productos INTEGER NOT NULL
+    )
+    ''',
+    # Especificaciones que usan cada color (contador de referencias)
+    '''
+    CREATE TABLE IF NOT EXISTS estadisticas_color (
+        color_hex TEXT PRIMARY KEY,
+        referencias INTEGER NOT NULL
+    )
+    ''',
+    # Histograma: cuántos productos tienen N especificaciones de color
+    '''
+    CREATE TABLE IF NOT EXISTS estadisticas_colores_producto (
+        colores INTEGER PRIMARY KEY,
+        productos INTEGER NOT NULL
+    )
+    ''',
+]
+
+
+def _sumar(tabla: str, clave: str, valor: str, columna: str, delta: int) -> str:
+    """SQL para sumar ``delta`` al contador de una clave, borrándola al llegar a cero"""
+    return f'''
+        INSERT INTO {tabla} ({clave}, {columna}) VALUES ({valor}, {delta})
+            ON CONFLICT ({clave}) DO UPDATE SET {columna} = {columna} + {delta};
+        DELETE FROM {tabla} WHERE {clave} IS {valor} AND {columna} <= 0;'''
+
+
+def _material(valor: str, delta: int) -> str:
+    return _sumar('estadisticas_material', 'material', f"COALESCE({valor}, '')", 'productos', delta)
+
+
+def _color(valor: str, delta: int) -> str:
+    return _sumar('estadisticas_color', 'color_hex', valor, 'referencias', delta)
+
+
+def _colores_de(producto_id: str) -> str:
+    return f'(SELECT COUNT(*) FROM color_especificaciones WHERE producto_id = {producto_id})'
+
+
+def _mover_histograma(desde: str, hasta: str) -> str:
+    """SQL para pasar un producto de un cubo del histograma a otro"""
+    return (_sumar('estadisticas_colores_producto', 'colores', desde, 'productos', -1)
+            + _sumar('estadisticas_colores_producto', 'colores', hasta, 'productos', 1))
+
+
+def _totales(producto: str, signo: str) -> str:
+    return f'''
+        UPDATE estadisticas SET
+            total_productos = total_productos {signo} 1,
+            suma_tiempo = suma_tiempo {signo} COALESCE({producto}.tiempo_impresion, 0),
+            productos_con_tiempo = productos_con_tiempo {signo} ({producto}.tiempo_impresion IS NOT NULL)
+        WHERE id = 1;'''
+
+
+def _existe_producto(producto_id: str) -> str:
+    return f'EXISTS (SELECT 1 FROM productos WHERE id = {producto_id})'
+
+
+# El borrado de un producto usa BEFORE: con ON DELETE CASCADE, SQLite borra
+# las especificaciones antes de los triggers AFTER del producto, y estas ya no
+# ven a su producto. Por eso los triggers de especificaciones solo mueven el
+# histograma si el producto existe, y el producto sale de su cubo antes.
+TRIGGERS = {
+    'trg_stats_producto_insert': f'''
+        AFTER INSERT ON productos WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_totales('NEW', '+')}
+            {_material('NEW.material', 1)}
+            {_sumar('estadisticas_colores_producto', 'colores', _colores_de('NEW.id'), 'productos', 1)}
+        END''',
+    'trg_stats_producto_delete': f'''
+        BEFORE DELETE ON productos BEGIN
+            {_totales('OLD', '-')}
+            {_material('OLD.material', -1)}
+            {_sumar('estadisticas_colores_producto', 'colores', _colores_de('OLD.id'), 'productos', -1)}
+        END''',
+    'trg_stats_producto_update': f'''
+        AFTER UPDATE OF material, tiempo_impresion ON productos BEGIN
+            {_totales('OLD', '-')}
+            {_totales('NEW', '+')}
+            {_material('OLD.material', -1)}
+            {_material('NEW.material', 1)}
+        END''',
+    'trg_stats_color_insert': f'''
+        AFTER INSERT ON color_especificaciones WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_color('NEW.color_hex', 1)}
+        END''',
+    'trg_stats_color_insert_histograma': f'''
+        AFTER INSERT ON color_especificaciones
+        WHEN {SIN_CARGA_MASIVA} AND {_existe_producto('NEW.producto_id')} BEGIN
+            {_mover_histograma(_colores_de('NEW.producto_id') + ' - 1', _colores_de('NEW.producto_id'))}
+        END''',
+    'trg_stats_color_delete': f'''
+        AFTER DELETE ON color_especificaciones BEGIN
+            {_color('OLD.color_hex', -1)}
+        END''',
+    'trg_stats_color_delete_histograma': f'''
+        AFTER DELETE ON color_especificaciones
+        WHEN {_existe_producto('OLD.producto_id')} BEGIN
+            {_mover_histograma(_colores_de('OLD.producto_id') + ' + 1', _colores_de('OLD.producto_id'))}
+        END''',
+    'trg_stats_color_update': f'''
+        AFTER UPDATE OF color_hex ON color_especificaciones BEGIN
+            {_color('OLD.color_hex', -1)}
+            {_color('NEW.color_hex', 1)}
+        END''',
+    'trg_stats_color_update_producto_viejo': f'''
+        AFTER UPDATE OF producto_id ON color_especificaciones
+        WHEN OLD.producto_id IS NOT NEW.producto_id AND {_existe_producto('OLD.producto_id')} BEGIN
+            {_mover_histograma(_colores_de('OLD.producto_id') + ' + 1', _colores_de('OLD.producto_id'))}
+        END''',
+    'trg_stats_color_update_producto_nuevo': f'''
+        AFTER UPDATE OF producto_id ON color_especificaciones
+        WHEN OLD.producto_id IS NOT NEW.producto_id AND {_existe_producto('NEW.producto_id')} BEGIN
+            {_mover_histograma(_colores_de('NEW.producto_id') + ' - 1', _colores_de('NEW.producto_id'))}
+        END''',
+}
+
+
+class CatalogStats:
+    """Estadísticas del catálogo leídas en O(1) desde tablas mantenidas por triggers"""
+
+    def crear(self, conn: sqlite3.Connection):
+        """Crear las tablas y los triggers si no existen"""
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'estadisticas'"
+        )
+        existia = cursor.fetchone() is not None
+
+        for sql in SQL_TABLAS:
+            cursor.execute(sql)
+        self.crear_triggers(conn)
+
+        if not existia:
+            self.reconstruir(conn)
+
+    def reconstruir(self, conn: sqlite3.Connection):
+        """Recalcular todas las tablas de estadísticas desde cero"""
+        cursor = conn.cursor()
+        for tabla in ('estadisticas', 'estadisticas_material',
+                      'estadisticas_color', 'estadisticas_colores_producto'):
+            cursor.execute(f'DELETE FROM {tabla}')
+
+        cursor.execute('''
+            INSERT INTO estadisticas (id, total_productos, suma_tiempo, productos_con_tiempo)
+            SELECT 1, COUNT(*), COALESCE(SUM(tiempo_impresion), 0), COUNT(tiempo_impresion)
+            FROM productos
+        ''')
+        cursor.execute('''
+            INSERT INTO estadisticas_material (material, productos)
+            SELECT COALESCE(material, ''), COUNT(*) FROM productos
+            GROUP BY COALESCE(material, '')
+        ''')
+        cursor.execute('''
+            INSERT INTO estadisticas_color (color_hex, referencias)
+            SELECT color_hex, COUNT(*) FROM color_especificaciones
+            GROUP BY color_hex
+        ''')
+        cursor.execute(f'''
+            INSERT INTO estadisticas_colores_producto (colores, productos)
+            SELECT colores, COUNT(*) FROM (
+                SELECT {_colores_de('p.id')} AS colores FROM productos p
+            )
+            GROUP BY colores
+        ''')
+
+    def crear_triggers(self, conn: sqlite3.Connection):
+        """Crear los triggers que falten"""
+        cursor = conn.cursor()
+        for nombre, cuerpo in TRIGGERS.items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}')
+
+    def sumar_rango(self, conn: sqlite3.Connection, desde_id: int, hasta_id: int):
+        """Sumar a las estadísticas los productos nuevos con ID en el rango (cargas masivas)"""
+        rango = (desde_id, hasta_id)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(tiempo_impresion), 0), COUNT(tiempo_impresion)
+            FROM productos WHERE id BETWEEN ? AND ?
+        ''', rango)
+        cursor.execute('''
+            UPDATE estadisticas SET
+                total_productos = total_productos + ?,
+                suma_tiempo = suma_tiempo + ?,
+                productos_con_tiempo = productos_con_tiempo + ?
+            WHERE id = 1
+        ''', cursor.fetchone())
+        cursor.execute('''
+            INSERT INTO estadisticas_material (material, productos)
+            SELECT COALESCE(material, ''), COUNT(*) FROM productos
+            WHERE id BETWEEN ? AND ?
+            GROUP BY COALESCE(material, '')
+            ON CONFLICT (material) DO UPDATE SET productos = productos + excluded.productos
+        ''', rango)
+        cursor.execute('''
+            INSERT INTO estadisticas_color (color_hex, referencias)
+            SELECT color_hex, COUNT(*) FROM color_especificaciones
+            WHERE producto_id BETWEEN ? AND ?
+            GROUP BY color_hex
+            ON CONFLICT (color_hex) DO UPDATE SET referencias = referencias + excluded.referencias
+        ''', rango)
+        cursor.execute(f'''
+            INSERT INTO estadisticas_colores_producto (colores, productos)
+            SELECT colores, COUNT(*) FROM (
+                SELECT {_colores_de('p.id')} AS colores FROM productos p
+                WHERE p.id BETWEEN ? AND ?
+            )
+            GROUP BY colores
+            ON CONFLICT (colores) DO UPDATE SET productos = productos + excluded.productos
+        ''', rango)
+
+    def total_productos(self, conn: sqlite3.Connection) -> int:
+        """Cantidad de productos según los totales mantenidos (sin contar la tabla)"""
+        fila = conn.execute('SELECT total_productos FROM estadisticas WHERE id = 1').fetchone()
+        return fila[0] if fila else 0
+
+    def leer(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Leer las estadísticas mantenidas"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT total_productos, suma_tiempo, productos_con_tiempo
+            FROM estadisticas WHERE id = 1
+        ''')
+        total_productos, suma_tiempo, productos_con_tiempo = cursor.fetchone() or (0, 0, 0)
+
+        cursor.execute('SELECT material, productos FROM estadisticas_material')
+        productos_por_material = dict(cursor.fetchall())
+
+        cursor.execute('SELECT COUNT(*) FROM estadisticas_color')
+        total_colores = cursor.fetchone()[0]
+
+        cursor.execute('SELECT colores, productos FROM estadisticas_colores_producto ORDER BY colores')
+        histograma = dict(cursor.fetchall())
+
+        return self._armar(total_productos, suma_tiempo, productos_con_tiempo,
+                           productos_por_material, total_colores, histograma)
+
+    def calcular(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Calcular las estadísticas desde cero (recorre las tablas completas)"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(tiempo_impresion), 0), COUNT(tiempo_impresion)
+            FROM productos
+        ''')
+        total_productos, suma_tiempo, productos_con_tiempo = cursor.fetchone()
+
+        cursor.execute('''
+            SELECT COALESCE(material, ''), COUNT(*) FROM productos
+            GROUP BY COALESCE(material, '')
+        ''')
+        productos_por_material = dict(cursor.fetchall())
+
+        cursor.execute('SELECT COUNT(DISTINCT color_hex) FROM color_especificaciones')
+        total_colores = cursor.fetchone()[0]
+
+        cursor.execute(f'''
+            SELECT colores, COUNT(*) FROM (
+                SELECT {_colores_de('p.id')} AS colores FROM productos p
+            )
+            GROUP BY colores ORDER BY colores
+        ''')
+        histograma = dict(cursor.fetchall())
+
+        return self._armar(total_productos, suma_tiempo, productos_con_tiempo,
+                           productos_por_material, total_colores, histograma)
+
+    def verificar(self, conn: sqlite3.Connection) -> List[str]:
+        """
+        Comparar las estadísticas mantenidas con un cálculo desde cero
+
+        Returns:
+            Lista de diferencias encontradas (vacía si coinciden)
+        """
+        mantenidas = self.leer(conn)
+        calculadas = self.calcular(conn)
+        return [
+            f"{clave}: mantenido={mantenidas[clave]!r} calculado={calculadas[clave]!r}"
+            for clave in calculadas
+            if mantenidas[clave] != calculadas[clave]
+        ]
+
+    @staticmethod
+    def _armar(total_productos: int, suma_tiempo: int, productos_con_tiempo: int,
+               productos_por_material: Dict[str, int], total_colores: int,
+               histograma: Dict[int, int]) -> Dict[str, Any]:
+        """Armar el diccionario que devuelve DatabaseManager.obtener_estadisticas"""
+        tiempo_promedio = suma_tiempo / productos_con_tiempo if productos_con_tiempo else 0
+
+        # Promedio entre los productos que tienen al menos un color
+        con_colores = {colores: productos for colores, productos in histograma.items() if colores > 0}
+        productos_con_colores = sum(con_colores.values())
+        promedio_colores = (
+            sum(colores * productos for colores, productos in con_colores.items()) / productos_con_colores
+            if productos_con_colores else 0
+        )
+
+        return {
+            'total_productos': total_productos,
+            'productos_por_material': productos_por_material,
+            'tiempo_promedio_impresion': round(tiempo_promedio, 2),
+            'total_colores': total_colores,
+            'promedio_colores_por_producto': round(promedio_colores, 1),
+            'productos_por_cantidad_colores': histograma
+        }
+
+
+def verificar_estadisticas(db_path: str = "data/productos.db", reparar: bool = False) -> bool:
+    """
+    Verificar las estadísticas de una base de datos y, opcionalmente, repararlas
+
+    Returns:
+        True si no había diferencias
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        stats = CatalogStats()
+        diferencias = stats.verificar(conn)
+
+        if not diferencias:
+            print("✅ Las estadísticas coinciden con los datos")
+            return True
+
+        print(f"⚠️  {len(diferencias)} diferencia(s) en las estadísticas:")
+        for diferencia in diferencias:
+            print(f"   - {diferencia}")
+
+        if reparar:
+            with conn:
+                stats.reconstruir(conn)
+            print("🔧 Estadísticas recalculadas desde cero")
+        return False
+    finally:
+        conn.close()
+
+
+# python -m database.db_stats [ruta.db] [--reparar]
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    ok = verificar_estadisticas(*argumentos[:1], reparar='--reparar' in sys.argv)
+    sys.exit(0 if ok else 1)
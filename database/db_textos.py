@@ -0,0 +1,103 @@
+"""
+Textos largos de productos: compresión opcional y lectura diferida
+
+La compresión (DatabaseConfig.text_compression) viene desactivada. Achica
+las filas de productos, así que los recorridos de la tabla leen menos
+páginas, pero no ahorra disco: el índice FTS5 guarda su propia copia de
+los textos sin comprimir. Y los BLOB comprimidos solo los entiende esta
+aplicación; el CLI de sqlite3, los visores de bases y las versiones
+anteriores de la app ven bytes en lugar del texto.
+"""
+
+import sqlite3
+import zlib
+from typing import Dict, Optional
+
+# Columnas de texto largo de productos que no se leen al cargar listas: el
+# Producto las pide con cargar_textos la primera vez que se usan
+CAMPOS_TEXTO_PRODUCTO = ('descripcion', 'guia_impresion')
+
+# Columnas que pueden guardarse comprimidas (con comprimir_texto)
+CAMPOS_COMPRIMIBLES = CAMPOS_TEXTO_PRODUCTO + ('notas',)
+
+NIVEL_ZLIB = 6
+
+
+def texto_plano(valor):
+    """
+    Texto de una columna comprimible, tal como se escribió
+
+    Un BLOB en estas columnas es UTF-8 comprimido con zlib; un TEXT se
+    devuelve sin cambios (filas cortas o anteriores a la compresión).
+    """
+    if isinstance(valor, bytes):
+        return zlib.decompress(valor).decode('utf-8')
+    return valor
+
+
+def crear_compresor(minimo_bytes: int):
+    """
+    Función comprimir_texto para una conexión
+
+    Comprime los textos de al menos ``minimo_bytes`` bytes (0 desactiva la
+    compresión) y solo si el resultado es más chico.
+    """
+    def comprimir_texto(valor):
+        if not minimo_bytes or not isinstance(valor, str):
+            return valor
+        datos = valor.encode('utf-8')
+        if len(datos) < minimo_bytes:
+            return valor
+        comprimido = zlib.compress(datos, NIVEL_ZLIB)
+        return comprimido if len(comprimido) < len(datos) else valor
+
+    return comprimir_texto
+
+
+def registrar_funciones(conn: sqlite3.Connection, minimo_bytes: int):
+    """
+    Registrar texto_plano() y comprimir_texto() en una conexión
+
+    Las usan las consultas de la aplicación (ConnectionManager las registra
+    al abrir cada conexión). Los triggers no: también se disparan en
+    conexiones de otros programas, que no las tienen (ver texto_sql).
+    """
+    conn.create_function('texto_plano', 1, texto_plano, deterministic=True)
+    conn.create_function('comprimir_texto', 1, crear_compresor(minimo_bytes), deterministic=True)
+
+
+def texto_sql(columna: str) -> str:
+    """
+    Expresión de una columna comprimible que solo usa funciones de SQLite
+
+    Para los triggers: un BLOB comprimido se lee como NULL, y la aplicación
+    vuelve a indexar el producto después de escribirlo comprimido.
+    """
+    return f"CASE WHEN typeof({columna}) = 'blob' THEN NULL ELSE {columna} END"
+
+
+def marcador(campo: str) -> str:
+    """Marcador de parámetro para escribir un campo (comprimido si corresponde)"""
+    return 'comprimir_texto(?)' if campo in CAMPOS_COMPRIMIBLES else '?'
+
+
+def leer(campo: str, alias: str = '') -> str:
+    """Expresión SELECT de un campo (descomprimido si corresponde)"""
+    columna = f'{alias}.{campo}' if alias else campo
+    return f'texto_plano({columna})' if campo in CAMPOS_COMPRIMIBLES else columna
+
+
+def cargar_textos(conn: sqlite3.Connection, producto_id: int) -> Optional[Dict[str, str]]:
+    """
+    Textos largos de un producto, para Producto.diferir_textos
+
+    Returns:
+        {campo: texto} o None si el producto ya no existe
+    """
+    fila = conn.execute(
+        f"SELECT {', '.join(leer(campo) for campo in CAMPOS_TEXTO_PRODUCTO)} FROM productos WHERE id = ?",
+        (producto_id,)
+    ).fetchone()
+    if fila is None:
+        return None
+    return {campo: valor or "" for campo, valor in zip(CAMPOS_TEXTO_PRODUCTO, fila)}
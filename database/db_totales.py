@@ -0,0 +1,154 @@
+"""
+Peso y tiempo totales por producto, calculados en SQL y mantenidos por triggers
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+from .db_bulk import SIN_CARGA_MASIVA, SQL_TABLA_CARGA_MASIVA
+
+# Peso de una especificación: la suma de sus piezas o, si no suman nada,
+# su peso_color (ColorEspecificacion.get_peso_calculado)
+SQL_PESO_COLOR = '''(
+    SELECT CASE WHEN SUM(cp.peso_pieza) > 0 THEN SUM(cp.peso_pieza)
+                ELSE COALESCE(ce.peso_color, 0) END
+    FROM color_piezas cp WHERE cp.color_especificacion_id = ce.id
+)'''
+
+# Producto.get_peso_total: la suma por color o, si no suma nada, el peso del producto
+SQL_PESO_TOTAL = f'''COALESCE((
+    SELECT CASE WHEN SUM({SQL_PESO_COLOR}) > 0 THEN SUM({SQL_PESO_COLOR}) END
+    FROM color_especificaciones ce WHERE ce.producto_id = productos.id
+), productos.peso, 0)'''
+
+# Producto.get_tiempo_total: el tiempo de las piezas (o el del producto si no
+# suman nada) más el tiempo adicional de cada color
+SQL_TIEMPO_TOTAL = '''COALESCE((
+    SELECT CASE WHEN SUM(cp.tiempo_impresion_pieza) > 0 THEN SUM(cp.tiempo_impresion_pieza) END
+    FROM color_especificaciones ce
+    JOIN color_piezas cp ON cp.color_especificacion_id = ce.id
+    WHERE ce.producto_id = productos.id
+), productos.tiempo_impresion, 0) + COALESCE((
+    SELECT SUM(ce.tiempo_adicional) FROM color_especificaciones ce
+    WHERE ce.producto_id = productos.id
+), 0)'''
+
+SQL_RECALCULAR = f'''
+    UPDATE productos SET peso_total = {SQL_PESO_TOTAL}, tiempo_total = {SQL_TIEMPO_TOTAL}
+    WHERE {{filtro}}'''
+
+
+def _recalcular(producto_id: str) -> str:
+    return SQL_RECALCULAR.format(filtro=f'id = {producto_id}') + ';'
+
+
+def _recalcular_pieza(especificacion_id: str) -> str:
+    return SQL_RECALCULAR.format(
+        filtro=f'id = (SELECT producto_id FROM color_especificaciones WHERE id = {especificacion_id})'
+    ) + ';'
+
+
+# Solo se disparan con las columnas que entran en los totales; el UPDATE de
+# peso_total y tiempo_total no vuelve a disparar ninguno
+TRIGGERS = {
+    'trg_totales_producto_insert': f'''
+        AFTER INSERT ON productos WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_recalcular('NEW.id')}
+        END''',
+    'trg_totales_producto_update': f'''
+        AFTER UPDATE OF peso, tiempo_impresion ON productos BEGIN
+            {_recalcular('NEW.id')}
+        END''',
+    'trg_totales_color_insert': f'''
+        AFTER INSERT ON color_especificaciones WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_recalcular('NEW.producto_id')}
+        END''',
+    'trg_totales_color_update': f'''
+        AFTER UPDATE OF peso_color, tiempo_adicional, producto_id ON color_especificaciones BEGIN
+            {_recalcular('NEW.producto_id')}
+        END''',
+    'trg_totales_color_update_producto_viejo': f'''
+        AFTER UPDATE OF producto_id ON color_especificaciones
+        WHEN OLD.producto_id IS NOT NEW.producto_id BEGIN
+            {_recalcular('OLD.producto_id')}
+        END''',
+    'trg_totales_color_delete': f'''
+        AFTER DELETE ON color_especificaciones BEGIN
+            {_recalcular('OLD.producto_id')}
+        END''',
+    'trg_totales_pieza_insert': f'''
+        AFTER INSERT ON color_piezas WHEN {SIN_CARGA_MASIVA} BEGIN
+            {_recalcular_pieza('NEW.color_especificacion_id')}
+        END''',
+    'trg_totales_pieza_update': f'''
+        AFTER UPDATE OF peso_pieza, tiempo_impresion_pieza, color_especificacion_id ON color_piezas BEGIN
+            {_recalcular_pieza('NEW.color_especificacion_id')}
+        END''',
+    'trg_totales_pieza_update_color_viejo': f'''
+        AFTER UPDATE OF color_especificacion_id ON color_piezas
+        WHEN OLD.color_especificacion_id IS NOT NEW.color_especificacion_id BEGIN
+            {_recalcular_pieza('OLD.color_especificacion_id')}
+        END''',
+    'trg_totales_pieza_delete': f'''
+        AFTER DELETE ON color_piezas BEGIN
+            {_recalcular_pieza('OLD.color_especificacion_id')}
+        END''',
+}
+
+
+class TotalesProductos:
+    """
+    Columnas ``peso_total`` y ``tiempo_total`` de productos
+
+    Guardan lo mismo que Producto.get_peso_total y get_tiempo_total, pero
+    en la fila del producto: la lista las lee sin cargar colores ni piezas,
+    y se puede ordenar y filtrar por ellas con idx_peso_total e
+    idx_tiempo_total. Una columna generada no puede leer otras tablas, por
+    eso las mantienen triggers sobre las tres tablas.
+    """
+
+    def crear(self, conn: sqlite3.Connection):
+        """Crear las columnas, sus índices y los triggers, y calcular los totales"""
+        columnas = [columna[1] for columna in conn.execute('PRAGMA table_info(productos)')]
+        if 'peso_total' not in columnas:
+            conn.execute('ALTER TABLE productos ADD COLUMN peso_total REAL DEFAULT 0.0')
+        if 'tiempo_total' not in columnas:
+            conn.execute('ALTER TABLE productos ADD COLUMN tiempo_total INTEGER DEFAULT 0')
+
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_peso_total ON productos(peso_total)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tiempo_total ON productos(tiempo_total)')
+
+        # Los triggers de inserción leen la marca de carga masiva
+        conn.execute(SQL_TABLA_CARGA_MASIVA)
+        self.crear_triggers(conn)
+        self.reconstruir(conn)
+
+    def crear_triggers(self, conn: sqlite3.Connection):
+        """Crear los triggers que falten"""
+        for nombre, cuerpo in TRIGGERS.items():
+            conn.execute(f'CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}')
+
+    def recalcular_rango(self, conn: sqlite3.Connection, desde_id: int, hasta_id: int):
+        """Calcular los totales de los productos con ID en el rango"""
+        conn.execute(SQL_RECALCULAR.format(filtro='id BETWEEN ? AND ?'), (desde_id, hasta_id))
+
+    def reconstruir(self, conn: sqlite3.Connection):
+        """Calcular los totales de todos los productos"""
+        conn.execute(SQL_RECALCULAR.format(filtro='1'))
+
+    def verificar(self, conn: sqlite3.Connection) -> List[Tuple[int, float, int, float, int]]:
+        """
+        Comparar los totales guardados con un cálculo desde cero
+
+        Returns:
+            (id, peso guardado, tiempo guardado, peso calculado, tiempo calculado)
+            de los productos que no coinciden
+        """
+        return conn.execute(f'''
+            SELECT id, peso_total, tiempo_total, peso, tiempo FROM (
+                SELECT id, peso_total, tiempo_total,
+                       {SQL_PESO_TOTAL} AS peso, {SQL_TIEMPO_TOTAL} AS tiempo
+                FROM productos
+            )
+            WHERE peso_total IS NULL OR ABS(peso_total - peso) > 1e-6 OR tiempo_total IS NOT tiempo
+        ''').fetchall()
@@ -0,0 +1,149 @@
+"""
+Trigramas de las palabras de los nombres, para la búsqueda aproximada
+"""
+
+import sqlite3
+from typing import Iterable, List, Optional, Set, Tuple
+
+from utils.text_index import (
+    MAX_SIMILARES, UMBRAL_SIMILITUD, es_palabra_aproximable, tokenizar, trigramas
+)
+
+
+SQL_INSERTAR_TRIGRAMA = '''
+    INSERT OR IGNORE INTO trigramas_nombres (trigrama, palabra, cantidad) VALUES (?, ?, ?)
+'''
+
+
+def palabras_de(nombres: Iterable[Optional[str]]) -> Set[str]:
+    """Palabras normalizadas (sin tildes) de unos nombres que vale la pena corregir"""
+    return {
+        palabra for nombre in nombres for palabra in tokenizar(nombre)
+        if es_palabra_aproximable(palabra)
+    }
+
+
+def filas_trigramas(palabras: Iterable[str]) -> List[Tuple[str, str, int]]:
+    """(trigrama, palabra, trigramas de la palabra) de unas palabras normalizadas"""
+    filas = []
+    for palabra in palabras:
+        propios = trigramas(palabra)
+        filas.extend((trigrama, palabra, len(propios)) for trigrama in propios)
+    return filas
+
+
+class IndiceTrigramas:
+    """
+    Palabras de los nombres de productos y sus trigramas, en SQLite
+
+    ``trigramas_nombres`` es el índice trigrama -> palabra (normalizada,
+    sin tildes), con la cantidad de trigramas de la palabra en cada fila
+    para calcular la similitud sin otra tabla. Con él ``construir_consulta``
+    cambia cada palabra buscada
+    por las palabras parecidas y arma una consulta MATCH para el índice
+    FTS5, que es el que encuentra los productos. Es la misma similitud que
+    IndiceInvertido.buscar_aproximado usa en memoria.
+
+    No hay triggers: los trigramas se calculan en Python, y un trigger que
+    llamara a funciones de la aplicación haría fallar las escrituras de
+    otros programas. La aplicación llama a ``indexar_nombres`` al escribir
+    un nombre; los que escriban otros programas entran con ``sincronizar``
+    (lo hace el mantenimiento). Al escribir, las palabras solo se agregan:
+    una que ya no usa ningún producto no encuentra nada en el índice de
+    texto, y ``sincronizar`` la quita.
+    """
+
+    def crear(self, conn: sqlite3.Connection):
+        """Crear la tabla e indexar los nombres existentes"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS trigramas_nombres (
+                trigrama TEXT NOT NULL,
+                palabra TEXT NOT NULL,
+                cantidad INTEGER NOT NULL,  -- Trigramas de la palabra
+                PRIMARY KEY (trigrama, palabra)
+            ) WITHOUT ROWID
+        ''')
+        self.reconstruir(conn)
+
+    def indexar_nombres(self, conn: sqlite3.Connection, nombres: Iterable[Optional[str]]):
+        """Agregar las palabras de unos nombres recién escritos"""
+        conn.executemany(SQL_INSERTAR_TRIGRAMA, filas_trigramas(palabras_de(nombres)))
+
+    def reconstruir(self, conn: sqlite3.Connection):
+        """Volver a indexar todos los nombres desde cero"""
+        conn.execute('DELETE FROM trigramas_nombres')
+        conn.executemany(SQL_INSERTAR_TRIGRAMA, filas_trigramas(self._palabras_productos(conn)))
+
+    def sincronizar(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        """
+        Agregar las palabras que faltan y quitar las que ya nadie usa
+
+        Solo escribe las diferencias, así que es mucho más corto que
+        ``reconstruir`` cuando casi todo está al día.
+
+        Returns:
+            (palabras agregadas, palabras quitadas)
+        """
+        actuales = self._palabras_productos(conn)
+        indexadas = {fila[0] for fila in conn.execute('SELECT DISTINCT palabra FROM trigramas_nombres')}
+        nuevas, viejas = actuales - indexadas, indexadas - actuales
+        conn.executemany('DELETE FROM trigramas_nombres WHERE trigrama = ? AND palabra = ?',
+                         [(trigrama, palabra) for trigrama, palabra, _ in filas_trigramas(viejas)])
+        conn.executemany(SQL_INSERTAR_TRIGRAMA, filas_trigramas(nuevas))
+        return len(nuevas), len(viejas)
+
+    @staticmethod
+    def _palabras_productos(conn: sqlite3.Connection) -> Set[str]:
+        return palabras_de(fila[0] for fila in conn.execute('SELECT DISTINCT nombre FROM productos'))
+
+    def palabras_similares(self, conn: sqlite3.Connection, palabra: str,
+                           umbral: float = UMBRAL_SIMILITUD,
+                           limite: int = MAX_SIMILARES) -> List[Tuple[str, float]]:
+        """
+        Palabras de los nombres parecidas a una palabra normalizada
+
+        Returns:
+            (palabra, similitud) con similitud >= umbral, de mayor a menor
+        """
+        if not es_palabra_aproximable(palabra):
+            return []
+
+        # Con similitud >= umbral hay al menos umbral * len(buscados) en común
+        buscados = sorted(trigramas(palabra))
+        return conn.execute(f'''
+            SELECT palabra, comunes * 1.0 / (? + cantidad - comunes) AS similitud
+            FROM (
+                SELECT palabra, cantidad, COUNT(*) AS comunes
+                FROM trigramas_nombres
+                WHERE trigrama IN ({', '.join('?' * len(buscados))})
+                GROUP BY palabra
+                HAVING comunes >= ?
+            )
+            WHERE similitud >= ?
+            ORDER BY similitud DESC, palabra
+            LIMIT ?
+        ''', (len(buscados), *buscados, umbral * len(buscados), umbral, limite)).fetchall()
+
+    def construir_consulta(self, conn: sqlite3.Connection, termino: str,
+                           umbral: float = UMBRAL_SIMILITUD) -> Optional[str]:
+        """
+        Consulta MATCH de FTS5 con las palabras parecidas a las buscadas
+
+        "sopote rojo" -> '("sopote"* OR "soporte") AND ("rojo"*)':
+        cada palabra vale también como prefijo, igual que en la búsqueda
+        exacta. Los números no se corrigen.
+
+        Returns:
+            None si ninguna palabra se parece a otra conocida (la consulta
+            sería la misma que la exacta)
+        """
+        grupos = []
+        corregidas = False
+        for palabra in dict.fromkeys(tokenizar(termino)):
+            alternativas = [f'"{palabra}"*']
+            for similar, _ in self.palabras_similares(conn, palabra, umbral):
+                if similar != palabra:
+                    alternativas.append(f'"{similar}"')
+                    corregidas = True
+            grupos.append(f"({' OR '.join(alternativas)})")
+        return ' AND '.join(grupos) if corregidas else None
@@ -0,0 +1,135 @@
+"""
+Hilo dedicado para ejecutar operaciones de base de datos fuera de la interfaz
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+# Marca para detener el hilo
+_DETENER = object()
+
+
+class DatabaseWorker:
+    """
+    Ejecuta funciones en un único hilo de base de datos, en orden de llegada
+
+    Cada solicitud devuelve un ``Future``. Las solicitudes con la misma
+    ``clave`` se reemplazan entre sí: al llegar una nueva, las anteriores
+    que siguen en cola se cancelan y las que ya se están ejecutando quedan
+    marcadas como obsoletas (``es_vigente`` devuelve False). Una función
+    larga puede consultar ``reemplazada`` entre sus pasos para abandonar
+    el trabajo que ya nadie va a usar.
+    """
+
+    def __init__(self, nombre: str = "db-worker", al_detenerse: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            nombre: Nombre del hilo
+            al_detenerse: Se llama en el hilo al terminar, después de la última
+                solicitud (p. ej. para cerrar su propia conexión)
+        """
+        self.al_detenerse = al_detenerse
+        self._cola: "queue.Queue" = queue.Queue()
+        self._ultimas: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._actual = None  # (futuro, clave) de la solicitud en ejecución
+        self._hilo = threading.Thread(target=self._ejecutar, name=nombre, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, funcion: Callable, *args, clave: Optional[str] = None, **kwargs) -> Future:
+        """
+        Encolar una función para el hilo de base de datos
+
+        Args:
+            funcion: Función a ejecutar
+            clave: Agrupa solicitudes que se reemplazan (ej. 'busqueda')
+
+        Returns:
+            Future con el resultado de la función
+        """
+        futuro: Future = Future()
+        if clave is not None:
+            with self._lock:
+                anterior = self._ultimas.get(clave)
+                self._ultimas[clave] = futuro
+            if anterior is not None:
+                anterior.cancel()  # Solo tiene efecto si todavía estaba en cola
+
+        self._cola.put((futuro, funcion, args, kwargs, clave))
+        return futuro
+
+    def es_vigente(self, futuro: Future, clave: Optional[str]) -> bool:
+        """Indica si el futuro sigue siendo la última solicitud de su clave"""
+        if futuro.cancelled():
+            return False
+        if clave is None:
+            return True
+        with self._lock:
+            return self._ultimas.get(clave) is futuro
+
+    def reemplazada(self) -> bool:
+        """
+        Indica si la solicitud en ejecución ya fue reemplazada por otra más nueva
+
+        Solo tiene sentido llamarla desde la función que está ejecutando el hilo.
+        """
+        actual = self._actual
+        return actual is not None and not self.es_vigente(*actual)
+
+    def _ejecutar(self):
+        """Bucle del hilo: tomar solicitudes de la cola y resolver sus futuros"""
+        while True:
+            solicitud = self._cola.get()
+            if solicitud is _DETENER:
+                if self.al_detenerse:
+                    try:
+                        self.al_detenerse()
+                    except Exception as e:
+                        print(f"Error deteniendo el hilo de base de datos: {e}")
+                return
+
+            futuro, funcion, args, kwargs, clave = solicitud
+            if not futuro.set_running_or_notify_cancel():
+                continue
+
+            # Si ya llegó una solicitud más nueva con la misma clave, no trabajar
+            if not self.es_vigente(futuro, clave):
+                futuro.set_result(None)
+                continue
+
+            self._actual = (futuro, clave)
+            try:
+                futuro.set_result(funcion(*args, **kwargs))
+            except BaseException as e:
+                futuro.set_exception(e)
+            finally:
+                self._actual = None
+
+    def detener(self, timeout: Optional[float] = 5.0):
+        """
+        Cancelar lo pendiente y terminar el hilo cuando acabe la solicitud actual
+
+        Espera hasta ``timeout`` segundos; si el hilo sigue ``activo``, la
+        solicitud actual no terminó (ver ``esperar``).
+        """
+        while True:
+            try:
+                solicitud = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if solicitud is not _DETENER:
+                solicitud[0].cancel()
+
+        self._cola.put(_DETENER)
+        self._hilo.join(timeout)
+
+    def esperar(self, timeout: Optional[float] = None):
+        """Esperar a que el hilo termine (después de ``detener``)"""
+        self._hilo.join(timeout)
+
+    @property
+    def activo(self) -> bool:
+        """Indica si el hilo sigue en ejecución"""
+        return self._hilo.is_alive()
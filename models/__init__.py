@@ -1,6 +1,7 @@
 
 # Importar clases principales
 from .producto import Producto, ColorEspecificacion
+from .producto_resumen import ProductoResumen
 
 # Importar todas las clases de piezas
 from .pieza import (
@@ -19,6 +20,7 @@ __all__ = [
     # Clases principales
     'Producto',
     'ColorEspecificacion',
+    'ProductoResumen',
     
     # Clases de piezas
     'Pieza',
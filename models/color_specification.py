@@ -6,6 +6,8 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict
 from datetime import datetime
 
+from models.pieza import Pieza
+
 
 @dataclass
 class ColorEspecificacion:
@@ -16,6 +18,48 @@ class ColorEspecificacion:
     peso_color: float = 0.0  # Peso en gramos para este color
     tiempo_adicional: int = 0  # Tiempo adicional si hay cambio de color
     notas: str = ""  # Notas específicas para este color
+    id: Optional[int] = field(default=None, compare=False)  # ID en la base de datos, si ya existe
+    # Detalle de cada pieza (peso, tiempo, dificultad, ensamblaje...) tal como
+    # se guardó; ``piezas`` sigue siendo la lista de nombres que edita la UI
+    piezas_detalle: List[Pieza] = field(default_factory=list, repr=False)
+
+    def get_piezas_como_objetos(self) -> List[Pieza]:
+        """
+        Piezas como objetos Pieza, en el orden de ``piezas``
+
+        Cada nombre usa su detalle guardado (el de la misma posición o, si
+        se reordenó, el primero libre con ese nombre); los nombres nuevos
+        son piezas básicas.
+        """
+        libres = list(self.piezas_detalle)
+        objetos = []
+        for i, nombre in enumerate(self.piezas):
+            if i < len(self.piezas_detalle) and self.piezas_detalle[i].nombre == nombre \
+                    and self.piezas_detalle[i] in libres:
+                detalle = self.piezas_detalle[i]
+            else:
+                detalle = next((p for p in libres if p.nombre == nombre), None)
+
+            if detalle is None:
+                objetos.append(Pieza.from_simple_name(nombre))
+            else:
+                libres.remove(detalle)
+                objetos.append(detalle)
+        return objetos
+
+    def set_piezas(self, piezas: List[Pieza]):
+        """Reemplazar las piezas por objetos Pieza (nombres y detalle)"""
+        self.piezas = [pieza.nombre for pieza in piezas]
+        self.piezas_detalle = list(piezas)
+
+    def get_peso_calculado(self) -> float:
+        """Peso sumando el de cada pieza, o el del color si las piezas no lo tienen"""
+        peso_piezas = sum(pieza.peso_g for pieza in self.get_piezas_como_objetos())
+        return peso_piezas if peso_piezas > 0 else self.peso_color
+
+    def get_tiempo_total_piezas(self) -> int:
+        """Tiempo de impresión sumando el de cada pieza (0 si no lo tienen)"""
+        return sum(pieza.tiempo_impresion_min for pieza in self.get_piezas_como_objetos())
 
     def to_dict(self):
         """Convertir a diccionario"""
@@ -25,12 +69,18 @@ class ColorEspecificacion:
             'piezas': self.piezas,
             'peso_color': self.peso_color,
             'tiempo_adicional': self.tiempo_adicional,
-            'notas': self.notas
+            'notas': self.notas,
+            'piezas_detalle': [pieza.to_dict() for pieza in self.piezas_detalle]
         }
 
     @classmethod
     def from_dict(cls, data: dict):
         """Crear desde diccionario"""
+        data = data.copy()
+        data['piezas_detalle'] = [
+            Pieza.from_dict(pieza) if isinstance(pieza, dict) else pieza
+            for pieza in data.get('piezas_detalle', [])
+        ]
         return cls(**data)
 
 
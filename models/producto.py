@@ -3,20 +3,47 @@ Modelo de Producto para la aplicación de impresión 3D
 """
 
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Iterable
 from datetime import datetime
 
 from models.color_specification import ColorEspecificacion
 from models.pieza import Pieza
 
 
+class TextoDiferido:
+    """
+    Campo de texto que se puede leer de la base la primera vez que se usa
+
+    Las listas se cargan sin descripción ni guía de impresión (pueden
+    ocupar decenas de KB) y el producto queda con un cargador
+    (``Producto.diferir_textos``): el primer acceso a cualquiera de los
+    campos pendientes los trae todos juntos. Asignar un campo lo saca de
+    los pendientes.
+    """
+
+    def __set_name__(self, owner, nombre):
+        self.nombre = nombre
+        self.privado = f'_{nombre}'
+
+    def __get__(self, producto, tipo=None):
+        if producto is None:
+            return ""  # Valor por defecto del campo del dataclass
+        if self.nombre in producto.__dict__.get('_textos_pendientes', ()):
+            producto.cargar_textos()
+        return producto.__dict__.get(self.privado, "")
+
+    def __set__(self, producto, valor):
+        producto.__dict__[self.privado] = valor
+        producto.__dict__.get('_textos_pendientes', set()).discard(self.nombre)
+
+
 @dataclass
 class Producto:
     """Clase que representa un producto de impresión 3D - REFACTORIZADA"""
 
     id: Optional[int] = None
     nombre: str = ""
-    descripcion: str = ""
+    descripcion: str = TextoDiferido()
     peso: float = 0.0  # Peso total en gramos (calculado automáticamente)
     color: str = ""  # Color principal (deprecated, mantener por compatibilidad)
     colores_especificaciones: List[ColorEspecificacion] = field(default_factory=list)
@@ -25,7 +52,7 @@ class Producto:
     temperatura_extrusor: int = 200  # En grados Celsius
     temperatura_cama: int = 60  # En grados Celsius
     imagen_path: Optional[str] = None
-    guia_impresion: str = ""
+    guia_impresion: str = TextoDiferido()
     fecha_creacion: Optional[datetime] = None
     fecha_modificacion: Optional[datetime] = None
 
@@ -36,6 +63,36 @@ class Producto:
         if not self.fecha_modificacion:
             self.fecha_modificacion = datetime.now()
 
+    def diferir_textos(self, cargador: Callable[[], Optional[Dict[str, str]]],
+                       campos: Iterable[str] = ('descripcion', 'guia_impresion')):
+        """
+        Dejar campos de texto sin cargar hasta el primer acceso
+
+        Args:
+            cargador: Devuelve {campo: texto}, o None si el producto ya no existe
+            campos: Campos TextoDiferido que quedan pendientes
+        """
+        self.__dict__['_textos_pendientes'] = set(campos)
+        self.__dict__['_cargador_textos'] = cargador
+
+    @property
+    def textos_cargados(self) -> bool:
+        """Indica si no queda ningún campo de texto pendiente de leer"""
+        return not self.__dict__.get('_textos_pendientes')
+
+    def cargar_textos(self):
+        """
+        Leer ya los campos pendientes con el cargador de diferir_textos
+
+        Permite traerlos en el hilo de base de datos antes de pasar el
+        producto a una ventana, en lugar de en su primer acceso.
+        """
+        pendientes = self.__dict__.pop('_textos_pendientes', set())
+        cargador = self.__dict__.pop('_cargador_textos', None)
+        textos = (cargador() if cargador and pendientes else None) or {}
+        for campo in pendientes:
+            self.__dict__[f'_{campo}'] = textos.get(campo, "")
+
     def get_todas_las_piezas(self) -> List[Pieza]:
         """Obtener todas las piezas del producto como objetos Pieza"""
         todas_piezas = []
@@ -0,0 +1,87 @@
+"""
+Resumen liviano de un producto para la lista principal
+"""
+
+from typing import List, Optional, Tuple
+
+# Separadores usados por group_concat al cargar los colores de un resumen
+SEPARADOR_CAMPO = '\x1f'
+SEPARADOR_COLOR = '\x1e'
+
+# (color_hex, nombre_color, peso del color con sus piezas)
+ColorResumen = Tuple[str, str, float]
+
+
+class ProductoResumen:
+    """
+    Fila de la lista de productos: solo los campos que se muestran.
+
+    No incluye descripción, guía de impresión ni piezas; el ``Producto``
+    completo se carga aparte cuando se selecciona o se abre en una ventana.
+    """
+
+    __slots__ = ('id', 'nombre', 'material', 'tiempo_impresion', 'tiempo_total', 'peso', 'color', 'colores')
+
+    def __init__(self, id: int, nombre: str = "", material: str = "PLA",
+                 tiempo_impresion: int = 0, peso: float = 0.0, color: str = "",
+                 colores: Tuple[ColorResumen, ...] = (), tiempo_total: Optional[int] = None):
+        self.id = id
+        self.nombre = nombre
+        self.material = material
+        self.tiempo_impresion = tiempo_impresion
+        # Con piezas y cambios de color, como Producto.get_tiempo_total
+        self.tiempo_total = tiempo_impresion if tiempo_total is None else tiempo_total
+        self.peso = peso  # Como Producto.get_peso_total
+        self.color = color  # Color principal (deprecated, igual que en Producto)
+        self.colores = colores  # Ordenados por peso, de mayor a menor
+
+    @classmethod
+    def from_row(cls, row) -> 'ProductoResumen':
+        """
+        Crear desde una fila (id, nombre, material, tiempo, peso, color,
+        colores concatenados, peso total, tiempo total)
+        """
+        colores = []
+        if row[6]:
+            for color in row[6].split(SEPARADOR_COLOR):
+                color_hex, nombre_color, peso_color = color.split(SEPARADOR_CAMPO)
+                colores.append((color_hex, nombre_color, float(peso_color or 0)))
+            colores.sort(key=lambda c: c[2], reverse=True)
+
+        return cls(
+            id=row[0],
+            nombre=row[1],
+            material=row[2] or "PLA",
+            tiempo_impresion=row[3] or 0,
+            peso=(row[4] or 0.0) if row[7] is None else row[7],
+            color=row[5] or "",
+            colores=tuple(colores),
+            tiempo_total=row[8]
+        )
+
+    def tiempo_impresion_formato(self) -> str:
+        """Devolver tiempo de impresión en formato legible"""
+        horas = self.tiempo_impresion // 60
+        minutos = self.tiempo_impresion % 60
+        if horas > 0:
+            return f"{horas}h {minutos}min"
+        return f"{minutos}min"
+
+    def get_peso_total(self) -> float:
+        """Peso total del producto"""
+        return self.peso
+
+    def get_tiempo_total(self) -> int:
+        """Tiempo total del producto, con piezas y cambios de color"""
+        return self.tiempo_total
+
+    def get_colores_hex(self) -> List[str]:
+        """Obtener lista de colores en formato hexadecimal"""
+        return [color_hex for color_hex, _, _ in self.colores]
+
+    def get_color_principal(self) -> Optional[ColorResumen]:
+        """Obtener el color de mayor peso"""
+        return self.colores[0] if self.colores else None
+
+    def __repr__(self):
+        return f"ProductoResumen(id={self.id}, nombre={self.nombre!r})"
@@ -261,8 +261,8 @@ Consejos:
                 )
             ]
 
+            db.crear_productos_bulk(productos_ejemplo)
             for producto in productos_ejemplo:
-                db.crear_producto(producto)
                 print(f"   ✅ Creado: {producto.nombre}")
 
             print("✅ Productos de ejemplo creados")
@@ -0,0 +1,21 @@
+"""
+Fixtures comunes de las pruebas
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager sobre una base nueva en un directorio temporal"""
+    manager = DatabaseManager(str(tmp_path / 'productos.db'))
+    manager.init_database()
+    yield manager
+    manager.close()
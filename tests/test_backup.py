@@ -0,0 +1,104 @@
+"""
+BackupService: copias en caliente y restauración sobre la base abierta
+"""
+
+import sqlite3
+import threading
+import time
+
+from config.app_config import DatabaseConfig
+from database.db_backup import BackupService
+from database.db_manager import DatabaseManager
+from models.producto import Producto
+
+
+def servicio(db, tmp_path, **opciones):
+    return BackupService(db.db_path, str(tmp_path / 'backups'), **opciones)
+
+
+def nombres(db):
+    return [fila[0] for fila in db.get_connection().execute('SELECT nombre FROM productos ORDER BY id')]
+
+
+def test_restaurar_devuelve_el_contenido_y_descarta_lo_recordado(db, tmp_path):
+    backups = servicio(db, tmp_path)
+    caja = db.crear_producto(Producto(nombre='Caja'))
+    db.crear_producto(Producto(nombre='Tapa'))
+    resultado = backups.crear_backup()
+    assert resultado.verificado
+
+    producto = db.obtener_producto(caja)
+    producto.nombre = 'Caja grande'
+    db.actualizar_producto(producto)
+    db.crear_producto(Producto(nombre='Bisagra'))
+    assert db.obtener_producto(caja).nombre == 'Caja grande'  # Queda en la caché
+    token = db.obtener_token_cambios()
+
+    backups.restaurar(resultado.archivo, db_manager=db)
+
+    assert nombres(db) == ['Caja', 'Tapa']
+    assert db.obtener_producto(caja).nombre == 'Caja'
+    # Ningún token de antes queda cubierto: las vistas y los índices se rearman
+    assert db.obtener_cambios_desde(token).completo
+    assert db.obtener_cambios_desde(resultado.token).completo
+    # Y el registro sigue funcionando después
+    token = db.obtener_token_cambios()
+    nuevo = db.crear_producto(Producto(nombre='Clip'))
+    assert db.obtener_cambios_desde(token).modificados == {nuevo}
+
+
+def test_escrituras_esperan_su_turno_durante_la_restauracion(tmp_path):
+    # Poca espera de SQLite: sin el turno del coordinador la escritura
+    # agotaría sus reintentos contra el bloqueo de la restauración
+    db = DatabaseManager(str(tmp_path / 'productos.db'),
+                         DatabaseConfig(busy_timeout_ms=20, write_attempts=2))
+    try:
+        db.init_database()
+        with db.escritura.transaccion() as conn:
+            conn.executemany('INSERT INTO productos (nombre, descripcion) VALUES (?, ?)',
+                             [(f'Producto {i}', 'x' * 500) for i in range(300)])
+        backups = servicio(db, tmp_path, paginas_por_paso=1, pausa_paso=0.01)
+        resultado = backups.crear_backup()
+        db.crear_producto(Producto(nombre='Descartado'))
+
+        restaurador = threading.Thread(target=lambda: (backups.restaurar(resultado.archivo, db_manager=db),
+                                                       db.cerrar_conexion_hilo()))
+        restaurador.start()
+        time.sleep(0.1)
+        assert restaurador.is_alive()
+
+        try:
+            db.crear_producto(Producto(nombre='Después'))
+        finally:
+            restaurador.join(10)
+
+        assert not restaurador.is_alive()
+        assert nombres(db)[-2:] == ['Producto 299', 'Después']
+    finally:
+        db.close()
+
+
+def test_copia_reiniciada_sin_fin_termina_de_una_vez(db, tmp_path):
+    with db.escritura.transaccion() as conn:
+        conn.executemany('INSERT INTO productos (nombre, descripcion) VALUES (?, ?)',
+                         [(f'Producto {i}', 'x' * 500) for i in range(300)])
+    backups = servicio(db, tmp_path, paginas_por_paso=2, pausa_paso=0, max_reinicios=3)
+    escrituras = []
+
+    def escribir_en_cada_paso(copiadas, total):
+        # Otra conexión escribe entre paso y paso: la copia vuelve a empezar
+        if len(escrituras) < 200:
+            with db.escritura.transaccion() as conn:
+                conn.execute('INSERT INTO productos (nombre) VALUES (?)', (f'Nuevo {len(escrituras)}',))
+            escrituras.append(copiadas)
+
+    resultado = backups.crear_backup(on_progreso=escribir_en_cada_paso)
+
+    assert resultado.verificado
+    assert len(escrituras) < 200
+    copia = sqlite3.connect(str(tmp_path / 'backups' / resultado.archivo))
+    try:
+        copiados = copia.execute('SELECT COUNT(*) FROM productos').fetchone()[0]
+    finally:
+        copia.close()
+    assert 300 <= copiados <= 300 + len(escrituras)
@@ -0,0 +1,77 @@
+"""
+Bitmap y BitmapColores: operaciones entre contenedores y filtros de color
+"""
+
+import random
+
+from utils.bitmap_index import BITS_CONTENEDOR, Bitmap, BitmapColores
+
+LIMITE = 1 << BITS_CONTENEDOR  # Primer ID del segundo contenedor
+
+
+def ids_aleatorios(cantidad, semilla):
+    azar = random.Random(semilla)
+    return {azar.randrange(4 * LIMITE) for _ in range(cantidad)}
+
+
+def test_operaciones_como_conjuntos():
+    bordes = {0, 1, LIMITE - 1, LIMITE, LIMITE + 1, 2 * LIMITE - 1, 3 * LIMITE + 7}
+    a = ids_aleatorios(3000, 1) | bordes
+    b = ids_aleatorios(3000, 2) | {LIMITE - 1, LIMITE, 3 * LIMITE + 7}
+    bitmap_a, bitmap_b = Bitmap(a), Bitmap(b)
+
+    assert list(bitmap_a) == sorted(a)
+    assert len(bitmap_a) == len(a)
+    assert list(bitmap_a & bitmap_b) == sorted(a & b)
+    assert list(bitmap_a | bitmap_b) == sorted(a | b)
+    assert list(bitmap_a - bitmap_b) == sorted(a - b)
+    assert list(Bitmap.union(bitmap_a, bitmap_b, Bitmap([5 * LIMITE]))) == sorted(a | b | {5 * LIMITE})
+    assert all(i in bitmap_a for i in bordes)
+    assert all((i in bitmap_b) == (i in b) for i in range(LIMITE - 50, LIMITE + 50))
+
+    consulta = [3 * LIMITE + 7, 2, LIMITE, 10 * LIMITE, 0]
+    assert bitmap_a.filtrar(consulta) == [i for i in consulta if i in a]
+
+
+def test_contenedores_vacios_no_quedan():
+    bitmap = Bitmap([LIMITE - 1, LIMITE])
+    assert list(bitmap - Bitmap([LIMITE])) == [LIMITE - 1]
+    assert not (Bitmap([1]) & Bitmap([LIMITE + 1]))
+
+    bitmap.quitar(LIMITE - 1)
+    bitmap.quitar(12345)  # No estaba
+    assert list(bitmap) == [LIMITE]
+    bitmap.quitar(LIMITE)
+    assert not bitmap and len(bitmap) == 0 and list(bitmap) == []
+
+    bitmap.agregar(2 * LIMITE)
+    bitmap.agregar(3)
+    assert list(bitmap) == [3, 2 * LIMITE]
+
+
+def test_filtros_de_color():
+    filas = [
+        (1, '#FF0000,#0000FF'),
+        (LIMITE, '#FF0000'),
+        (LIMITE + 5, '#0000FF,#000000'),
+        (2 * LIMITE, None),
+    ]
+    colores = BitmapColores.desde_filas(filas)
+
+    assert colores.filtrar() is None
+    assert list(colores.filtrar(alguno=['#FF0000'])) == [1, LIMITE]
+    assert list(colores.filtrar(todos=['#FF0000', '#0000FF'])) == [1]
+    assert list(colores.filtrar(ninguno=['#FF0000'])) == [LIMITE + 5, 2 * LIMITE]
+    assert list(colores.filtrar(alguno=['#0000FF'], ninguno=['#000000'])) == [1]
+    assert list(colores.filtrar(alguno=['#FFFFFF'])) == []
+    assert colores.conteos() == {'#FF0000': 2, '#0000FF': 2, '#000000': 1}
+    assert colores.conteos(dentro=Bitmap([1, LIMITE + 5])) == {'#FF0000': 1, '#0000FF': 2, '#000000': 1}
+
+    colores.actualizar([(LIMITE, '#000000'), (3 * LIMITE, '#FF0000')], eliminados=[LIMITE + 5])
+    assert len(colores) == 4
+    assert list(colores.filtrar(alguno=['#000000'])) == [LIMITE]
+    assert list(colores.filtrar(alguno=['#FF0000'])) == [1, 3 * LIMITE]
+    assert sorted(colores.colores()) == ['#000000', '#0000FF', '#FF0000']
+
+    colores.quitar(1)
+    assert '#0000FF' not in colores.colores()
@@ -0,0 +1,45 @@
+"""
+Carga masiva: mismas tablas derivadas que los triggers, sin tocar el esquema
+"""
+
+from models.producto import ColorEspecificacion, Producto
+
+
+def productos(cantidad, inicio=0):
+    colores = [('#FF0000', 'Rojo'), ('#0000FF', 'Azul'), ('#000000', 'Negro')]
+    for numero in range(inicio, inicio + cantidad):
+        yield Producto(
+            nombre=f'Engranaje {numero}',
+            descripcion='Producto de prueba',
+            tiempo_impresion=30 + numero,
+            material='PETG' if numero % 2 else 'PLA',
+            colores_especificaciones=[
+                ColorEspecificacion(color_hex=color_hex, nombre_color=nombre, peso_color=5.0 + numero,
+                                    piezas=[f'Pieza {n + 1}' for n in range(numero % 3 + 1)])
+                for color_hex, nombre in colores[:numero % 3 + 1]
+            ]
+        )
+
+
+def test_carga_masiva_no_cambia_el_esquema(db):
+    conn = db.get_connection()
+    version_esquema = conn.execute('PRAGMA schema_version').fetchone()[0]
+
+    db.crear_productos_bulk(productos(25), tamano_lote=10)
+
+    assert conn.execute('PRAGMA schema_version').fetchone()[0] == version_esquema
+    assert conn.execute('SELECT COUNT(*) FROM carga_masiva').fetchone()[0] == 0
+
+
+def test_carga_masiva_mantiene_las_tablas_derivadas(db):
+    token = db.obtener_token_cambios()
+    ids = db.crear_productos_bulk(productos(25), tamano_lote=10)
+    # Los triggers siguen activos para las escrituras normales
+    ids.append(db.crear_producto(next(productos(1, inicio=25))))
+
+    conn = db.get_connection()
+    assert db.stats.verificar(conn) == []
+    assert db.totales.verificar(conn) == []
+    assert db.obtener_cambios_desde(token).modificados == set(ids)
+    assert sorted(db.buscar_ids_productos('engranaje', limite=100)) == sorted(ids)
+    assert db.buscar_ids_productos('azul', limite=100)
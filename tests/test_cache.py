@@ -0,0 +1,90 @@
+"""
+Caché de productos (identity map): aciertos, invalidación y etiquetas
+"""
+
+import sqlite3
+
+from models.producto import ColorEspecificacion, Producto
+
+
+def otra_conexion(db):
+    """Conexión propia, como la de otro proceso que usa el mismo archivo"""
+    return sqlite3.connect(str(db.db_path), isolation_level=None)
+
+
+def test_misma_fila_mismo_objeto(db):
+    producto_id = db.crear_producto(Producto(nombre='Caja'))
+
+    primero = db.obtener_producto(producto_id)
+    aciertos = db.cache.aciertos
+    assert db.obtener_producto(producto_id) is primero
+    assert db.obtener_productos_por_ids([producto_id])[0] is primero
+    assert db.cache.aciertos == aciertos + 2
+
+
+def test_actualizar_invalida_la_entrada(db):
+    producto_id = db.crear_producto(Producto(nombre='Caja', material='PLA'))
+    cargado = db.obtener_producto(producto_id)
+
+    editado = db.obtener_producto(producto_id)
+    editado.material = 'PETG'
+    invalidaciones = db.cache.invalidaciones
+    assert db.actualizar_producto(editado)
+
+    assert db.cache.invalidaciones == invalidaciones + 1
+    recargado = db.obtener_producto(producto_id)
+    assert recargado is not cargado
+    assert recargado.material == 'PETG'
+
+
+def test_eliminar_invalida_la_entrada(db):
+    caja = db.crear_producto(Producto(nombre='Caja'))
+    tapa = db.crear_producto(Producto(nombre='Tapa'))
+    assert len(db.obtener_productos_por_ids([caja, tapa])) == 2
+    assert db.cache.estadisticas()['productos'] == 2
+
+    assert db.eliminar_producto(caja)
+
+    assert db.cache.estadisticas()['productos'] == 1
+    assert db.obtener_producto(caja) is None
+    assert [p.id for p in db.obtener_productos_por_ids([caja, tapa])] == [tapa]
+
+
+def test_otra_conexion_cambia_la_etiqueta(db):
+    producto_id = db.crear_producto(Producto(nombre='Caja'))
+    cargado = db.obtener_producto(producto_id)
+
+    conn = otra_conexion(db)
+    try:
+        conn.execute("UPDATE productos SET nombre = 'Caja grande', fecha_modificacion = ? WHERE id = ?",
+                     ('2030-01-01T00:00:00', producto_id))
+    finally:
+        conn.close()
+
+    # Nadie invalidó la entrada, pero su etiqueta ya no coincide con la fila
+    recargado = db.obtener_producto(producto_id)
+    assert recargado is not cargado
+    assert recargado.nombre == 'Caja grande'
+    assert db.obtener_producto(producto_id) is recargado
+
+
+def test_cambio_sin_etiqueta_lo_descarta_el_registro(db):
+    producto_id = db.crear_producto(Producto(
+        nombre='Caja', colores_especificaciones=[ColorEspecificacion(color_hex='#FF0000', peso_color=5.0)]
+    ))
+    token = db.obtener_token_cambios()
+    cargado = db.obtener_producto(producto_id)
+
+    # Otro programa cambia un color sin tocar fecha_modificacion
+    conn = otra_conexion(db)
+    try:
+        conn.execute("UPDATE color_especificaciones SET color_hex = '#00FF00' WHERE producto_id = ?",
+                     (producto_id,))
+    finally:
+        conn.close()
+    assert db.obtener_producto(producto_id) is cargado
+
+    assert db.obtener_cambios_desde(token).modificados == {producto_id}
+    recargado = db.obtener_producto(producto_id)
+    assert recargado is not cargado
+    assert [c.color_hex for c in recargado.colores_especificaciones] == ['#00FF00']
@@ -0,0 +1,61 @@
+"""
+Carga de productos completos: cantidad de consultas
+"""
+
+from models.producto import ColorEspecificacion, Producto
+
+
+def consultas(conn):
+    """Sentencias que ejecuta la conexión desde ahora"""
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    return sentencias
+
+
+def test_exportar_todo_no_consulta_por_producto(db):
+    for numero in range(30):
+        db.crear_producto(Producto(
+            nombre=f'Producto {numero}', descripcion=f'Descripción {numero}',
+            guia_impresion=f'Guía {numero}',
+            colores_especificaciones=[ColorEspecificacion(color_hex='#FF0000', piezas=['base'])]
+        ))
+
+    conn = db.get_connection()
+    sentencias = consultas(conn)
+    try:
+        exportados = [producto.to_dict() for producto in db.obtener_todos_productos()]
+    finally:
+        conn.set_trace_callback(None)
+
+    # Productos, especificaciones de color y piezas
+    assert len(sentencias) == 3
+    assert len(exportados) == 30
+    assert {(p['descripcion'], p['guia_impresion']) for p in exportados} == {
+        (f'Descripción {numero}', f'Guía {numero}') for numero in range(30)
+    }
+
+
+def test_listas_difieren_los_textos(db):
+    producto_id = db.crear_producto(Producto(nombre='Caja', descripcion='Larga'))
+
+    producto = db.obtener_productos_por_ids([producto_id])[0]
+    assert not producto.textos_cargados
+    assert producto.descripcion == 'Larga'
+    assert producto.textos_cargados
+
+
+def test_textos_se_pueden_leer_antes_de_usarlos(db):
+    producto_id = db.crear_producto(Producto(nombre='Caja', descripcion='Larga', guia_impresion='Guía'))
+
+    # Como en el hilo de base de datos, antes de pasar el producto a una ventana
+    producto = db.obtener_productos_por_ids([producto_id])[0]
+    producto.cargar_textos()
+    assert producto.textos_cargados
+
+    conn = db.get_connection()
+    sentencias = consultas(conn)
+    try:
+        assert (producto.descripcion, producto.guia_impresion) == ('Larga', 'Guía')
+    finally:
+        conn.set_trace_callback(None)
+    assert sentencias == []
@@ -0,0 +1,85 @@
+"""
+Registro de cambios: escrituras de otra conexión sobre el mismo archivo
+"""
+
+import sqlite3
+
+import pytest
+
+from database.db_manager import DatabaseManager
+from models.producto import ColorEspecificacion, Producto
+
+
+@pytest.fixture
+def otro_equipo(db):
+    """Segundo DatabaseManager sobre el mismo archivo, como otra instancia de la aplicación"""
+    manager = DatabaseManager(str(db.db_path))
+    yield manager
+    manager.close()
+
+
+def catalogo(db, cantidad=6):
+    return [
+        db.crear_producto(Producto(
+            nombre=f'Producto {n}',
+            colores_especificaciones=[ColorEspecificacion(color_hex='#FF0000', peso_color=5.0, piezas=['base'])]
+        ))
+        for n in range(cantidad)
+    ]
+
+
+def test_token_cambia_con_escrituras_ajenas(db, otro_equipo):
+    catalogo(db, 1)
+    token = db.obtener_token_cambios()
+    assert db.obtener_token_cambios() == token
+
+    # Esta conexión no escribió nada: solo data_version avisa del cambio
+    otro_equipo.crear_producto(Producto(nombre='Nuevo'))
+    assert db.obtener_token_cambios() > token
+
+
+def test_cambios_de_otra_conexion_son_exactos(db, otro_equipo):
+    sin_tocar, editado, con_color, con_pieza, eliminado, editado_y_eliminado = catalogo(db)
+    token = db.obtener_token_cambios()
+
+    producto = otro_equipo.obtener_producto(editado)
+    producto.nombre = 'Editado'
+    otro_equipo.actualizar_producto(producto)
+
+    producto = otro_equipo.obtener_producto(editado_y_eliminado)
+    producto.nombre = 'Se borra después'
+    otro_equipo.actualizar_producto(producto)
+    otro_equipo.eliminar_producto(editado_y_eliminado)
+    otro_equipo.eliminar_producto(eliminado)
+    creado = otro_equipo.crear_producto(Producto(nombre='Creado'))
+
+    # Tablas hijas escritas con SQL directo, como otro programa
+    conn = sqlite3.connect(str(db.db_path), isolation_level=None)
+    try:
+        conn.execute("UPDATE color_especificaciones SET color_hex = '#00FF00' WHERE producto_id = ?",
+                     (con_color,))
+        conn.execute('''
+            UPDATE color_piezas SET nombre_pieza = 'tapa' WHERE color_especificacion_id IN (
+                SELECT id FROM color_especificaciones WHERE producto_id = ?)
+        ''', (con_pieza,))
+    finally:
+        conn.close()
+
+    cambios = db.obtener_cambios_desde(token)
+
+    assert not cambios.completo
+    assert cambios.modificados == {editado, con_color, con_pieza, creado}
+    assert cambios.eliminados == {eliminado, editado_y_eliminado}
+    assert sin_tocar not in cambios.modificados | cambios.eliminados
+    assert cambios.por_tabla['color_especificaciones'] == {con_color}
+    assert cambios.por_tabla['color_piezas'] == {con_pieza}
+
+    # La lista recarga solo esos productos y los ve como quedaron
+    recargados = {p.id: p for p in db.obtener_productos_por_ids(cambios.modificados | cambios.eliminados)}
+    assert set(recargados) == {editado, con_color, con_pieza, creado}
+    assert recargados[editado].nombre == 'Editado'
+    assert recargados[con_color].colores_especificaciones[0].color_hex == '#00FF00'
+    assert recargados[con_pieza].colores_especificaciones[0].piezas == ['tapa']
+
+    # Sin escrituras nuevas no hay nada más que aplicar
+    assert db.obtener_cambios_desde(cambios.hasta).vacio
@@ -0,0 +1,72 @@
+"""
+CIELAB y búsqueda de colores parecidos por ΔE
+"""
+
+import random
+
+import pytest
+
+from utils import color_space
+from utils.color_space import IndiceColores, delta_e, hex_a_lab, normalizar_hex
+
+
+def aleatorios(cantidad, semilla=7):
+    azar = random.Random(semilla)
+    return [f'#{azar.randrange(0x1000000):06X}' for _ in range(cantidad)]
+
+
+def por_fuerza_bruta(colores, color):
+    punto = hex_a_lab(color)
+    return sorted(((c, delta_e(punto, hex_a_lab(c))) for c in set(colores)), key=lambda par: (par[1], par[0]))
+
+
+@pytest.fixture(params=['numpy', 'arbol'])
+def sin_numpy(request, monkeypatch):
+    """Probar las dos implementaciones (la de NumPy solo si está instalado)"""
+    if request.param == 'numpy':
+        if color_space.np is None:
+            pytest.skip('NumPy no está instalado')
+    else:
+        monkeypatch.setattr(color_space, 'np', None)
+
+
+def test_conversion_a_lab():
+    assert normalizar_hex('f00') == '#FF0000'
+    assert normalizar_hex('#00ff00 ') == '#00FF00'
+    assert normalizar_hex('rojo') is None
+
+    assert hex_a_lab('#FFFFFF') == pytest.approx((100.0, 0.0, 0.0), abs=0.01)
+    assert hex_a_lab('#000000') == pytest.approx((0.0, 0.0, 0.0), abs=0.01)
+    assert hex_a_lab('#FF0000') == pytest.approx((53.24, 80.09, 67.20), abs=0.01)
+    assert delta_e(hex_a_lab('#FFFFFF'), hex_a_lab('#000000')) == pytest.approx(100.0, abs=0.01)
+    with pytest.raises(ValueError):
+        hex_a_lab('azul')
+
+
+def test_cercanos_ordenados_por_delta_e(sin_numpy):
+    indice = IndiceColores(['#FF0000', '#FE0101', '#CC0000', '#FF8800', '#0000FF', '#000000', 'sin color'])
+    assert len(indice) == 6
+
+    cercanos = indice.cercanos('#FF0000', k=4)
+    assert [codigo for codigo, _ in cercanos] == ['#FF0000', '#FE0101', '#CC0000', '#FF8800']
+    assert cercanos[0][1] == 0
+    distancias = [distancia for _, distancia in cercanos]
+    assert distancias == sorted(distancias)
+
+    assert [codigo for codigo, _ in indice.dentro_de('#FF0000', color_space.DELTA_E_PERCEPTIBLE)] == [
+        '#FF0000', '#FE0101']
+    assert indice.parecidos(['#FF0000', 'rojo'], 2.3) == {'#FF0000', '#FE0101', 'rojo'}
+
+
+def test_mismo_resultado_que_recorrer_todos(sin_numpy):
+    colores = aleatorios(400)
+    indice = IndiceColores(colores)
+
+    for color in aleatorios(25, semilla=11):
+        esperados = por_fuerza_bruta(colores, color)
+        assert indice.cercanos(color, k=7) == esperados[:7]
+        radio = (esperados[5][1] + esperados[6][1]) / 2
+        assert indice.dentro_de(color, radio) == [par for par in esperados if par[1] <= radio]
+
+    assert IndiceColores([]).cercanos('#FF0000') == []
+    assert len(indice.cercanos('#FF0000', k=1000)) == len(set(colores))
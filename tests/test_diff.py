@@ -0,0 +1,170 @@
+"""
+Actualización por diferencias: solo se escribe lo que cambió
+"""
+
+from models.pieza import Pieza
+from models.producto import ColorEspecificacion, Producto
+
+
+def pieza(nombre, peso, tiempo):
+    detalle = Pieza.from_simple_name(nombre)
+    detalle.peso_g, detalle.tiempo_impresion_min = peso, tiempo
+    return detalle
+
+
+def piezas_guardadas(db, producto_id):
+    return db.get_connection().execute('''
+        SELECT ce.color_hex, cp.nombre_pieza, cp.peso_pieza, cp.tiempo_impresion_pieza
+        FROM color_piezas cp
+        JOIN color_especificaciones ce ON ce.id = cp.color_especificacion_id
+        WHERE ce.producto_id = ?
+        ORDER BY cp.id
+    ''', (producto_id,)).fetchall()
+
+
+def como_el_formulario(producto):
+    """
+    Especificaciones armadas como ColorSpecificationWidget.get_all_specifications:
+    sin ID ni piezas_detalle, solo los nombres de las piezas de cada color
+    """
+    return [
+        ColorEspecificacion(color_hex=spec.color_hex, nombre_color=spec.nombre_color,
+                            peso_color=spec.peso_color, tiempo_adicional=spec.tiempo_adicional,
+                            piezas=list(spec.piezas), notas=spec.notas)
+        for spec in producto.colores_especificaciones
+    ]
+
+
+def test_editar_desde_el_formulario_conserva_el_detalle_de_las_piezas(db):
+    color = ColorEspecificacion(color_hex='#FF0000', nombre_color='Rojo', peso_color=50.0)
+    color.set_piezas([pieza('base', 40.0, 90), pieza('tapa', 10.0, 30)])
+    producto_id = db.crear_producto(Producto(nombre='Caja', colores_especificaciones=[color]))
+
+    producto = db.obtener_producto(producto_id)
+    producto.nombre = 'Caja con tapa'
+    producto.colores_especificaciones = como_el_formulario(producto)
+    reporte = db.actualizar_producto_con_reporte(producto)
+
+    assert reporte.productos_actualizados == 1
+    assert reporte.piezas_insertadas == reporte.piezas_actualizadas == reporte.piezas_eliminadas == 0
+    assert piezas_guardadas(db, producto_id) == [
+        ('#FF0000', 'base', 40.0, 90), ('#FF0000', 'tapa', 10.0, 30),
+    ]
+    cargado = db.obtener_producto(producto_id)
+    assert [(p.nombre, p.peso_g, p.tiempo_impresion_min)
+            for p in cargado.colores_especificaciones[0].piezas_detalle] == [('base', 40.0, 90), ('tapa', 10.0, 30)]
+
+
+def test_formulario_agrega_y_quita_piezas_por_nombre(db):
+    color = ColorEspecificacion(color_hex='#FF0000', peso_color=50.0)
+    color.set_piezas([pieza('base', 40.0, 90), pieza('tapa', 10.0, 30)])
+    producto_id = db.crear_producto(Producto(nombre='Caja', colores_especificaciones=[color]))
+
+    producto = db.obtener_producto(producto_id)
+    producto.colores_especificaciones = como_el_formulario(producto)
+    producto.colores_especificaciones[0].piezas = ['tapa', 'bisagra']
+    reporte = db.actualizar_producto_con_reporte(producto)
+
+    assert (reporte.piezas_insertadas, reporte.piezas_actualizadas, reporte.piezas_eliminadas) == (1, 0, 1)
+    assert piezas_guardadas(db, producto_id) == [
+        ('#FF0000', 'tapa', 10.0, 30), ('#FF0000', 'bisagra', 0.0, 0),
+    ]
+
+
+def catalogo_con_colores(db):
+    rojo = ColorEspecificacion(color_hex='#FF0000', nombre_color='Rojo', peso_color=30.0, notas='Mate')
+    rojo.set_piezas([pieza('base', 25.0, 60)])
+    azul = ColorEspecificacion(color_hex='#0000FF', nombre_color='Azul', peso_color=20.0)
+    azul.set_piezas([pieza('tapa', 15.0, 40), pieza('asa', 5.0, 10)])
+    return db.crear_producto(Producto(nombre='Caja', descripcion='Caja con tapa',
+                                      colores_especificaciones=[rojo, azul]))
+
+
+def escrituras(conn):
+    """Sentencias INSERT/UPDATE/DELETE que ejecuta la conexión (sin las de los triggers)"""
+    sentencias = []
+
+    def registrar(sql):
+        if sql.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            sentencias.append(sql)
+
+    conn.set_trace_callback(registrar)
+    return sentencias
+
+
+def test_guardar_sin_cambios_no_escribe(db):
+    producto_id = catalogo_con_colores(db)
+    producto = db.obtener_producto(producto_id)
+    antes = producto.fecha_modificacion
+
+    conn = db.get_connection()
+    sentencias = escrituras(conn)
+    try:
+        reporte = db.actualizar_producto_con_reporte(producto)
+    finally:
+        conn.set_trace_callback(None)
+
+    assert reporte.encontrado and reporte.sin_cambios
+    assert sentencias == []
+    assert db.obtener_producto(producto_id).fecha_modificacion == antes
+
+
+def test_agregar_quitar_y_reordenar_colores(db):
+    producto_id = catalogo_con_colores(db)
+    producto = db.obtener_producto(producto_id)
+    rojo, azul = producto.colores_especificaciones
+
+    # Solo cambia el orden: los IDs emparejan cada color con el suyo
+    producto.colores_especificaciones = [azul, rojo]
+    assert db.actualizar_producto_con_reporte(producto).sin_cambios
+
+    verde = ColorEspecificacion(color_hex='#00FF00', nombre_color='Verde', peso_color=8.0, piezas=['clip'])
+    producto.colores_especificaciones = [azul, verde]
+    reporte = db.actualizar_producto_con_reporte(producto)
+
+    assert (reporte.colores_insertados, reporte.colores_actualizados, reporte.colores_eliminados) == (1, 0, 1)
+    assert (reporte.piezas_insertadas, reporte.piezas_actualizadas, reporte.piezas_eliminadas) == (1, 0, 1)
+    assert reporte.productos_actualizados == 1
+    assert verde.id is not None
+    assert piezas_guardadas(db, producto_id) == [
+        ('#0000FF', 'tapa', 15.0, 40), ('#0000FF', 'asa', 5.0, 10), ('#00FF00', 'clip', 0.0, 0),
+    ]
+
+
+def test_colores_sin_id_se_emparejan_por_hex(db):
+    producto_id = catalogo_con_colores(db)
+    ids_antes = {fila[0]: fila[1] for fila in db.get_connection().execute(
+        'SELECT color_hex, id FROM color_especificaciones WHERE producto_id = ?', (producto_id,))}
+
+    producto = db.obtener_producto(producto_id)
+    especificaciones = como_el_formulario(producto)
+    rojo = next(spec for spec in especificaciones if spec.color_hex == '#FF0000')
+    rojo.peso_color = 35.0
+    producto.colores_especificaciones = list(reversed(especificaciones))
+    reporte = db.actualizar_producto_con_reporte(producto)
+
+    assert (reporte.colores_insertados, reporte.colores_actualizados, reporte.colores_eliminados) == (0, 1, 0)
+    assert reporte.piezas_insertadas == reporte.piezas_actualizadas == reporte.piezas_eliminadas == 0
+    ids_despues = {fila[0]: fila[1] for fila in db.get_connection().execute(
+        'SELECT color_hex, id FROM color_especificaciones WHERE producto_id = ?', (producto_id,))}
+    assert ids_despues == ids_antes
+
+
+def test_piezas_editadas_conservan_el_resto_del_detalle(db):
+    producto_id = catalogo_con_colores(db)
+    producto = db.obtener_producto(producto_id)
+    azul = next(spec for spec in producto.colores_especificaciones if spec.color_hex == '#0000FF')
+    tapa, asa = azul.piezas_detalle
+    tapa.peso_g = 18.0
+    azul.set_piezas([asa, tapa])
+
+    reporte = db.actualizar_producto_con_reporte(producto)
+
+    # Las filas se comparan por posición: las dos cambian de contenido
+    assert (reporte.piezas_insertadas, reporte.piezas_actualizadas, reporte.piezas_eliminadas) == (0, 2, 0)
+    assert piezas_guardadas(db, producto_id) == [
+        ('#FF0000', 'base', 25.0, 60), ('#0000FF', 'asa', 5.0, 10), ('#0000FF', 'tapa', 18.0, 40),
+    ]
+    recargado = db.obtener_producto(producto_id)
+    assert recargado.colores_especificaciones[0].notas == 'Mate'
+    assert recargado.descripcion == 'Caja con tapa'
@@ -0,0 +1,126 @@
+"""
+CoordinadorEscritura: reintentos con espera exponencial ante una base bloqueada
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from config.app_config import DatabaseConfig
+from database import db_escritura
+from database.db_connection import ConnectionManager
+from database.db_escritura import BaseOcupadaError, CoordinadorEscritura
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    ruta = str(tmp_path / 'escritura.db')
+    conn = sqlite3.connect(ruta)
+    conn.execute('CREATE TABLE datos (valor INTEGER)')
+    conn.commit()
+    conn.close()
+    return ruta
+
+
+@pytest.fixture
+def conexiones(ruta):
+    # Sin busy_timeout: cada intento falla enseguida si la base está bloqueada
+    conexiones = ConnectionManager(ruta, DatabaseConfig(busy_timeout_ms=0, journal_mode='DELETE'))
+    yield conexiones
+    conexiones.close()
+
+
+@pytest.fixture
+def bloqueo(ruta):
+    """Otra conexión con el bloqueo de escritura; liberar() lo suelta"""
+    otra = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+    otra.execute('BEGIN IMMEDIATE')
+    liberado = threading.Event()
+
+    def liberar():
+        if not liberado.is_set():
+            liberado.set()
+            otra.execute('ROLLBACK')
+
+    yield liberar
+    liberar()
+    otra.close()
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Esperas entre reintentos, sin dormir y sin azar"""
+    registradas = []
+    monkeypatch.setattr(db_escritura.time, 'sleep', registradas.append)
+    monkeypatch.setattr(db_escritura.random, 'uniform', lambda minimo, maximo: maximo)
+    return registradas
+
+
+def test_reintenta_hasta_que_se_libera_el_bloqueo(conexiones, bloqueo):
+    coordinador = CoordinadorEscritura(conexiones, intentos=10, espera_inicial=0.02)
+    temporizador = threading.Timer(0.15, bloqueo)
+    temporizador.start()
+    try:
+        with coordinador.transaccion() as conn:
+            conn.execute('INSERT INTO datos VALUES (1)')
+    finally:
+        temporizador.cancel()
+
+    metricas = coordinador.metricas
+    assert metricas.transacciones == 1
+    assert metricas.reintentos > 0
+    assert metricas.abandonadas == 0
+    assert conexiones.get_connection().execute('SELECT COUNT(*) FROM datos').fetchone()[0] == 1
+
+
+def test_espera_exponencial_con_tope(conexiones, bloqueo, esperas):
+    coordinador = CoordinadorEscritura(conexiones, intentos=6, espera_inicial=0.05, espera_tope=0.3)
+
+    with pytest.raises(BaseOcupadaError):
+        with coordinador.transaccion():
+            pytest.fail("No debería entrar sin el bloqueo")
+
+    assert esperas == pytest.approx([0.05, 0.1, 0.2, 0.3, 0.3])
+    metricas = coordinador.metricas
+    assert (metricas.bloqueos, metricas.reintentos, metricas.abandonadas) == (6, 5, 1)
+
+
+def test_base_ocupada_es_un_error_de_sqlite(conexiones, bloqueo, esperas):
+    coordinador = CoordinadorEscritura(conexiones, intentos=2)
+
+    with pytest.raises(sqlite3.OperationalError):
+        with coordinador.transaccion():
+            pass
+
+    # Abandonar el intento deja libre el turno del proceso
+    bloqueo()
+    with coordinador.transaccion() as conn:
+        conn.execute('INSERT INTO datos VALUES (1)')
+    assert coordinador.metricas.transacciones == 1
+
+
+def test_error_del_cuerpo_revierte_sin_reintentar(conexiones, esperas):
+    coordinador = CoordinadorEscritura(conexiones)
+
+    with pytest.raises(ValueError):
+        with coordinador.transaccion() as conn:
+            conn.execute('INSERT INTO datos VALUES (1)')
+            raise ValueError("falla a mitad de la transacción")
+
+    assert esperas == []
+    assert coordinador.metricas.revertidas == 1
+    assert conexiones.get_connection().execute('SELECT COUNT(*) FROM datos').fetchone()[0] == 0
+
+
+def test_transaccion_anidada_se_suma_a_la_de_afuera(conexiones):
+    coordinador = CoordinadorEscritura(conexiones)
+
+    with pytest.raises(ValueError):
+        with coordinador.transaccion() as conn:
+            with coordinador.transaccion() as interna:
+                interna.execute('INSERT INTO datos VALUES (1)')
+            assert interna is conn
+            raise ValueError
+
+    assert conexiones.get_connection().execute('SELECT COUNT(*) FROM datos').fetchone()[0] == 0
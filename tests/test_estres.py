@@ -0,0 +1,13 @@
+"""
+Estrés con varios procesos: ningún error de bloqueo llega a quien llama
+"""
+
+import pytest
+
+from benchmark_db import ejecutar_estres
+
+
+# DELETE es el modo de las unidades de red; WAL, el de los discos locales
+@pytest.mark.parametrize('journal_mode', ['DELETE', 'WAL'])
+def test_procesos_concurrentes_sin_errores_de_bloqueo(journal_mode):
+    assert ejecutar_estres(procesos=4, segundos=3, journal_mode=journal_mode) == 0
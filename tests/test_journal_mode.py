@@ -0,0 +1,38 @@
+"""
+Elección de journal_mode según dónde está la base
+"""
+
+import pytest
+
+from config.app_config import DatabaseConfig
+from database import db_connection
+from database.db_connection import ConnectionManager, elegir_journal_mode
+
+
+@pytest.mark.parametrize('local, pedido, esperado', [
+    (True, 'AUTO', 'WAL'),
+    (False, 'AUTO', 'DELETE'),
+    (None, 'AUTO', 'DELETE'),
+    (False, 'WAL', 'DELETE'),
+    (True, 'WAL', 'WAL'),
+    (False, 'TRUNCATE', 'TRUNCATE'),
+])
+def test_elegir_journal_mode(monkeypatch, local, pedido, esperado):
+    monkeypatch.setattr(db_connection, 'es_unidad_local', lambda ruta: local)
+    assert elegir_journal_mode('productos.db', pedido) == esperado
+
+
+def test_unidad_de_red_no_usa_wal(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(db_connection, 'es_unidad_local', lambda ruta: False)
+    conexiones = ConnectionManager(str(tmp_path / 'productos.db'), DatabaseConfig())
+    try:
+        modo = conexiones.get_connection().execute('PRAGMA journal_mode').fetchone()[0]
+    finally:
+        conexiones.close()
+
+    assert modo == 'delete'
+    assert 'unidad de red' in capsys.readouterr().out
+
+
+def test_por_defecto_detecta_la_unidad():
+    assert DatabaseConfig().journal_mode == 'AUTO'
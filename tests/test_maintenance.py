@@ -0,0 +1,69 @@
+"""
+DatabaseMaintenance: VACUUM incremental en bases nuevas y anteriores
+"""
+
+import sqlite3
+
+import pytest
+
+from database.db_maintenance import DatabaseMaintenance
+from database.db_manager import DatabaseManager
+
+
+def _borrar_productos(db, cantidad=2000):
+    with db.escritura.transaccion() as conn:
+        conn.executemany(
+            'INSERT INTO productos (nombre, descripcion) VALUES (?, ?)',
+            [(f'Producto {i}', 'x' * 500) for i in range(cantidad)]
+        )
+    with db.escritura.transaccion() as conn:
+        conn.execute('DELETE FROM productos')
+
+
+@pytest.mark.parametrize('journal_mode', ['DELETE', 'WAL'])
+def test_base_nueva_usa_auto_vacuum_incremental(tmp_path, journal_mode):
+    from config.app_config import DatabaseConfig
+
+    db = DatabaseManager(str(tmp_path / 'nueva.db'), DatabaseConfig(journal_mode=journal_mode))
+    try:
+        db.init_database()
+        assert db.get_connection().execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    finally:
+        db.close()
+
+
+def test_vacuum_incremental_libera_paginas(db):
+    _borrar_productos(db)
+    mantenimiento = DatabaseMaintenance(db)
+    assert mantenimiento.estado().paginas_libres > 0
+
+    reporte = mantenimiento.ejecutar(vacuum='incremental')
+    assert reporte.vacuum == 'incremental'
+    assert not reporte.avisos
+    assert reporte.despues.paginas_libres == 0
+    assert reporte.bytes_liberados > 0
+
+
+def test_base_anterior_no_dice_que_hizo_vacuum(tmp_path):
+    ruta = str(tmp_path / 'anterior.db')
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA auto_vacuum = NONE')
+    conn.execute('CREATE TABLE previa (id INTEGER PRIMARY KEY)')
+    conn.close()
+
+    db = DatabaseManager(ruta)
+    try:
+        db.init_database()
+        mantenimiento = DatabaseMaintenance(db)
+        assert db.get_connection().execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+
+        reporte = mantenimiento.ejecutar(vacuum='incremental')
+        assert reporte.vacuum == ''
+        assert any('--completo' in aviso for aviso in reporte.avisos)
+
+        # El paso único documentado la deja en incremental
+        assert mantenimiento.ejecutar(vacuum='completo').vacuum == 'completo'
+        assert db.get_connection().execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+        assert mantenimiento.ejecutar(vacuum='incremental').vacuum == 'incremental'
+    finally:
+        db.close()
@@ -0,0 +1,84 @@
+"""
+DatabaseMigrator: user_version, migraciones fallidas y arranque al día
+"""
+
+from database.db_manager import DatabaseManager
+
+
+def tablas(conn):
+    return {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def versiones_registradas(conn):
+    return [fila[0] for fila in conn.execute('SELECT version FROM schema_versions ORDER BY version')]
+
+
+def test_cada_migracion_sube_user_version(db):
+    migrador = db.migrator
+    actual = migrador.get_current_version()
+    assert actual == migrador.latest_version
+
+    migrador.migrations[actual + 1] = lambda conn: conn.execute('CREATE TABLE nueva_a (id INTEGER)')
+    migrador.migrations[actual + 3] = lambda conn: conn.execute('CREATE TABLE nueva_b (id INTEGER)')
+    assert not migrador.is_up_to_date()
+
+    resultado = migrador.run_migrations()
+
+    assert resultado['success']
+    assert resultado['migrations_applied'] == [actual + 1, actual + 3]
+    conn = db.get_connection()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == actual + 3
+    assert versiones_registradas(conn)[-2:] == [actual + 1, actual + 3]
+    assert {'nueva_a', 'nueva_b'} <= tablas(conn)
+    assert migrador.is_up_to_date()
+
+
+def test_migracion_fallida_no_deja_nada_a_medias(db):
+    migrador = db.migrator
+    actual = migrador.get_current_version()
+    conn = db.get_connection()
+    registradas = versiones_registradas(conn)
+
+    def fallida(conn):
+        conn.execute('CREATE TABLE a_medias (id INTEGER)')
+        conn.execute("UPDATE productos SET nombre = 'no'")
+        conn.execute('INSERT INTO a_medias VALUES (1)')
+        raise RuntimeError('falla a mitad de camino')
+
+    migrador.migrations[actual + 1] = fallida
+    migrador.migrations[actual + 2] = lambda conn: conn.execute('CREATE TABLE posterior (id INTEGER)')
+
+    resultado = migrador.run_migrations()
+
+    assert not resultado['success']
+    assert resultado['migrations_applied'] == []
+    assert 'falla a mitad de camino' in resultado['errors'][0]
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == actual
+    assert versiones_registradas(conn) == registradas
+    assert not {'a_medias', 'posterior'} & tablas(conn)
+    assert not conn.in_transaction
+
+    # Corregida, se aplica con la siguiente en el próximo arranque
+    migrador.migrations[actual + 1] = lambda conn: conn.execute('CREATE TABLE a_medias (id INTEGER)')
+    assert migrador.run_migrations()['migrations_applied'] == [actual + 1, actual + 2]
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == actual + 2
+
+
+def test_arranque_con_la_base_al_dia_es_una_lectura(db):
+    db.close()
+
+    manager = DatabaseManager(str(db.db_path))
+    try:
+        conn = manager.get_connection()
+        sentencias = []
+        conn.set_trace_callback(sentencias.append)
+        try:
+            manager.init_database()
+            resultado = manager.migrator.run_migrations()
+        finally:
+            conn.set_trace_callback(None)
+    finally:
+        manager.close()
+
+    assert resultado['migrations_applied'] == []
+    assert sentencias == ['PRAGMA user_version', 'PRAGMA user_version']
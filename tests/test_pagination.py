@@ -0,0 +1,50 @@
+"""
+Paginación por keyset con valores NULL en la columna de orden
+"""
+
+import pytest
+
+from models.producto import Producto
+
+
+def recorrer(db, orden, descendente, limite=2):
+    """IDs de todas las páginas seguidas y los cursores de cada una"""
+    ids, cursores, cursor = [], [], None
+    while True:
+        pagina = db.obtener_pagina_productos(limite=limite, despues_de=cursor, orden=orden,
+                                             descendente=descendente, resumen=True)
+        ids.extend(producto.id for producto in pagina.productos)
+        if not pagina.hay_mas:
+            return ids, cursores, pagina.total
+        cursor = pagina.cursor_siguiente
+        cursores.append((cursor, len(ids)))
+
+
+@pytest.fixture
+def catalogo(db):
+    """Seis productos, tres sin material"""
+    for numero, material in enumerate(['PLA', None, 'PETG', None, 'PLA', None]):
+        db.crear_producto(Producto(nombre=f'Producto {numero}', material=material))
+    return db
+
+
+@pytest.mark.parametrize('descendente', [False, True])
+@pytest.mark.parametrize('orden', ['material', 'nombre', 'id'])
+def test_paginas_recorren_todo_el_listado(catalogo, orden, descendente):
+    direccion = 'DESC' if descendente else 'ASC'
+    esperado = [fila[0] for fila in catalogo.get_connection().execute(
+        f'SELECT p.id FROM productos p ORDER BY p.{orden} {direccion}, p.id {direccion}'
+    )]
+
+    ids, _, total = recorrer(catalogo, orden, descendente)
+
+    assert total == 6
+    assert ids == esperado
+
+
+@pytest.mark.parametrize('descendente', [False, True])
+def test_ids_hasta_el_cursor_son_las_paginas_cargadas(catalogo, descendente):
+    ids, cursores, _ = recorrer(catalogo, 'material', descendente)
+
+    for cursor, cargados in cursores:
+        assert catalogo.obtener_ids_listado(cursor, 'material', descendente) == ids[:cargados]
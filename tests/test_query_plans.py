@@ -0,0 +1,120 @@
+"""
+Planes de consulta de los filtros del listado: ningún recorrido completo de productos
+"""
+
+import itertools
+import random
+from datetime import date, datetime
+
+import pytest
+
+from database.db_query import FiltroProductos
+
+# Una condición de cada tipo que soporta FiltroProductos
+CONDICIONES = {
+    'material': dict(materiales=['PETG']),
+    'materiales': dict(materiales=['PLA', 'ABS']),
+    'peso': dict(peso=(50, 200)),
+    'tiempo_impresion': dict(tiempo_impresion=(240, None)),
+    'peso_total': dict(peso_total=(50, 200)),
+    'tiempo_total': dict(tiempo_total=(480, None)),
+    'temperatura_cama': dict(temperatura_cama=(80, None)),
+    'temperatura_extrusor': dict(temperatura_extrusor=(None, 205)),
+    'fecha_creacion': dict(fecha_creacion=(date.today(), None)),
+    'fecha_modificacion': dict(fecha_modificacion=(None, date.today())),
+    'alguno': dict(alguno=['#FF0000', '#0000FF']),
+    'todos': dict(todos=['#FF0000', '#000000']),
+}
+
+# colores_ninguno es un anti-join: solo tiene sentido junto a otra condición
+NINGUNO = dict(ninguno=['#000000'])
+
+COMBINACIONES = (
+    [(nombre,) for nombre in CONDICIONES]
+    + list(itertools.combinations(CONDICIONES, 2))
+    + [('material', 'tiempo_impresion', 'temperatura_cama', 'peso')]
+)
+
+COLORES = ['#FF0000', '#0000FF', '#000000', '#FFFFFF', '#00FF00', '#FFFF00']
+
+
+def armar_filtro(nombres, con_ninguno=False):
+    argumentos = {}
+    for nombre in nombres:
+        argumentos.update(CONDICIONES[nombre])
+    if con_ninguno:
+        argumentos.update(NINGUNO)
+    return FiltroProductos.crear(**argumentos)
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['sin ANALYZE', 'con ANALYZE'])
+def catalogo(request, tmp_path_factory):
+    """Base con 5.000 productos, sin estadísticas del planificador y con ellas"""
+    from database.db_manager import DatabaseManager
+
+    db = DatabaseManager(str(tmp_path_factory.mktemp('planes') / 'productos.db'))
+    db.init_database()
+    rnd = random.Random(42)
+    ahora = datetime.now().isoformat()
+    with db.escritura.transaccion() as conn:
+        for numero in range(5000):
+            producto_id = conn.execute('''
+                INSERT INTO productos (nombre, peso, tiempo_impresion, material,
+                                       temperatura_extrusor, temperatura_cama,
+                                       fecha_creacion, fecha_modificacion)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (f'Producto {numero}', rnd.uniform(10, 300), rnd.randint(30, 900),
+                  rnd.choice(['PLA', 'PETG', 'ABS', 'TPU']), rnd.choice([200, 210, 230]),
+                  rnd.choice([50, 60, 80]), ahora, ahora)).lastrowid
+            for color in rnd.sample(COLORES, rnd.randint(1, 3)):
+                conn.execute('''
+                    INSERT INTO color_especificaciones (producto_id, color_hex, peso_color)
+                    VALUES (?, ?, ?)
+                ''', (producto_id, color, rnd.uniform(5, 100)))
+    if request.param:
+        db.get_connection().execute('ANALYZE')
+    yield db
+    db.close()
+
+
+def planes(db, funcion, *args):
+    """EXPLAIN QUERY PLAN de cada SELECT que ejecuta una función"""
+    conn = db.get_connection()
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        funcion(*args)
+    finally:
+        conn.set_trace_callback(None)
+    return [
+        (sentencia, [fila[3] for fila in conn.execute(f'EXPLAIN QUERY PLAN {sentencia}')])
+        for sentencia in sentencias if sentencia.lstrip().upper().startswith('SELECT')
+    ]
+
+
+def recorridos_completos(sentencias):
+    """
+    Pasos que recorren productos entera
+
+    Una página puede recorrer el índice de orden y detenerse al llenarse
+    (LIMIT): eso no es un recorrido completo.
+    """
+    return [
+        (paso, ' '.join(sentencia.split()))
+        for sentencia, plan in sentencias for paso in plan
+        if paso.split()[:2] in (['SCAN', 'p'], ['SCAN', 'productos'])
+        and not ('USING' in paso and 'INDEX' in paso and 'LIMIT' in sentencia)
+    ]
+
+
+@pytest.mark.parametrize('con_ninguno', [False, True], ids=['', 'sin negro'])
+@pytest.mark.parametrize('nombres', COMBINACIONES, ids=lambda nombres: '+'.join(nombres))
+def test_filtro_usa_indices(catalogo, nombres, con_ninguno):
+    filtro = armar_filtro(nombres, con_ninguno)
+    catalogo.cache.limpiar()
+
+    sentencias = (planes(catalogo, catalogo.contar_productos, filtro)
+                  + planes(catalogo, catalogo.obtener_pagina_productos, 100, None, 'nombre',
+                           False, True, filtro))
+
+    assert recorridos_completos(sentencias) == []
@@ -0,0 +1,85 @@
+"""
+Índice de texto: cada escritura de la aplicación reindexa el producto una vez
+"""
+
+import sqlite3
+
+import pytest
+
+from database.db_manager import DatabaseManager
+from models.producto import ColorEspecificacion, Producto
+
+
+@pytest.fixture(autouse=True)
+def con_fts(db):
+    if not db.search_index.disponible(db.get_connection()):
+        pytest.skip("SQLite sin FTS5")
+
+
+def cambios_por_piezas(db, editadas):
+    """Filas que cambia (total_changes) renombrar ``editadas`` de las cinco piezas de un producto"""
+    color = ColorEspecificacion(color_hex='#FF0000', piezas=[f'pieza{n}' for n in range(5)])
+    producto_id = db.crear_producto(Producto(nombre='Caja', colores_especificaciones=[color]))
+    producto = db.obtener_producto(producto_id)
+    for pieza in producto.colores_especificaciones[0].piezas_detalle[:editadas]:
+        pieza.nombre = f'{pieza.nombre}b'
+    producto.colores_especificaciones[0].set_piezas(producto.colores_especificaciones[0].piezas_detalle)
+
+    conn = db.get_connection()
+    antes = conn.total_changes
+    assert db.actualizar_producto_con_reporte(producto).piezas_actualizadas == editadas
+    return conn.total_changes - antes
+
+
+def producto_con_piezas(nombre='Caja'):
+    return Producto(nombre=nombre, colores_especificaciones=[
+        ColorEspecificacion(color_hex='#FF0000', nombre_color='Rojo', piezas=['base', 'tapa', 'asa']),
+        ColorEspecificacion(color_hex='#0000FF', nombre_color='Azul', piezas=['bisagra']),
+    ])
+
+
+def test_actualizar_reindexa_una_vez(db, tmp_path):
+    sin_indice = DatabaseManager(str(tmp_path / 'sin_fts.db'))
+    sin_indice.search_index._disponible = False
+    sin_indice.init_database()
+    try:
+        # Lo que escribe el índice de texto no crece con las piezas tocadas
+        indice = [cambios_por_piezas(db, n) - cambios_por_piezas(sin_indice, n) for n in (1, 5)]
+    finally:
+        sin_indice.close()
+    assert indice[0] == indice[1] > 0
+
+
+def test_crear_y_actualizar_dejan_el_indice_al_dia(db):
+    producto_id = db.crear_producto(producto_con_piezas())
+    assert db.buscar_ids_productos('bisagra', aproximada=False) == [producto_id]
+    assert db.buscar_ids_productos('azul', aproximada=False) == [producto_id]
+
+    producto = db.obtener_producto(producto_id)
+    rojo = next(spec for spec in producto.colores_especificaciones if spec.color_hex == '#FF0000')
+    rojo.piezas = ['soporte', 'pata', 'asa']
+    producto.colores_especificaciones = [rojo, ColorEspecificacion(color_hex='#00FF00', nombre_color='Verde')]
+    db.actualizar_producto(producto)
+
+    assert db.buscar_ids_productos('soporte', aproximada=False) == [producto_id]
+    assert db.buscar_ids_productos('verde', aproximada=False) == [producto_id]
+    assert db.buscar_ids_productos('bisagra', aproximada=False) == []
+    assert db.buscar_ids_productos('tapa', aproximada=False) == []
+
+    db.eliminar_producto(producto_id)
+    assert db.buscar_ids_productos('caja', aproximada=False) == []
+    assert db.get_connection().execute('SELECT COUNT(*) FROM indexado_diferido').fetchone()[0] == 0
+
+
+def test_otros_programas_siguen_pasando_por_los_triggers(db):
+    producto_id = db.crear_producto(producto_con_piezas())
+    color_id = db.get_connection().execute(
+        "SELECT id FROM color_especificaciones WHERE color_hex = '#0000FF'").fetchone()[0]
+
+    otra = sqlite3.connect(str(db.db_path))
+    with otra:
+        otra.execute("INSERT INTO color_piezas (color_especificacion_id, nombre_pieza) VALUES (?, 'engranaje')",
+                     (color_id,))
+    otra.close()
+
+    assert db.buscar_ids_productos('engranaje', aproximada=False) == [producto_id]
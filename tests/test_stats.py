@@ -0,0 +1,90 @@
+"""
+Estadísticas mantenidas por triggers frente a un recálculo con COUNT/SUM
+"""
+
+from models.producto import ColorEspecificacion, Producto
+
+
+def mantenidas(conn):
+    return (
+        conn.execute('SELECT total_productos, suma_tiempo, productos_con_tiempo '
+                     'FROM estadisticas WHERE id = 1').fetchone(),
+        dict(conn.execute('SELECT material, productos FROM estadisticas_material')),
+        dict(conn.execute('SELECT color_hex, referencias FROM estadisticas_color')),
+        dict(conn.execute('SELECT colores, productos FROM estadisticas_colores_producto')),
+    )
+
+
+def recalculadas(conn):
+    return (
+        conn.execute('SELECT COUNT(*), COALESCE(SUM(tiempo_impresion), 0), COUNT(tiempo_impresion) '
+                     'FROM productos').fetchone(),
+        dict(conn.execute("SELECT COALESCE(material, ''), COUNT(*) FROM productos "
+                          "GROUP BY COALESCE(material, '')")),
+        dict(conn.execute('SELECT color_hex, COUNT(*) FROM color_especificaciones GROUP BY color_hex')),
+        dict(conn.execute('''
+            SELECT colores, COUNT(*) FROM (
+                SELECT COUNT(ce.id) AS colores FROM productos p
+                LEFT JOIN color_especificaciones ce ON ce.producto_id = p.id
+                GROUP BY p.id
+            ) GROUP BY colores
+        ''')),
+    )
+
+
+def producto(nombre, material, tiempo, *colores):
+    return Producto(nombre=nombre, material=material, tiempo_impresion=tiempo,
+                    colores_especificaciones=[ColorEspecificacion(color_hex=c, peso_color=5.0, piezas=['base'])
+                                              for c in colores])
+
+
+def assert_al_dia(db):
+    conn = db.get_connection()
+    assert mantenidas(conn) == recalculadas(conn)
+    assert db.stats.verificar(conn) == []
+
+
+def test_estadisticas_siguen_a_altas_cambios_y_bajas(db):
+    caja = db.crear_producto(producto('Caja', 'PLA', 90, '#FF0000', '#0000FF'))
+    tapa = db.crear_producto(producto('Tapa', 'PETG', 30, '#FF0000'))
+    clip = db.crear_producto(producto('Clip', 'PLA', 10))
+    assert_al_dia(db)
+
+    # Material, tiempo y colores (uno cambia de hex, otro se quita, otro se agrega)
+    cambiado = db.obtener_producto(caja)
+    cambiado.material, cambiado.tiempo_impresion = 'ABS', 120
+    rojo, azul = sorted(cambiado.colores_especificaciones, key=lambda c: c.color_hex, reverse=True)
+    rojo.color_hex = '#00FF00'
+    cambiado.colores_especificaciones = [rojo, ColorEspecificacion(color_hex='#000000', peso_color=1.0)]
+    db.actualizar_producto(cambiado)
+    assert_al_dia(db)
+
+    # Escrituras de otro programa, sin pasar por DatabaseManager
+    with db.escritura.transaccion() as conn:
+        conn.execute('UPDATE productos SET tiempo_impresion = NULL, material = NULL WHERE id = ?', (clip,))
+        conn.execute("INSERT INTO color_especificaciones (producto_id, color_hex) VALUES (?, '#0000FF')",
+                     (clip,))
+        conn.execute('UPDATE color_especificaciones SET producto_id = ? WHERE producto_id = ?', (tapa, caja))
+    assert_al_dia(db)
+
+    db.eliminar_producto(tapa)
+    assert_al_dia(db)
+    db.eliminar_producto(caja)
+    db.eliminar_producto(clip)
+    assert_al_dia(db)
+    assert mantenidas(db.get_connection())[0] == (0, 0, 0)
+
+
+def test_estadisticas_tras_carga_masiva(db):
+    db.crear_producto(producto('Previo', 'PLA', 15, '#FF0000'))
+    ids = db.crear_productos_bulk(
+        (producto(f'Lote {n}', ('PLA', 'PETG', 'ABS')[n % 3], n if n % 4 else None,
+                  *['#FF0000', '#00FF00', '#0000FF'][:n % 4])
+         for n in range(50)),
+        tamano_lote=16
+    )
+    assert_al_dia(db)
+
+    for producto_id in ids[::5]:
+        db.eliminar_producto(producto_id)
+    assert_al_dia(db)
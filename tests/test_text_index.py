@@ -0,0 +1,99 @@
+"""
+IndiceInvertido: búsqueda por prefijos y cambios incrementales
+"""
+
+from utils.text_index import IndiceInvertido, similitud
+
+
+def fila(producto_id, nombre, descripcion='', material='PLA', colores_hex='', piezas=''):
+    return (producto_id, nombre, descripcion, material, '', colores_hex, '', piezas)
+
+
+def catalogo():
+    return IndiceInvertido.desde_filas([
+        fila(1, 'Soporte de teléfono', 'Para el escritorio', colores_hex='#FF0000'),
+        fila(2, 'Soporte de auriculares', 'Con base ancha', 'PETG', '#0000FF,#FF0000'),
+        fila(3, 'Engranaje helicoidal', 'Repuesto del soporte', 'PETG', '#000000'),
+        fila(4, 'Caja', 'Organizador', piezas='tapa base'),
+    ])
+
+
+def test_cada_palabra_es_un_prefijo_y_tienen_que_estar_todas():
+    indice = catalogo()
+
+    assert indice.buscar('sop') == [2, 1, 3]  # Primero en el nombre, cada grupo por nombre
+    assert indice.buscar('sop tel') == [1]
+    assert indice.buscar('SOPORTE petg') == [3, 2]  # Ninguno tiene las dos en el nombre
+    assert indice.buscar('telefono') == [1]  # Sin tildes
+    assert indice.buscar('sop caja') == []
+    assert indice.buscar('tapa') == [4]  # Piezas
+    assert indice.buscar('') == []
+
+
+def test_busqueda_con_colores_y_limite():
+    indice = catalogo()
+
+    assert indice.buscar('soporte', alguno=['#FF0000']) == [2, 1]
+    assert indice.buscar('soporte', todos=['#FF0000', '#0000FF']) == [2]
+    assert indice.buscar('soporte', ninguno=['#FF0000']) == [3]
+    assert indice.buscar('soporte', limite=1) == [2]
+
+
+def test_agregar_quitar_y_reemplazar():
+    indice = catalogo()
+    assert indice.buscar('sop') == [2, 1, 3]  # Arma el vocabulario ordenado
+
+    indice.agregar(fila(5, 'Sopapa de silicona', material='TPU'))
+    assert indice.buscar('sop') == [5, 2, 1, 3]
+    assert indice.buscar('silic') == [5]
+
+    indice.quitar(1)
+    assert 1 not in indice and len(indice) == 4
+    assert indice.buscar('telefono') == []
+    assert indice.buscar('escritorio') == []
+    assert indice.ids_con_colores(alguno=['#FF0000']) == {2}
+
+    # Volver a agregar un ID reemplaza sus palabras y sus colores
+    indice.agregar(fila(2, 'Gancho', colores_hex='#00FF00'))
+    assert indice.buscar('auriculares') == []
+    assert indice.buscar('gan') == [2]
+    assert indice.ids_con_colores(alguno=['#FF0000']) == set()
+
+    indice.actualizar([fila(6, 'Soporte de pared')], eliminados=[3, 99])
+    assert indice.buscar('sop') == [5, 6]
+    assert len(indice) == 4
+
+
+def test_errores_de_tipeo():
+    indice = catalogo()
+
+    assert similitud('sopote', 'soporte') == 0.5
+    assert indice.palabras_similares('sopote')[0] == ('soporte', 0.5)
+    assert indice.buscar('sopote') == []
+    # La palabra corregida sale de los nombres pero vale en cualquier campo
+    assert indice.buscar_aproximado('sopote') == [3, 2, 1]
+    assert indice.buscar_aproximado('sopote telfono') == [1]
+    assert indice.buscar_aproximado('engranje') == [3]
+    assert indice.buscar_aproximado('sopor') == [3, 2, 1]  # Como prefijo, igual que buscar
+    assert indice.buscar_aproximado('xyzw') == []
+    # Los números no se corrigen
+    assert indice.palabras_similares('1234') == []
+
+    # La palabra exacta vale más que las parecidas
+    indice.agregar(fila(8, 'Sopote raro'))
+    assert indice.buscar_aproximado('sopote') == [8, 3, 2, 1]
+
+
+def test_palabras_parecidas_siguen_a_los_cambios():
+    indice = catalogo()
+    indice.quitar(3)
+    assert [palabra for palabra, _ in indice.palabras_similares('engranje')] == []
+
+    indice.agregar(fila(7, 'Engranaje recto'))
+    assert indice.buscar_aproximado('engranje') == [7]
+
+    # "soporte" sigue en el nombre de 2 aunque se quite 1
+    indice.quitar(1)
+    assert indice.buscar_aproximado('sopote') == [2]
+    indice.quitar(2)
+    assert indice.palabras_similares('sopote') == []
@@ -0,0 +1,87 @@
+"""
+Totales por producto en SQL frente a Producto.get_peso_total/get_tiempo_total
+"""
+
+import pytest
+
+from models.pieza import Pieza
+from models.producto import ColorEspecificacion, Producto
+
+
+def pieza(nombre, peso, tiempo):
+    detalle = Pieza.from_simple_name(nombre)
+    detalle.peso_g, detalle.tiempo_impresion_min = peso, tiempo
+    return detalle
+
+
+def color(color_hex, peso_color=0.0, tiempo_adicional=0, piezas=()):
+    especificacion = ColorEspecificacion(color_hex=color_hex, peso_color=peso_color,
+                                         tiempo_adicional=tiempo_adicional)
+    especificacion.set_piezas(list(piezas))
+    return especificacion
+
+
+def assert_como_el_modelo(db, producto_id):
+    peso_total, tiempo_total = db.get_connection().execute(
+        'SELECT peso_total, tiempo_total FROM productos WHERE id = ?', (producto_id,)).fetchone()
+    db.cache.limpiar()  # Las escrituras directas no tocan fecha_modificacion
+    producto = db.obtener_producto(producto_id)
+    assert peso_total == pytest.approx(producto.get_peso_total())
+    assert tiempo_total == producto.get_tiempo_total()
+
+
+def test_totales_tras_actualizar_por_diferencias(db):
+    producto_id = db.crear_producto(Producto(
+        nombre='Caja', peso=12.0, tiempo_impresion=45,
+        colores_especificaciones=[
+            color('#FF0000', 30.0, 5, [pieza('base', 20.0, 60), pieza('tapa', 8.5, 25)]),
+            color('#0000FF', 15.0, 3),
+        ]
+    ))
+    assert_como_el_modelo(db, producto_id)
+
+    def editar(cambio):
+        producto = db.obtener_producto(producto_id)
+        cambio(producto)
+        assert db.actualizar_producto_con_reporte(producto).encontrado
+        assert_como_el_modelo(db, producto_id)
+
+    def pesar_tapa(producto):
+        rojo = producto.colores_especificaciones[0]
+        base, tapa = rojo.piezas_detalle
+        tapa.peso_g, tapa.tiempo_impresion_min = 11.0, 40
+        rojo.set_piezas([base, tapa, pieza('bisagra', 2.0, 10)])
+
+    def cambiar_colores(producto):
+        producto.colores_especificaciones[1].tiempo_adicional = 9
+        producto.colores_especificaciones.append(color('#00FF00', 4.0, 2, [pieza('clip', 1.5, 0)]))
+
+    def quitar_piezas(producto):
+        # Sin piezas con peso ni tiempo: cuentan peso_color y tiempo_impresion
+        for especificacion in producto.colores_especificaciones:
+            especificacion.set_piezas([])
+        producto.tiempo_impresion = 50
+
+    def quitar_colores(producto):
+        producto.colores_especificaciones = []
+        producto.peso = 7.5
+
+    for cambio in (pesar_tapa, cambiar_colores, quitar_piezas, quitar_colores):
+        editar(cambio)
+
+
+def test_totales_tras_escrituras_directas(db):
+    producto_id = db.crear_producto(Producto(
+        nombre='Soporte', tiempo_impresion=20,
+        colores_especificaciones=[color('#000000', 10.0, 4, [pieza('brazo', 6.0, 30)])]
+    ))
+
+    with db.escritura.transaccion() as conn:
+        conn.execute('UPDATE color_piezas SET peso_pieza = 9.0, tiempo_impresion_pieza = 35')
+        conn.execute("UPDATE color_especificaciones SET tiempo_adicional = 6")
+    assert_como_el_modelo(db, producto_id)
+
+    with db.escritura.transaccion() as conn:
+        conn.execute('DELETE FROM color_piezas')
+    assert_como_el_modelo(db, producto_id)
+    assert db.totales.verificar(db.get_connection()) == []
@@ -0,0 +1,45 @@
+"""
+DatabaseWorker: cierre sin cortar la escritura en curso
+"""
+
+import threading
+
+from database.db_worker import DatabaseWorker
+
+
+def test_cierra_su_conexion_al_detenerse(db):
+    worker = DatabaseWorker(al_detenerse=db.cerrar_conexion_hilo)
+    worker.enviar(db.get_connection).result(timeout=5)
+    assert len(db.connections._conexiones) == 2
+
+    worker.detener()
+    assert not worker.activo
+    assert len(db.connections._conexiones) == 1
+
+
+def test_detener_no_corta_la_transaccion_en_curso(db):
+    en_curso = threading.Event()
+    seguir = threading.Event()
+
+    def escribir():
+        with db.escritura.transaccion() as conn:
+            conn.execute("INSERT INTO productos (nombre) VALUES ('Durante el cierre')")
+            en_curso.set()
+            seguir.wait(5)
+
+    worker = DatabaseWorker(al_detenerse=db.cerrar_conexion_hilo)
+    futuro = worker.enviar(escribir)
+    assert en_curso.wait(5)
+
+    # Se agota la espera de detener: el hilo sigue en la transacción
+    worker.detener(timeout=0.1)
+    assert worker.activo
+
+    seguir.set()
+    worker.esperar()
+    futuro.result(timeout=0)
+    assert not worker.activo
+
+    conn = db.get_connection()
+    assert conn.execute(
+        "SELECT COUNT(*) FROM productos WHERE nombre = 'Durante el cierre'").fetchone()[0] == 1
@@ -182,17 +182,26 @@ class ModernWidgets:
 class ModernTreeview:
     """Treeview moderno con funcionalidades adicionales"""
 
-    def __init__(self, parent, columns, colors=None, fonts=None):
+    def __init__(self, parent, columns, colors=None, fonts=None, key_column=None):
         self.colors = colors or ColorPalette.get_colors_dict()
         self.fonts = fonts or {'body': ('Segoe UI', 10)}
 
+        # Columna cuyo valor identifica cada fila (permite sync_rows)
+        self.key_column = key_column
+        self._rows = {}
+
         # Crear Treeview
         self.tree = ttk.Treeview(parent, columns=columns, show='tree headings',
                                  style='Modern.Treeview', height=15)
 
         # Configurar scrollbar
         self.vsb = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=self.vsb.set)
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+
+        # Aviso al llegar al final (para cargar más filas)
+        self.on_scroll_end = None
+        self.scroll_end_threshold = 0.95
+        self._scroll_end_pending = False
 
         # Tags para colores alternados
         self.tree.tag_configure('oddrow', background=self.colors['bg'])
@@ -229,11 +238,84 @@ class ModernTreeview:
         # Limpiar
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._rows.clear()
+
+        self.append_rows(data_list)
+
+    def append_rows(self, data_list):
+        """Agregar filas al final sin borrar las existentes"""
+        inicio = len(self.tree.get_children())
 
         # Poblar con colores alternados
-        for i, item_data in enumerate(data_list):
+        for i, item_data in enumerate(data_list, start=inicio):
+            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+            clave = self._row_key(item_data)
+            self.tree.insert('', 'end', iid=clave, values=item_data, tags=(tag,))
+            if clave is not None:
+                self._rows[clave] = (tuple(item_data), tag)
+
+    def sync_rows(self, data_list):
+        """
+        Llevar el treeview a data_list tocando solo las filas que cambian
+
+        Las filas se identifican por key_column: las que ya no están se
+        borran, las nuevas se insertan en su posición y las existentes solo
+        se actualizan si cambiaron sus valores o su lugar.
+        """
+        if self.key_column is None:
+            self.clear_and_populate(data_list)
+            return
+
+        claves = [self._row_key(item_data) for item_data in data_list]
+        sobrantes = set(self.tree.get_children()) - set(claves)
+        if sobrantes:
+            self.tree.delete(*sobrantes)
+            for clave in sobrantes:
+                self._rows.pop(clave, None)
+
+        actuales = list(self.tree.get_children())
+        for i, (clave, item_data) in enumerate(zip(claves, data_list)):
             tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert('', 'end', values=item_data, tags=(tag,))
+            valores = tuple(item_data)
+            anterior = self._rows.get(clave)
+
+            if anterior is None:
+                self.tree.insert('', i, iid=clave, values=valores, tags=(tag,))
+                actuales.insert(i, clave)
+            else:
+                if i >= len(actuales) or actuales[i] != clave:
+                    self.tree.move(clave, '', i)
+                    actuales.remove(clave)
+                    actuales.insert(i, clave)
+                if anterior != (valores, tag):
+                    self.tree.item(clave, values=valores, tags=(tag,))
+            self._rows[clave] = (valores, tag)
+
+    def _row_key(self, item_data):
+        """iid de una fila (None para que Tk lo genere si no hay key_column)"""
+        if self.key_column is None:
+            return None
+        return str(item_data[self.key_column])
+
+    def set_on_scroll_end(self, callback, threshold=0.95):
+        """Configurar callback para cuando el scroll llega cerca del final"""
+        self.on_scroll_end = callback
+        self.scroll_end_threshold = threshold
+
+    def _on_yscroll(self, first, last):
+        """Actualizar scrollbar y avisar si se llegó al final de la lista"""
+        self.vsb.set(first, last)
+
+        if self.on_scroll_end and not self._scroll_end_pending and float(last) >= self.scroll_end_threshold:
+            self._scroll_end_pending = True
+            self.tree.after_idle(self._run_scroll_end)
+
+    def _run_scroll_end(self):
+        """Ejecutar el callback de fin de scroll fuera del evento de Tk"""
+        try:
+            self.on_scroll_end()
+        finally:
+            self._scroll_end_pending = False
 
     def get_selected_values(self):
         """Obtener valores del item seleccionado"""
@@ -10,7 +10,7 @@ from ..style.color_palette import ColorPalette
 class ProductListComponent:
     """Componente moderno para la lista de productos"""
 
-    def __init__(self, parent, on_selection_change=None, on_double_click=None):
+    def __init__(self, parent, on_selection_change=None, on_double_click=None, on_load_more=None):
         self.parent = parent
         self.colors = ColorPalette.get_colors_dict()
         self.fonts = {
@@ -21,11 +21,16 @@ class ProductListComponent:
         # Callbacks
         self.on_selection_change = on_selection_change
         self.on_double_click = on_double_click
+        self.on_load_more = on_load_more
 
         # Referencias
         self.product_count_label = None
         self.tree_wrapper = None
 
+        # Contadores para el encabezado
+        self.productos_mostrados = 0
+        self.total_productos = None
+
         self.create_product_list()
 
     def create_product_list(self):
@@ -72,7 +77,8 @@ class ProductListComponent:
         columns = ('ID', 'Nombre', 'Colores', 'Material', 'Tiempo', 'Peso')
 
         # Crear Treeview moderno
-        self.tree_wrapper = ModernTreeview(tree_container, columns, self.colors, self.fonts)
+        self.tree_wrapper = ModernTreeview(tree_container, columns, self.colors, self.fonts,
+                                           key_column=0)
 
         # Configurar columnas
         column_config = {
@@ -92,6 +98,10 @@ class ProductListComponent:
         self.tree_wrapper.tree.bind('<<TreeviewSelect>>', self._on_selection_change)
         self.tree_wrapper.tree.bind('<Double-Button-1>', self._on_double_click)
 
+        # Pedir la siguiente página al llegar al final
+        if self.on_load_more:
+            self.tree_wrapper.set_on_scroll_end(self.on_load_more)
+
     def pack(self, **kwargs):
         """Empaquetar el componente"""
         self.main_frame.pack(**kwargs)
@@ -102,58 +112,53 @@ class ProductListComponent:
         self.main_frame.grid(**kwargs)
         return self.main_frame
 
-    def update_product_list(self, productos, colores_filtrados=None):
-        """Actualizar lista de productos"""
-        # Filtrar productos si hay filtros de color activos
-        productos_mostrar = productos
-
-        if colores_filtrados:
-            productos_mostrar = [
-                p for p in productos
-                if self._product_has_filtered_colors(p, colores_filtrados)
-            ]
-
-        # Preparar datos para el treeview
-        productos_data = []
-        for producto in productos_mostrar:
-            # Formatear colores
-            colores_str = self._format_product_colors(producto)
-
-            valores = (
-                producto.id,
-                producto.nombre,
-                colores_str,
-                producto.material,
-                producto.tiempo_impresion_formato(),
-                f"{producto.get_peso_total()}g"
-            )
-            productos_data.append(valores)
-
-        # Actualizar treeview
-        self.tree_wrapper.clear_and_populate(productos_data)
+    def update_product_list(self, productos, total=None):
+        """Actualizar lista de productos (ProductoResumen ya filtrados)"""
+        # Actualizar treeview (solo las filas que cambiaron)
+        self.tree_wrapper.sync_rows([self._build_row(p) for p in productos])
 
         # Actualizar contador
-        self.product_count_label.config(text=f"{len(productos_mostrar)} productos")
-
-    def _product_has_filtered_colors(self, producto, colores_filtrados):
-        """Verificar si el producto tiene alguno de los colores filtrados"""
-        if hasattr(producto, 'colores_especificaciones') and producto.colores_especificaciones:
-            return any(c.color_hex in colores_filtrados for c in producto.colores_especificaciones)
-        elif hasattr(producto, 'color') and producto.color:
-            return producto.color in colores_filtrados
-        return False
+        self.productos_mostrados = len(productos)
+        self.total_productos = total
+        self._update_count_label()
+
+    def append_products(self, productos):
+        """Agregar una página de productos al final de la lista"""
+        self.tree_wrapper.append_rows([self._build_row(p) for p in productos])
+
+        self.productos_mostrados += len(productos)
+        self._update_count_label()
+
+    def _build_row(self, producto):
+        """Preparar los valores de una fila del treeview"""
+        return (
+            producto.id,
+            producto.nombre,
+            self._format_product_colors(producto),
+            producto.material,
+            producto.tiempo_impresion_formato(),
+            f"{producto.get_peso_total()}g"
+        )
+
+    def _update_count_label(self):
+        """Actualizar contador de productos del encabezado"""
+        if self.total_productos and self.total_productos > self.productos_mostrados:
+            texto = f"{self.productos_mostrados} de {self.total_productos} productos"
+        else:
+            texto = f"{self.productos_mostrados} productos"
+        self.product_count_label.config(text=texto)
 
     def _format_product_colors(self, producto):
         """Formatear colores del producto para mostrar"""
-        if hasattr(producto, 'colores_especificaciones') and producto.colores_especificaciones:
+        if producto.colores:
             colores_str = ", ".join([
-                c.nombre_color or c.color_hex
-                for c in producto.colores_especificaciones[:3]
+                nombre_color or color_hex
+                for color_hex, nombre_color, _ in producto.colores[:3]
             ])
-            if len(producto.colores_especificaciones) > 3:
-                colores_str += f" (+{len(producto.colores_especificaciones) - 3})"
+            if len(producto.colores) > 3:
+                colores_str += f" (+{len(producto.colores) - 3})"
             return colores_str
-        elif hasattr(producto, 'color') and producto.color:
+        elif producto.color:
             return producto.color
         else:
             return "Sin color"
@@ -9,7 +9,7 @@ from ..style.color_palette import ColorPalette
 class SidebarComponent:
     """Componente moderno para el sidebar de la aplicación"""
 
-    def __init__(self, parent, callbacks=None):
+    def __init__(self, parent, callbacks=None, search_debounce_ms=250):
         self.parent = parent
         self.colors = ColorPalette.get_colors_dict()
         self.widgets = ModernWidgets()
@@ -19,6 +19,10 @@ class SidebarComponent:
         self.search_var = tk.StringVar()
         self.colores_filtrados = []
 
+        # La búsqueda se lanza cuando se deja de escribir por search_debounce_ms
+        self.search_debounce_ms = search_debounce_ms
+        self._busqueda_programada = None
+
         # Referencias a botones para habilitar/deshabilitar
         self.btn_editar = None
         self.btn_ver = None
@@ -297,7 +301,14 @@ class SidebarComponent:
 
     # Métodos de eventos (callbacks)
     def _on_search_change(self):
-        """Manejar cambio en la búsqueda"""
+        """Manejar cambio en la búsqueda: reprogramar la búsqueda en cada tecla"""
+        if self._busqueda_programada is not None:
+            self.parent.after_cancel(self._busqueda_programada)
+        self._busqueda_programada = self.parent.after(self.search_debounce_ms, self._run_search)
+
+    def _run_search(self):
+        """Lanzar la búsqueda programada con el texto actual"""
+        self._busqueda_programada = None
         if 'on_search' in self.callbacks:
             search_term = self.search_var.get()
             # No buscar el placeholder
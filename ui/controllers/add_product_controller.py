@@ -4,6 +4,7 @@ Controlador para la ventana de agregar productos - CORREGIDO
 import tkinter as tk
 from typing import Dict, Any, Optional, Callable
 from models.producto import Producto
+from database.db_escritura import BaseOcupadaError
 from utils.file_utils import FileUtils
 from ..validators.product_validator import ProductValidator
 
@@ -11,8 +12,15 @@ from ..validators.product_validator import ProductValidator
 class AddProductController:
     """Controlador para manejar la lógica de agregar productos"""
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, bridge=None):
+        """
+        Args:
+            db_manager: Gestor de base de datos
+            bridge: TkBridge opcional; con él el producto se guarda en el hilo
+                de base de datos y on_success/on_error llegan después
+        """
         self.db_manager = db_manager
+        self.bridge = bridge
         self.validator = ProductValidator()
 
         # Variables del formulario
@@ -31,6 +39,7 @@ class AddProductController:
 
         # Estado
         self.producto_creado = False
+        self.guardando = False  # Hay un guardado en el hilo de base de datos
 
     def _create_variables(self) -> Dict[str, tk.Variable]:
         """Crear variables para los campos del formulario"""
@@ -164,8 +173,14 @@ class AddProductController:
         return True
 
     def create_product(self) -> bool:
-        """Crear el producto"""
-        if not self.validate_complete_form():
+        """
+        Crear el producto
+
+        Returns:
+            False si no se pudo; con puente, True significa que el guardado
+            está en curso y el resultado llega a on_success/on_error
+        """
+        if self.guardando or not self.validate_complete_form():
             return False
 
         try:
@@ -201,19 +216,35 @@ class AddProductController:
                         return False
 
             # Guardar en base de datos
-            producto_id = self.db_manager.crear_producto(producto)
-
-            if producto_id:
-                self.producto_creado = True
-                self._handle_success("Producto creado exitosamente")
+            if self.bridge is not None:
+                self.guardando = True
+                self.bridge.ejecutar(self.db_manager.crear_producto, producto,
+                                     al_terminar=self._producto_guardado, al_fallar=self._error_al_guardar)
                 return True
-            else:
-                self._handle_error("No se pudo crear el producto en la base de datos")
-                return False
+            return self._producto_guardado(self.db_manager.crear_producto(producto))
 
         except Exception as e:
-            self._handle_error(f"Error al crear producto: {str(e)}")
-            return False
+            return self._error_al_guardar(e)
+
+    def _producto_guardado(self, producto_id) -> bool:
+        """Notificar el resultado del guardado"""
+        self.guardando = False
+        if producto_id:
+            self.producto_creado = True
+            self._handle_success("Producto creado exitosamente")
+            return True
+        self._handle_error("No se pudo crear el producto en la base de datos")
+        return False
+
+    def _error_al_guardar(self, error: Exception) -> bool:
+        """Notificar un guardado fallido"""
+        self.guardando = False
+        if isinstance(error, BaseOcupadaError):
+            self._handle_error("La base de datos está ocupada por otro equipo. "
+                               "Espere unos segundos y vuelva a guardar.")
+        else:
+            self._handle_error(f"Error al crear producto: {str(error)}")
+        return False
 
     def _save_product_image(self, image_path: str, product_name: str) -> Optional[str]:
         """Guardar imagen del producto"""
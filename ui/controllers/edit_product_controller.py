@@ -4,14 +4,23 @@ Controlador para la edición de productos - Refactorizado
 from typing import Dict, List, Optional, Callable
 from datetime import datetime
 from models.producto import Producto
+from database.db_escritura import BaseOcupadaError
 from utils.file_utils import FileUtils
 
 
 class EditProductController:
     """Controlador para manejar la lógica de edición de productos"""
 
-    def __init__(self, db_manager, producto: Producto):
+    def __init__(self, db_manager, producto: Producto, bridge=None):
+        """
+        Args:
+            db_manager: Gestor de base de datos
+            producto: Producto a editar
+            bridge: TkBridge opcional; con él los cambios se guardan en el hilo
+                de base de datos y on_save_success/on_save_error llegan después
+        """
         self.db_manager = db_manager
+        self.bridge = bridge
         self.producto = producto
         self.original_producto = self._create_producto_copy(producto)
 
@@ -19,6 +28,7 @@ class EditProductController:
         self.cambios_detectados = []
         self.nueva_imagen = False
         self.imagen_temporal = None
+        self.guardando = False  # Hay un guardado en el hilo de base de datos
 
         # Callbacks
         self.on_change_detected = None
@@ -172,7 +182,16 @@ class EditProductController:
         return len(errors) == 0, errors
 
     def save_changes(self) -> bool:
-        """Guardar cambios del producto"""
+        """
+        Guardar cambios del producto
+
+        Returns:
+            False si no se pudo; con puente, True significa que el guardado
+            está en curso y el resultado llega a on_save_success/on_save_error
+        """
+        if self.guardando:
+            return False
+
         if not self.has_changes():
             if self.on_save_error:
                 self.on_save_error("No hay cambios para guardar")
@@ -194,26 +213,44 @@ class EditProductController:
             self.producto.fecha_modificacion = datetime.now()
 
             # Guardar en base de datos
-            success = self.db_manager.actualizar_producto(self.producto)
-
-            if success:
-                # Actualizar estado original
-                self.original_producto = self._create_producto_copy(self.producto)
-                self.cambios_detectados.clear()
-                self.nueva_imagen = False
-
-                if self.on_save_success:
-                    self.on_save_success("Producto actualizado exitosamente")
+            if self.bridge is not None:
+                self.guardando = True
+                self.bridge.ejecutar(self.db_manager.actualizar_producto, self.producto,
+                                     al_terminar=self._cambios_guardados, al_fallar=self._error_al_guardar)
                 return True
-            else:
-                if self.on_save_error:
-                    self.on_save_error("No se pudo actualizar el producto en la base de datos")
-                return False
+            return self._cambios_guardados(self.db_manager.actualizar_producto(self.producto))
 
         except Exception as e:
-            if self.on_save_error:
-                self.on_save_error(f"Error al guardar cambios: {str(e)}")
-            return False
+            return self._error_al_guardar(e)
+
+    def _cambios_guardados(self, success: bool) -> bool:
+        """Notificar el resultado del guardado"""
+        self.guardando = False
+        if success:
+            # Actualizar estado original
+            self.original_producto = self._create_producto_copy(self.producto)
+            self.cambios_detectados.clear()
+            self.nueva_imagen = False
+
+            if self.on_save_success:
+                self.on_save_success("Producto actualizado exitosamente")
+            return True
+
+        if self.on_save_error:
+            self.on_save_error("No se pudo actualizar el producto en la base de datos")
+        return False
+
+    def _error_al_guardar(self, error: Exception) -> bool:
+        """Notificar un guardado fallido"""
+        self.guardando = False
+        if self.on_save_error:
+            if isinstance(error, BaseOcupadaError):
+                # Otro equipo está guardando: los cambios siguen en el formulario
+                self.on_save_error("La base de datos está ocupada por otro equipo. "
+                                   "Espere unos segundos y vuelva a guardar.")
+            else:
+                self.on_save_error(f"Error al guardar cambios: {str(error)}")
+        return False
 
     def _handle_image_update(self):
         """Manejar actualización de imagen"""
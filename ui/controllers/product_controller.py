@@ -1,144 +1,552 @@
 """
 Controlador para manejar la lógica de productos
 """
-from typing import List, Optional
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
 from models.producto import Producto
+from models.producto_resumen import ProductoResumen
 from utils.file_utils import FileUtils
+from utils.text_index import IndiceInvertido
+from utils.color_space import IndiceColores
+from utils.bitmap_index import BitmapColores
+from database.db_query import FiltroProductos
+from .product_page_model import ProductPageModel
+
+
+@dataclass
+class TiemposBusqueda:
+    """Cuánto tardó cada paso de una búsqueda de texto, en segundos"""
+    termino: str
+    resultados: int
+    consulta: float  # Índice de texto: IDs que coinciden
+    carga: float  # Resúmenes de esos productos
+    render: float = 0.0  # Actualizar la lista en el hilo de Tk
+
+    def __str__(self):
+        return (f"{self.resultados} resultados para '{self.termino}' | "
+                f"consulta {self.consulta * 1000:.0f} ms · carga {self.carga * 1000:.0f} ms · "
+                f"render {self.render * 1000:.0f} ms")
 
 
 class ProductController:
     """Controlador para manejar operaciones de productos"""
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, tamano_pagina: int = 100, bridge=None,
+                 max_indice_memoria: int = 0, tolerancia_color: float = 0.0):
+        """
+        Args:
+            db_manager: Gestor de base de datos
+            tamano_pagina: Productos por página de la lista
+            bridge: TkBridge opcional; con él las consultas se hacen en el hilo
+                de base de datos y los callbacks llegan después, en el hilo de Tk
+            max_indice_memoria: Hasta cuántos productos se busca con un índice
+                en memoria en lugar de SQLite (0: nunca)
+            tolerancia_color: Diferencia ΔE*ab hasta la que un color en uso
+                cuenta como el filtrado ("#FE0101" por "#FF0000"; 0: exacto)
+        """
         self.db_manager = db_manager
-        self.productos_actuales: List[Producto] = []
+        self.bridge = bridge
+        self.max_indice_memoria = max_indice_memoria
+        self.indice: Optional[IndiceInvertido] = None
+        self.bitmaps_colores: Optional[BitmapColores] = None  # Los del índice, si lo hay
+        self._token_indice: Optional[int] = None  # Estado de la BD que reflejan índice y bitmaps
+        self._indice_pendiente = False  # Hay una actualización del índice en camino
+        self.tolerancia_color = tolerancia_color
+        self.indice_colores: Optional[IndiceColores] = None  # Colores de obtener_colores_disponibles
+        self._nombres_colores: Dict[str, str] = {}
+        self.modelo = ProductPageModel(db_manager, tamano_pagina)
+        self.productos_actuales: List[ProductoResumen] = []
         self.producto_seleccionado: Optional[Producto] = None
         self.colores_filtrados: List[str] = []
+        self.modo_colores: str = 'alguno'  # 'alguno', 'todos' o 'ninguno'
         self.termino_busqueda: str = ""
+        self._cargando = False
+        self._token_cambios: Optional[int] = None  # Estado de la BD que refleja la lista
+        self._refresco_pendiente = False
 
         # Callbacks para notificar cambios
         self.on_productos_changed = None
+        self.on_productos_appended = None
         self.on_selection_changed = None
         self.on_filters_changed = None
+        self.on_error = None
+        self.on_busqueda_medida = None
+
+    def _ejecutar(self, consulta: Callable, al_terminar: Callable, clave: Optional[str] = None,
+                  al_fallar: Optional[Callable] = None):
+        """
+        Ejecutar una consulta y aplicar su resultado
+
+        Sin puente todo ocurre en línea y los errores se propagan. Con puente
+        la consulta va al hilo de base de datos, ``al_terminar`` se llama en el
+        hilo de Tk y una solicitud con la misma clave descarta a la anterior.
+        """
+        if self.bridge is None:
+            al_terminar(consulta())
+            return
+
+        self.bridge.ejecutar(consulta, al_terminar=al_terminar,
+                             al_fallar=al_fallar or self._notificar_error, clave=clave)
 
     def cargar_productos(self):
-        """Cargar todos los productos desde la base de datos"""
+        """Cargar la primera página de productos (con la búsqueda y filtros actuales)"""
         try:
-            self.productos_actuales = self.db_manager.obtener_todos_productos()
-            self._notificar_cambio_productos()
-            return True, f"Se cargaron {len(self.productos_actuales)} productos"
+            self._recargar()
+            if self.bitmaps_colores is None:
+                self.construir_indice()
+            if self.bridge is not None:
+                return True, "Cargando productos..."
+            return True, f"Se cargaron {len(self.productos_actuales)} de {self.get_total_productos()} productos"
         except Exception as e:
             return False, f"Error al cargar productos: {str(e)}"
 
-    def buscar_productos(self, termino):
-        """Buscar productos por término"""
-        self.termino_busqueda = termino.strip()
+    def construir_filtro(self) -> FiltroProductos:
+        """
+        Filtro de la base de datos con el término y los colores actuales
+
+        Con tolerancia_color, "alguno" y "ninguno" incluyen los colores en
+        uso parecidos a los elegidos; "todos" sigue pidiendo cada color exacto.
+        """
+        colores = {self.modo_colores: self.colores_filtrados}
+        if self.tolerancia_color > 0 and self.indice_colores is not None and self.modo_colores != 'todos':
+            colores[self.modo_colores] = self.indice_colores.parecidos(self.colores_filtrados,
+                                                                       self.tolerancia_color)
+        return FiltroProductos.crear(texto=self.termino_busqueda, **colores)
+
+    def _reemplazada(self) -> bool:
+        """Indica si la consulta en curso ya fue reemplazada por otra con su misma clave"""
+        return self.bridge is not None and self.bridge.worker.reemplazada()
+
+    def _recargar(self):
+        """
+        Volver a consultar la vista actual; la base de datos aplica los filtros
+
+        Búsquedas, recargas y páginas comparten la clave 'listado', así que
+        solo se muestra la respuesta a la última petición. Una búsqueda de
+        texto que queda vieja entre la consulta y la carga no carga nada.
+        """
+        filtro = self.construir_filtro()
+        tiempos = None
+
+        if filtro.texto:
+            # Con el índice en memoria los IDs salen aquí mismo, sin SQLite;
+            # solo la carga de los resúmenes va al hilo de base de datos
+            ids_memoria = None
+            if self.indice is not None and not filtro.tiene_atributos:
+                colores = (filtro.colores_alguno, filtro.colores_todos, filtro.colores_ninguno)
+                inicio = time.perf_counter()
+                # Sin resultados exactos, se toleran errores de tipeo (como en SQLite)
+                ids_memoria = (self.indice.buscar(filtro.texto, *colores)
+                               or self.indice.buscar_aproximado(filtro.texto, *colores))
+                duracion_memoria = time.perf_counter() - inicio
+
+            def consultar():
+                nonlocal tiempos
+                if ids_memoria is not None:
+                    ids, duracion = ids_memoria, duracion_memoria
+                else:
+                    inicio = time.perf_counter()
+                    ids = self.db_manager.buscar_ids_productos(filtro.texto, filtro=filtro)
+                    duracion = time.perf_counter() - inicio
+                    if self._reemplazada():
+                        return []
+                inicio_carga = time.perf_counter()
+                productos = self.db_manager.obtener_productos_por_ids(ids, resumen=True)
+                tiempos = TiemposBusqueda(filtro.texto, len(productos), duracion,
+                                          time.perf_counter() - inicio_carga)
+                return productos
+
+            def aplicar(productos):
+                self.productos_actuales = productos
+        else:
+            def consultar():
+                return self.modelo.consultar_pagina(primera=True, filtro=filtro)
+
+            def aplicar(pagina):
+                self.modelo.filtro = filtro
+                self.modelo.aplicar_pagina(pagina, primera=True)
+                self.productos_actuales = self.modelo.productos
+
+        def consulta():
+            # El token se toma antes: lo que cambie durante la consulta se verá al refrescar
+            return self.db_manager.obtener_token_cambios(), consultar()
+
+        def terminar(resultado):
+            self._cargando = False
+            self._token_cambios, datos = resultado
+            aplicar(datos)
+            inicio = time.perf_counter()
+            self._notificar_cambio_productos()
+            if tiempos is not None:
+                tiempos.render = time.perf_counter() - inicio
+                self._notificar_busqueda_medida(tiempos)
+            self._refrescar_si_pendiente()
 
-        # Ignorar placeholder
-        if self.termino_busqueda == "Nombre, material, color...":
-            self.termino_busqueda = ""
+        self._cargando = True
+        try:
+            self._ejecutar(consulta, terminar, clave='listado',
+                           al_fallar=lambda e: self._fallo_carga(f"Error al cargar productos: {e}"))
+        except Exception:
+            self._cargando = False
+            raise
+
+    def cargar_mas_productos(self):
+        """Cargar la página siguiente del catálogo (al llegar al final de la lista)"""
+        if self.termino_busqueda or not self.modelo.hay_mas or self._cargando:
+            return False
+
+        nuevos = []
+
+        def terminar(pagina):
+            self._cargando = False
+            # Un producto ya ubicado por refrescar_cambios no se repite
+            conocidos = {p.id for p in self.productos_actuales}
+            pagina.productos = [p for p in pagina.productos if p.id not in conocidos]
+            nuevos.extend(self.modelo.aplicar_pagina(pagina))
+            if nuevos:
+                self._notificar_productos_agregados(nuevos)
+            self._refrescar_si_pendiente()
+
+        self._cargando = True
+        try:
+            self._ejecutar(self.modelo.consultar_pagina, terminar, clave='listado',
+                           al_fallar=lambda e: self._fallo_carga(f"Error al cargar más productos: {e}"))
+        except Exception as e:
+            self._cargando = False
+            print(f"Error al cargar más productos: {e}")
+            return False
+
+        return True if self.bridge is not None else bool(nuevos)
+
+    def refrescar_cambios(self):
+        """
+        Aplicar a la lista solo lo que cambió en la base de datos desde la última carga
+
+        Si nada cambió (por ejemplo, se canceló un diálogo) no se toca la
+        lista. Si no, se relee el orden de las filas ya cargadas (solo IDs,
+        por índice) y se cargan únicamente los productos nuevos o
+        modificados; el resto se reutiliza. Las búsquedas de texto, que
+        tienen su propio orden y límite, se repiten completas.
+
+        Returns:
+            False si todavía no hay una carga previa o si hay una en curso
+            (en ese caso se refresca al terminarla)
+        """
+        # Va antes a la cola: el índice ya está al día cuando se repite una búsqueda
+        self._actualizar_indice()
+
+        if self._token_cambios is None:
+            return False
+        if self._cargando:
+            self._refresco_pendiente = True
+            return False
+
+        token = self._token_cambios
+        buscando = bool(self.termino_busqueda)
+        conocidos = {p.id for p in self.productos_actuales}
+        modelo = self.modelo
+        filtro, orden, descendente, hasta = modelo.filtro, modelo.orden, modelo.descendente, modelo._cursor
+
+        def consulta():
+            cambios = self.db_manager.obtener_cambios_desde(token)
+            if cambios.vacio or cambios.completo or buscando:
+                return cambios, None, [], None
+
+            ids = self.db_manager.obtener_ids_listado(hasta, orden, descendente, filtro)
+            cargar = [i for i in ids if i in cambios.modificados or i not in conocidos]
+            productos = self.db_manager.obtener_productos_por_ids(cargar, resumen=True)
+            return cambios, ids, productos, self.db_manager.contar_productos(filtro)
+
+        def terminar(resultado):
+            self._cargando = False
+            cambios, ids, productos, total = resultado
+
+            if cambios.vacio:
+                self._token_cambios = cambios.hasta
+                self._refrescar_si_pendiente()
+                return
+            if ids is None:
+                self._recargar()
+            else:
+                por_id = {p.id: p for p in self.productos_actuales}
+                por_id.update((p.id, p) for p in productos)
+                modelo.productos = [por_id[i] for i in ids if i in por_id]
+                modelo.total = total
+                self.productos_actuales = modelo.productos
+                self._token_cambios = cambios.hasta
+                self._notificar_cambio_productos()
+
+            seleccionado = self.producto_seleccionado
+            if seleccionado is not None:
+                if seleccionado.id in cambios.eliminados:
+                    self.producto_seleccionado = None
+                    self._notificar_cambio_seleccion()
+                elif seleccionado.id in cambios.modificados or cambios.completo:
+                    self.seleccionar_producto(seleccionado.id)
+
+            self._refrescar_si_pendiente()
 
+        self._cargando = True
         try:
-            if self.termino_busqueda:
-                self.productos_actuales = self.db_manager.buscar_productos(self.termino_busqueda)
+            self._ejecutar(consulta, terminar, clave='listado',
+                           al_fallar=lambda e: self._fallo_carga(f"Error al refrescar productos: {e}"))
+        except Exception:
+            self._cargando = False
+            raise
+        return True
+
+    def construir_indice(self):
+        """
+        Armar los índices en memoria del catálogo (utils.text_index y utils.bitmap_index)
+
+        El de texto solo si max_indice_memoria lo permite y el catálogo no lo
+        supera; mientras no esté listo, las búsquedas van a SQLite. Los
+        bitmaps de colores se arman siempre (si hay índice, son los suyos).
+        """
+        def consulta():
+            # El token se toma antes: lo que cambie mientras se arma se aplica después
+            token = self.db_manager.obtener_token_cambios()
+            if self.max_indice_memoria and self.db_manager.contar_productos() <= self.max_indice_memoria:
+                indice = IndiceInvertido.desde_filas(self.db_manager.obtener_filas_indice())
+                return token, indice, indice.colores
+            return token, None, BitmapColores.desde_filas(self.db_manager.obtener_colores_productos())
+
+        def terminar(resultado):
+            self._token_indice, self.indice, self.bitmaps_colores = resultado
+
+        self._ejecutar(consulta, terminar, clave='indice',
+                       al_fallar=lambda e: print(f"Error armando el índice de búsqueda: {e}"))
+
+    def _actualizar_indice(self):
+        """Aplicar al índice y a los bitmaps en memoria solo los productos que cambiaron"""
+        if self.bitmaps_colores is None:
+            return
+
+        token = self._token_indice
+        indice, bitmaps = self.indice, self.bitmaps_colores
+
+        def consulta():
+            cambios = self.db_manager.obtener_cambios_desde(token)
+            if cambios.vacio or cambios.completo:
+                return cambios, []
+            if indice is not None:
+                return cambios, self.db_manager.obtener_filas_indice(cambios.modificados)
+            return cambios, self.db_manager.obtener_colores_productos(cambios.modificados)
+
+        def terminar(resultado):
+            self._indice_pendiente = False
+            cambios, filas = resultado
+            if cambios.completo:
+                self.indice = self.bitmaps_colores = None
+                self.construir_indice()
+                return
+            # Un modificado sin fila se eliminó después
+            leidos = {fila[0] for fila in filas}
+            eliminados = cambios.eliminados | (cambios.modificados - leidos)
+            if indice is not None:
+                indice.actualizar(filas, eliminados)  # También sus bitmaps
             else:
-                self.productos_actuales = self.db_manager.obtener_todos_productos()
+                bitmaps.actualizar(filas, eliminados)
+            self._token_indice = cambios.hasta
 
-            self._notificar_cambio_productos()
+        def fallar(e):
+            self._indice_pendiente = False
+            print(f"Error actualizando el índice de búsqueda: {e}")
+
+        self._indice_pendiente = True
+        self._ejecutar(consulta, terminar, clave='indice', al_fallar=fallar)
+
+    def _refrescar_si_pendiente(self):
+        """Hacer el refresco pedido mientras había una carga en curso"""
+        if self._refresco_pendiente and not self._cargando:
+            self._refresco_pendiente = False
+            self.refrescar_cambios()
+
+    def _fallo_carga(self, mensaje):
+        """Liberar la carga en curso y avisar del error"""
+        self._cargando = False
+        self._notificar_error(mensaje)
+
+    def buscar_productos(self, termino):
+        """Buscar productos por término (no vuelve a buscar si el término no cambió)"""
+        termino = termino.strip()
+
+        # Ignorar placeholder
+        if termino == "Nombre, material, color...":
+            termino = ""
+
+        if termino == self.termino_busqueda:
+            return True, "La búsqueda no cambió"
+        self.termino_busqueda = termino
+
+        try:
+            self._recargar()
+            if self.bridge is not None:
+                return True, "Buscando..."
             return True, f"Se encontraron {len(self.productos_actuales)} productos"
         except Exception as e:
             return False, f"Error en la búsqueda: {str(e)}"
 
     def seleccionar_producto(self, producto_id):
-        """Seleccionar un producto por ID"""
-        if producto_id:
-            self.producto_seleccionado = next(
-                (p for p in self.productos_actuales if p.id == producto_id), None
-            )
-        else:
-            self.producto_seleccionado = None
+        """Seleccionar un producto por ID (carga el producto completo)"""
+        def consulta():
+            producto = self.db_manager.obtener_producto(int(producto_id)) if producto_id else None
+            if producto is not None:
+                # Los textos se leen aquí y no al abrir el detalle o la edición
+                producto.cargar_textos()
+            return producto
+
+        def aplicar(producto):
+            self.producto_seleccionado = producto
+            self._notificar_cambio_seleccion()
+
+        self._ejecutar(consulta, aplicar, clave='seleccion')
+
+    def crear_producto(self, datos_producto, al_terminar: Optional[Callable] = None):
+        """
+        Crear un nuevo producto
+
+        Args:
+            datos_producto: Producto a crear
+            al_terminar: Recibe (success, message) cuando termina la creación
+        """
+        return self._guardar(lambda: self.db_manager.crear_producto(datos_producto),
+                             "Producto creado exitosamente", "No se pudo crear el producto",
+                             "Error al crear producto", "Creando producto...", al_terminar)
+
+    def actualizar_producto(self, producto, datos_actualizados, al_terminar: Optional[Callable] = None):
+        """
+        Actualizar un producto existente
+
+        Args:
+            producto: Producto a actualizar
+            datos_actualizados: Producto con los datos nuevos
+            al_terminar: Recibe (success, message) cuando termina la actualización
+        """
+        # Aplicar el cambio a la lista también recarga el producto seleccionado
+        return self._guardar(lambda: self.db_manager.actualizar_producto(datos_actualizados),
+                             "Producto actualizado exitosamente", "No se pudo actualizar el producto",
+                             "Error al actualizar producto", "Actualizando producto...", al_terminar)
+
+    def _guardar(self, escritura: Callable, exito: str, fracaso: str, error: str,
+                 en_curso: str, al_terminar: Optional[Callable]):
+        """
+        Ejecutar una escritura (con puente, en el hilo de base de datos) y aplicar el cambio a la lista
+
+        Returns:
+            (success, message); con puente, el resultado llega después a ``al_terminar``
+        """
+        resultado = []
+
+        def aplicar(success):
+            if success:
+                self.refrescar_cambios()
+                resultado[:] = [True, exito]
+            else:
+                resultado[:] = [False, fracaso]
+            if al_terminar:
+                al_terminar(*resultado)
 
-        self._notificar_cambio_seleccion()
+        def fallar(e):
+            resultado[:] = [False, f"{error}: {str(e)}"]
+            if al_terminar:
+                al_terminar(*resultado)
 
-    def crear_producto(self, datos_producto):
-        """Crear un nuevo producto"""
         try:
-            # Aquí se podría validar los datos antes de crear
-            nuevo_producto = self.db_manager.crear_producto(datos_producto)
-            self.cargar_productos()  # Recargar lista
-            return True, "Producto creado exitosamente"
+            self._ejecutar(escritura, aplicar, al_fallar=fallar)
         except Exception as e:
-            return False, f"Error al crear producto: {str(e)}"
+            fallar(e)
 
-    def actualizar_producto(self, producto, datos_actualizados):
-        """Actualizar un producto existente"""
-        try:
-            success = self.db_manager.actualizar_producto(producto.id, datos_actualizados)
-            if success:
-                self.cargar_productos()  # Recargar lista
-                # Si el producto actualizado era el seleccionado, reseleccionarlo
-                if self.producto_seleccionado and self.producto_seleccionado.id == producto.id:
-                    self.seleccionar_producto(producto.id)
-                return True, "Producto actualizado exitosamente"
-            else:
-                return False, "No se pudo actualizar el producto"
-        except Exception as e:
-            return False, f"Error al actualizar producto: {str(e)}"
+        if self.bridge is not None:
+            return True, en_curso
+        return tuple(resultado)
 
-    def eliminar_producto(self, producto):
-        """Eliminar un producto"""
-        try:
+    def eliminar_producto(self, producto, al_terminar: Optional[Callable] = None):
+        """
+        Eliminar un producto
+
+        Args:
+            producto: Producto a eliminar
+            al_terminar: Recibe (success, message) cuando termina la eliminación
+        """
+        resultado = []
+
+        def consulta():
             # Eliminar imagen si existe
             if producto.imagen_path:
                 FileUtils.delete_product_image(producto.imagen_path)
+            return self.db_manager.eliminar_producto(producto.id)
 
-            success = self.db_manager.eliminar_producto(producto.id)
+        def aplicar(success):
             if success:
                 # Limpiar selección si se eliminó el producto seleccionado
                 if self.producto_seleccionado and self.producto_seleccionado.id == producto.id:
                     self.producto_seleccionado = None
                     self._notificar_cambio_seleccion()
 
-                self.cargar_productos()  # Recargar lista
-                return True, "Producto eliminado exitosamente"
+                self.refrescar_cambios()  # Quitarlo de la lista
+                resultado[:] = [True, "Producto eliminado exitosamente"]
             else:
-                return False, "No se pudo eliminar el producto"
+                resultado[:] = [False, "No se pudo eliminar el producto"]
+            if al_terminar:
+                al_terminar(*resultado)
+
+        def fallar(e):
+            resultado[:] = [False, f"Error al eliminar producto: {str(e)}"]
+            if al_terminar:
+                al_terminar(*resultado)
+
+        try:
+            self._ejecutar(consulta, aplicar, al_fallar=fallar)
         except Exception as e:
-            return False, f"Error al eliminar producto: {str(e)}"
+            fallar(e)
+
+        if self.bridge is not None:
+            return True, "Eliminando producto..."
+        return tuple(resultado)
+
+    def aplicar_filtro_colores(self, colores_filtrados, modo='alguno'):
+        """
+        Aplicar filtro por colores
+
+        Args:
+            colores_filtrados: Códigos hex de los colores
+            modo: 'alguno' (usa alguno), 'todos' (usa todos) o 'ninguno' (no usa ninguno)
+        """
+        if modo not in ('alguno', 'todos', 'ninguno'):
+            raise ValueError(f"Modo de filtro desconocido: {modo}")
 
-    def aplicar_filtro_colores(self, colores_filtrados):
-        """Aplicar filtro por colores"""
         self.colores_filtrados = colores_filtrados.copy()
+        self.modo_colores = modo
         self._notificar_cambio_filtros()
+        self._recargar()
 
     def limpiar_filtros(self):
         """Limpiar todos los filtros"""
         self.colores_filtrados = []
         self._notificar_cambio_filtros()
+        self._recargar()
 
     def obtener_productos_filtrados(self):
-        """Obtener productos aplicando filtros actuales"""
-        productos = self.productos_actuales
-
-        # Aplicar filtro de colores si existe
-        if self.colores_filtrados:
-            productos = [
-                p for p in productos
-                if self._producto_tiene_colores_filtrados(p)
-            ]
-
-        return productos
-
-    def _producto_tiene_colores_filtrados(self, producto):
-        """Verificar si un producto tiene alguno de los colores filtrados"""
-        if hasattr(producto, 'colores_especificaciones') and producto.colores_especificaciones:
-            return any(c.color_hex in self.colores_filtrados for c in producto.colores_especificaciones)
-        elif hasattr(producto, 'color') and producto.color:
-            return producto.color in self.colores_filtrados
-        return False
-
-    def obtener_estadisticas(self):
-        """Obtener estadísticas de productos"""
+        """Obtener productos de la vista actual (ya filtrados por la base de datos)"""
+        return self.productos_actuales
+
+    def obtener_estadisticas(self, al_terminar: Optional[Callable] = None,
+                             clave: Optional[str] = 'estadisticas'):
+        """
+        Obtener estadísticas de productos
+
+        Con ``al_terminar`` la consulta no bloquea: el callback recibe las
+        estadísticas cuando están listas. Las peticiones con la misma clave
+        se reemplazan (None para que nunca se descarte).
+        """
+        if al_terminar is not None:
+            self._ejecutar(self._consultar_estadisticas, al_terminar, clave=clave)
+            return None
+        return self._consultar_estadisticas()
+
+    def _consultar_estadisticas(self):
         try:
             return self.db_manager.obtener_estadisticas()
         except Exception as e:
@@ -151,23 +559,72 @@ class ProductController:
                 'productos_por_material': {}
             }
 
-    def obtener_colores_disponibles(self):
-        """Obtener colores disponibles para filtros"""
+    def obtener_colores_disponibles(self, al_terminar: Optional[Callable] = None):
+        """
+        Obtener colores disponibles para filtros (sin bloquear si se da ``al_terminar``)
+
+        Con los bitmaps de colores armados, las cantidades salen de ellos sin
+        consultar la base (los chips se redibujan en cada cambio de filtro);
+        solo se consulta si aparece un color de nombre desconocido. La
+        consulta también renueva el índice de colores de tolerancia_color.
+        """
+        colores = self._colores_desde_bitmaps()
+        if colores is not None:
+            if al_terminar is not None:
+                al_terminar(colores)
+                return None
+            return colores
+
+        def aplicar(resultado):
+            colores, self.indice_colores = resultado
+            self._nombres_colores = {color['color_hex']: color['nombre_color'] for color in colores}
+            return colores
+
+        if al_terminar is not None:
+            self._ejecutar(self._consultar_colores, lambda resultado: al_terminar(aplicar(resultado)),
+                           clave='colores')
+            return None
+        return aplicar(self._consultar_colores())
+
+    def _colores_desde_bitmaps(self) -> Optional[List[Dict[str, Any]]]:
+        """Colores con su cantidad de productos, de los bitmaps (None si no alcanzan)"""
+        if self.bitmaps_colores is None or self._indice_pendiente:
+            return None
+        conteos = self.bitmaps_colores.conteos()
+        if not conteos.keys() <= self._nombres_colores.keys():
+            return None
+        colores = [
+            {'color_hex': color, 'nombre_color': self._nombres_colores[color], 'cantidad': cantidad}
+            for color, cantidad in conteos.items()
+        ]
+        # Mismo orden que DatabaseManager.obtener_colores_disponibles
+        colores.sort(key=lambda color: (-color['cantidad'], color['color_hex']))
+        return colores
+
+    def _consultar_colores(self):
         try:
-            return self.db_manager.obtener_colores_disponibles()
+            colores = self.db_manager.obtener_colores_disponibles()
         except Exception as e:
             print(f"Error al obtener colores: {e}")
-            return []
+            colores = []
+        return colores, IndiceColores(color['color_hex'] for color in colores)
 
-    def exportar_productos(self):
-        """Obtener productos para exportación"""
-        return self.productos_actuales
+    def exportar_productos(self, al_terminar: Optional[Callable] = None):
+        """Obtener productos para exportación (catálogo completo)"""
+        if al_terminar is not None:
+            self._ejecutar(self.db_manager.obtener_todos_productos, al_terminar, clave='exportacion')
+            return None
+        return self.db_manager.obtener_todos_productos()
 
     # Métodos para configurar callbacks
     def set_on_productos_changed(self, callback):
         """Configurar callback para cuando cambian los productos"""
         self.on_productos_changed = callback
 
+    def set_on_productos_appended(self, callback):
+        """Configurar callback para cuando se agrega una página de productos"""
+        self.on_productos_appended = callback
+
     def set_on_selection_changed(self, callback):
         """Configurar callback para cuando cambia la selección"""
         self.on_selection_changed = callback
@@ -176,12 +633,25 @@ class ProductController:
         """Configurar callback para cuando cambian los filtros"""
         self.on_filters_changed = callback
 
+    def set_on_error(self, callback):
+        """Configurar callback para errores de operaciones en segundo plano"""
+        self.on_error = callback
+
+    def set_on_busqueda_medida(self, callback):
+        """Configurar callback con los TiemposBusqueda de cada búsqueda mostrada"""
+        self.on_busqueda_medida = callback
+
     # Métodos privados para notificar cambios
     def _notificar_cambio_productos(self):
         """Notificar que los productos han cambiado"""
         if self.on_productos_changed:
             self.on_productos_changed(self.obtener_productos_filtrados())
 
+    def _notificar_productos_agregados(self, nuevos):
+        """Notificar que se cargó una página más de productos"""
+        if self.on_productos_appended:
+            self.on_productos_appended(nuevos)
+
     def _notificar_cambio_seleccion(self):
         """Notificar que la selección ha cambiado"""
         if self.on_selection_changed:
@@ -191,8 +661,19 @@ class ProductController:
         """Notificar que los filtros han cambiado"""
         if self.on_filters_changed:
             self.on_filters_changed(self.colores_filtrados)
-        # También notificar cambio en productos para actualizar la lista
-        self._notificar_cambio_productos()
+        # La lista se notifica al terminar la recarga
+
+    def _notificar_busqueda_medida(self, tiempos):
+        """Notificar cuánto tardó cada paso de la búsqueda que se acaba de mostrar"""
+        if self.on_busqueda_medida:
+            self.on_busqueda_medida(tiempos)
+
+    def _notificar_error(self, error):
+        """Notificar un error de una operación en segundo plano"""
+        if self.on_error:
+            self.on_error(str(error))
+        else:
+            print(f"Error en operación de productos: {error}")
 
     # Métodos de utilidad
     def tiene_productos(self):
@@ -208,8 +689,10 @@ class ProductController:
         return self.producto_seleccionado
 
     def get_total_productos(self):
-        """Obtener total de productos"""
-        return len(self.productos_actuales)
+        """Obtener total de productos (del catálogo o de la búsqueda actual)"""
+        if self.termino_busqueda:
+            return len(self.productos_actuales)
+        return self.modelo.total
 
     def get_total_productos_filtrados(self):
         """Obtener total de productos después de aplicar filtros"""
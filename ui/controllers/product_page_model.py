@@ -0,0 +1,75 @@
+"""
+Modelo de ventana sobre el catálogo de productos (carga por páginas)
+"""
+from typing import List, Optional
+
+from database.db_pagination import CursorPagina
+from database.db_query import FiltroProductos
+
+
+class ProductPageModel:
+    """
+    Mantiene las páginas del catálogo ya cargadas (como ProductoResumen) y
+    pide la siguiente a la base de datos solo cuando la lista la necesita.
+    """
+
+    def __init__(self, db_manager, tamano_pagina: int = 100,
+                 orden: str = 'nombre', descendente: bool = False):
+        self.db_manager = db_manager
+        self.tamano_pagina = tamano_pagina
+        self.orden = orden
+        self.descendente = descendente
+        self.filtro = FiltroProductos()
+
+        self.productos: List = []
+        self.total: int = 0
+        self._cursor: Optional[CursorPagina] = None
+        self.hay_mas: bool = False
+
+    def reiniciar(self) -> List:
+        """Descartar las páginas cargadas y cargar la primera"""
+        return self.aplicar_pagina(self.consultar_pagina(primera=True), primera=True)
+
+    def cargar_siguiente(self) -> List:
+        """Cargar la página siguiente y devolver solo los productos nuevos"""
+        if not self.hay_mas:
+            return []
+        return self.aplicar_pagina(self.consultar_pagina())
+
+    def consultar_pagina(self, primera: bool = False, filtro: Optional[FiltroProductos] = None):
+        """
+        Consultar una página sin modificar el modelo (se puede llamar desde el hilo de BD)
+
+        Args:
+            primera: Pedir la primera página en lugar de la siguiente
+            filtro: Filtro a usar; por defecto el actual
+        """
+        return self.db_manager.obtener_pagina_productos(
+            limite=self.tamano_pagina,
+            despues_de=None if primera else self._cursor,
+            orden=self.orden,
+            descendente=self.descendente,
+            resumen=True,
+            filtro=self.filtro if filtro is None else filtro
+        )
+
+    def aplicar_pagina(self, pagina, primera: bool = False) -> List:
+        """Incorporar una página consultada y devolver sus productos"""
+        if primera:
+            self.productos = []
+        self.productos.extend(pagina.productos)
+        self.total = pagina.total
+        self._cursor = pagina.cursor_siguiente
+        self.hay_mas = pagina.hay_mas
+        return pagina.productos
+
+    def cambiar_orden(self, orden: str, descendente: bool = False) -> List:
+        """Cambiar la columna de orden y volver a la primera página"""
+        self.orden = orden
+        self.descendente = descendente
+        return self.reiniciar()
+
+    def cambiar_filtro(self, filtro: FiltroProductos) -> List:
+        """Cambiar el filtro de colores y volver a la primera página"""
+        self.filtro = filtro
+        return self.reiniciar()
@@ -1,6 +1,7 @@
 """
 Ventana principal modernizada y simplificada de la aplicación - CORREGIDA
 """
+import time
 import tkinter as tk
 from tkinter import messagebox
 
@@ -16,6 +17,7 @@ from .components import (
     ModernWidgets
 )
 from .controllers import ProductController
+from .service.tk_bridge import TkBridge
 
 from .windows import (
     ModernAddProductWindow,
@@ -25,6 +27,17 @@ from .windows import (
 
 # Importar otros módulos necesarios
 from database.db_manager import DatabaseManager
+from database.db_worker import DatabaseWorker
+from database.db_backup import BackupService
+from database.db_maintenance import DatabaseMaintenance
+from config.app_config import get_database_config, get_file_config, get_ui_config
+
+# Cada cuánto se buscan cambios hechos por otras instancias sobre la misma BD
+INTERVALO_CAMBIOS_MS = 3000
+
+# Cada cuánto se mira si la aplicación lleva el tiempo suficiente inactiva
+# para el mantenimiento de la base de datos
+INTERVALO_INACTIVIDAD_MS = 60000
 
 
 class ModernMainWindow:
@@ -62,10 +75,31 @@ class ModernMainWindow:
         self.styles.apply_styles(self.root)
 
         # Base de datos
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager(db_config=get_database_config())
         self.db_manager.init_database()  # Asegurar que la BD esté inicializada
 
-        self.product_controller = ProductController(self.db_manager)
+        # Backups periódicos en segundo plano según DatabaseConfig
+        db_config = get_database_config()
+        self.backups = BackupService.desde_config(
+            self.db_manager.db_path, db_config, get_file_config().backup_folder
+        )
+        if db_config.backup_enabled:
+            self.backups.iniciar()
+
+        # Mantenimiento (huérfanos, estadísticas, VACUUM incremental) con la app inactiva
+        self.mantenimiento = DatabaseMaintenance(self.db_manager)
+        self._mantenimiento_hecho = False
+        self._ultima_actividad = time.monotonic()
+
+        # Las consultas de la ventana principal se hacen en un hilo propio
+        self.db_bridge = TkBridge(
+            self.root, DatabaseWorker(al_detenerse=self.db_manager.cerrar_conexion_hilo)
+        )
+        self.product_controller = ProductController(
+            self.db_manager, bridge=self.db_bridge,
+            max_indice_memoria=get_ui_config().memory_search_max_products,
+            tolerancia_color=get_ui_config().color_filter_delta_e
+        )
 
         self.dialogs = ModernDialogs(self.root)
         self.notifications = NotificationSystem(self.root)
@@ -93,13 +127,15 @@ class ModernMainWindow:
         content_frame.grid_columnconfigure(1, weight=1)
         content_frame.grid_rowconfigure(0, weight=1)
 
-        self.sidebar = SidebarComponent(content_frame, self._get_sidebar_callbacks())
+        self.sidebar = SidebarComponent(content_frame, self._get_sidebar_callbacks(),
+                                        search_debounce_ms=get_ui_config().search_debounce_ms)
         self.sidebar.grid(row=0, column=0, sticky='nsew', padx=(0, 20))
 
         self.product_list = ProductListComponent(
             content_frame,
             on_selection_change=self._on_product_selection_change,
-            on_double_click=self._on_product_double_click
+            on_double_click=self._on_product_double_click,
+            on_load_more=self._on_load_more_products
         )
         self.product_list.grid(row=0, column=1, sticky='nsew')
 
@@ -143,8 +179,15 @@ class ModernMainWindow:
         """Configurar eventos y callbacks"""
         # Configurar callbacks del controlador
         self.product_controller.set_on_productos_changed(self._on_products_changed)
+        self.product_controller.set_on_productos_appended(self._on_products_appended)
         self.product_controller.set_on_selection_changed(self._on_selection_changed)
         self.product_controller.set_on_filters_changed(self._on_filters_changed)
+        self.product_controller.set_on_error(self._on_controller_error)
+        self.product_controller.set_on_busqueda_medida(self._on_search_measured)
+
+        # Actividad del usuario, para el mantenimiento en inactividad
+        for evento in ('<Any-KeyPress>', '<Any-ButtonPress>', '<MouseWheel>'):
+            self.root.bind_all(evento, self._on_user_activity, add='+')
 
         # Evento de cierre
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
@@ -156,7 +199,9 @@ class ModernMainWindow:
             if success:
                 self._update_status(message)
                 self._update_color_filters()
-                self._update_sidebar_stats()
+                self.root.after(INTERVALO_CAMBIOS_MS, self._check_external_changes)
+                if get_database_config().maintenance_on_idle:
+                    self.root.after(INTERVALO_INACTIVIDAD_MS, self._check_idle_maintenance)
             else:
                 messagebox.showerror("Error", message)
         except Exception as e:
@@ -166,12 +211,22 @@ class ModernMainWindow:
     def _on_products_changed(self, productos_filtrados):
         """Manejar cambio en productos"""
         try:
-            self.product_list.update_product_list(productos_filtrados, self.sidebar.colores_filtrados)
+            self.product_list.update_product_list(
+                productos_filtrados, total=self.product_controller.get_total_productos()
+            )
             self._update_status(f"✓ Mostrando {len(productos_filtrados)} productos")
             self._update_sidebar_stats()
         except Exception as e:
             print(f"Error actualizando lista de productos: {e}")
 
+    def _on_products_appended(self, productos_nuevos):
+        """Manejar una página más de productos cargada al hacer scroll"""
+        try:
+            self.product_list.append_products(productos_nuevos)
+            self._update_status(f"✓ Mostrando {self.product_list.productos_mostrados} productos")
+        except Exception as e:
+            print(f"Error agregando productos a la lista: {e}")
+
     def _on_selection_changed(self, producto_seleccionado):
         """Manejar cambio en selección"""
         try:
@@ -188,6 +243,14 @@ class ModernMainWindow:
         except Exception as e:
             print(f"Error actualizando filtros: {e}")
 
+    def _on_search_measured(self, tiempos):
+        """Mostrar en la barra de estado cuánto tardó cada paso de la búsqueda"""
+        self._update_status(f"✓ {tiempos}")
+
+    def _on_controller_error(self, mensaje):
+        """Mostrar errores de operaciones hechas en segundo plano"""
+        self.notifications.show_notification(f"✕ {mensaje}", 'error')
+
     # Métodos de eventos de la interfaz
     def _on_search(self, termino):
         """Manejar búsqueda"""
@@ -209,6 +272,13 @@ class ModernMainWindow:
         """Manejar doble clic en producto"""
         self._view_details()
 
+    def _on_load_more_products(self):
+        """Cargar la página siguiente al llegar al final de la lista"""
+        try:
+            self.product_controller.cargar_mas_productos()
+        except Exception as e:
+            print(f"Error cargando más productos: {e}")
+
     def _on_color_filter_change(self, colores_filtrados):
         """Manejar cambio en filtros de color"""
         try:
@@ -220,11 +290,11 @@ class ModernMainWindow:
     def _new_product(self):
         """Crear nuevo producto"""
         try:
-            ventana = ModernAddProductWindow(self.root, self.db_manager)
+            ventana = ModernAddProductWindow(self.root, self.db_manager, bridge=self.db_bridge)
             self.root.wait_window(ventana.window)
 
             if ventana.producto_creado:
-                self.product_controller.cargar_productos()
+                self.product_controller.refrescar_cambios()
                 self.notifications.show_notification("✓ Producto creado exitosamente", 'success')
         except Exception as e:
             self.notifications.show_notification(f"Error creando producto: {str(e)}", 'error')
@@ -237,11 +307,12 @@ class ModernMainWindow:
                 self.notifications.show_notification("Seleccione un producto para editar", 'warning')
                 return
 
-            ventana = ModernEditProductWindow(self.root, self.db_manager, producto)
+            ventana = ModernEditProductWindow(self.root, self.db_manager, producto, bridge=self.db_bridge)
             self.root.wait_window(ventana.window)
 
+            # Sin cambios en la BD (p. ej. se canceló) la lista no se toca
+            self.product_controller.refrescar_cambios()
             if ventana.producto_actualizado:
-                self.product_controller.cargar_productos()
                 self.notifications.show_notification("✓ Producto actualizado", 'success')
         except Exception as e:
             self.notifications.show_notification(f"Error editando producto: {str(e)}", 'error')
@@ -268,26 +339,37 @@ class ModernMainWindow:
                 return
 
             if self.dialogs.show_delete_confirmation(producto.nombre):
-                success, message = self.product_controller.eliminar_producto(producto)
-                if success:
-                    self.notifications.show_notification("✓ Producto eliminado", 'success')
-                else:
-                    self.notifications.show_notification(f"✕ {message}", 'error')
+                self.product_controller.eliminar_producto(producto, al_terminar=self._on_product_deleted)
         except Exception as e:
             self.notifications.show_notification(f"Error eliminando producto: {str(e)}", 'error')
 
+    def _on_product_deleted(self, success, message):
+        """Avisar del resultado de la eliminación"""
+        if success:
+            self.notifications.show_notification("✓ Producto eliminado", 'success')
+        else:
+            self.notifications.show_notification(f"✕ {message}", 'error')
+
     def _show_statistics(self):
         """Mostrar estadísticas"""
         try:
-            stats = self.product_controller.obtener_estadisticas()
-            self.dialogs.show_statistics_dialog(stats)
+            self.product_controller.obtener_estadisticas(
+                al_terminar=self.dialogs.show_statistics_dialog, clave=None
+            )
         except Exception as e:
             self.notifications.show_notification(f"Error mostrando estadísticas: {str(e)}", 'error')
 
     def _export_data(self):
         """Exportar datos"""
         try:
-            productos = self.product_controller.exportar_productos()
+            self._update_status("Preparando exportación...")
+            self.product_controller.exportar_productos(al_terminar=self._show_export_dialog)
+        except Exception as e:
+            self.notifications.show_notification(f"Error exportando: {str(e)}", 'error')
+
+    def _show_export_dialog(self, productos):
+        """Mostrar el diálogo de exportación con el catálogo ya cargado"""
+        try:
             success, message = self.dialogs.show_export_dialog(productos)
 
             if success:
@@ -301,19 +383,63 @@ class ModernMainWindow:
     def _update_color_filters(self):
         """Actualizar filtros de color"""
         try:
-            colores_disponibles = self.product_controller.obtener_colores_disponibles()
-            self.sidebar.update_color_filters(colores_disponibles)
+            self.product_controller.obtener_colores_disponibles(
+                al_terminar=self.sidebar.update_color_filters
+            )
         except Exception as e:
             print(f"Error actualizando filtros de color: {e}")
 
     def _update_sidebar_stats(self):
         """Actualizar estadísticas del sidebar"""
         try:
-            stats = self.product_controller.obtener_estadisticas()
-            self.sidebar.update_stats(stats)
+            self.product_controller.obtener_estadisticas(al_terminar=self.sidebar.update_stats)
         except Exception as e:
             print(f"Error actualizando estadísticas del sidebar: {e}")
 
+    def _check_external_changes(self):
+        """Aplicar cambios hechos desde otra instancia (consulta barata si no hubo ninguno)"""
+        try:
+            self.product_controller.refrescar_cambios()
+        except Exception as e:
+            print(f"Error buscando cambios externos: {e}")
+        self.root.after(INTERVALO_CAMBIOS_MS, self._check_external_changes)
+
+    def _on_user_activity(self, event=None):
+        """Registrar actividad del usuario"""
+        self._ultima_actividad = time.monotonic()
+
+    def _check_idle_maintenance(self):
+        """Ejecutar el mantenimiento una vez por sesión cuando la app queda inactiva"""
+        if self._mantenimiento_hecho:
+            return
+
+        inactivo = time.monotonic() - self._ultima_actividad
+        if inactivo >= get_database_config().maintenance_idle_minutes * 60 and not self.db_bridge.ocupado:
+            self._run_maintenance()
+        else:
+            self.root.after(INTERVALO_INACTIVIDAD_MS, self._check_idle_maintenance)
+
+    def _run_maintenance(self):
+        """Mantenimiento de la base de datos en el hilo de base de datos"""
+        self._mantenimiento_hecho = True
+        self._update_status("🔧 Mantenimiento de la base de datos en curso...")
+        self.db_bridge.ejecutar(
+            self.mantenimiento.ejecutar, vacuum='incremental',
+            al_terminar=self._on_maintenance_done,
+            al_fallar=lambda e: self._update_status(f"❌ Error en el mantenimiento: {e}"),
+            clave='mantenimiento'
+        )
+
+    def _on_maintenance_done(self, reporte):
+        """Mostrar el resultado del mantenimiento"""
+        print(f"🔧 Mantenimiento de la base de datos:\n{reporte}")
+        huerfanos = sum(reporte.huerfanos_eliminados.values())
+        if reporte.vacuum:
+            espacio = f"{max(reporte.bytes_liberados, 0) / 1024:.0f} KiB liberados"
+        else:
+            espacio = "sin VACUUM (la base necesita uno completo, ver consola)"
+        self._update_status(f"✓ Mantenimiento: {huerfanos} filas huérfanas eliminadas, {espacio}")
+
     def _update_status(self, mensaje):
         """Actualizar barra de estado"""
         try:
@@ -341,10 +467,25 @@ class ModernMainWindow:
         """Manejar cierre de aplicación"""
         try:
             if self.dialogs.show_exit_confirmation():
-                self.root.destroy()
+                self._cerrar()
         except Exception as e:
             print(f"Error cerrando aplicación: {e}")
-            self.root.destroy()
+            self._cerrar()
+
+    def _cerrar(self):
+        """Detener los servicios y cerrar sin cortar una escritura en curso"""
+        self.backups.detener()
+        self.db_bridge.cerrar()
+        self.root.destroy()
+
+        # Si el hilo de base de datos sigue en una transacción, cerrar su
+        # conexión la cortaría a la mitad: se espera (ya sin ventana) a que
+        # termine, y el hilo cierra su conexión al salir
+        worker = self.db_bridge.worker
+        if worker.activo:
+            print("⏳ Esperando a que termine la operación de base de datos en curso...")
+            worker.esperar()
+        self.db_manager.close()
 
 
 # Para usar la ventana modernizada
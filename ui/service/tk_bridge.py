@@ -0,0 +1,101 @@
+"""
+Puente entre el hilo de base de datos y el hilo de Tk
+"""
+import queue
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from database.db_worker import DatabaseWorker
+
+
+class TkBridge:
+    """
+    Envía trabajo al DatabaseWorker y entrega los resultados en el hilo de Tk
+
+    Tkinter no admite llamadas desde otros hilos, así que los futuros
+    terminados se dejan en una cola que el hilo de Tk revisa con
+    ``root.after`` mientras haya solicitudes pendientes. Los resultados de
+    solicitudes reemplazadas por otra más nueva con la misma clave se
+    descartan sin llamar a los callbacks.
+    """
+
+    def __init__(self, root, worker: DatabaseWorker, intervalo_ms: int = 20):
+        self.root = root
+        self.worker = worker
+        self.intervalo_ms = intervalo_ms
+
+        self._terminados: "queue.Queue" = queue.Queue()
+        self._pendientes = 0
+        self._programado = None
+
+    def ejecutar(self, funcion: Callable, *args, al_terminar: Optional[Callable] = None,
+                 al_fallar: Optional[Callable] = None, clave: Optional[str] = None,
+                 **kwargs) -> Future:
+        """
+        Ejecutar una función en el hilo de base de datos
+
+        Args:
+            funcion: Función a ejecutar fuera del hilo de Tk
+            al_terminar: Recibe el resultado, en el hilo de Tk
+            al_fallar: Recibe la excepción, en el hilo de Tk
+            clave: Solicitudes con la misma clave se reemplazan entre sí
+
+        Returns:
+            Future de la solicitud
+        """
+        futuro = self.worker.enviar(funcion, *args, clave=clave, **kwargs)
+        self._pendientes += 1
+        futuro.add_done_callback(
+            lambda f: self._terminados.put((f, clave, al_terminar, al_fallar))
+        )
+        self._programar()
+        return futuro
+
+    @property
+    def ocupado(self) -> bool:
+        """Indica si hay solicitudes sin entregar"""
+        return self._pendientes > 0
+
+    def _programar(self):
+        """Revisar la cola en el próximo ciclo de Tk si no está ya programado"""
+        if self._programado is None:
+            self._programado = self.root.after(self.intervalo_ms, self._entregar)
+
+    def _entregar(self):
+        """Llamar a los callbacks de las solicitudes terminadas (hilo de Tk)"""
+        self._programado = None
+
+        while True:
+            try:
+                futuro, clave, al_terminar, al_fallar = self._terminados.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pendientes -= 1
+            if not self.worker.es_vigente(futuro, clave):
+                continue
+
+            error = futuro.exception()
+            try:
+                if error is not None:
+                    if al_fallar:
+                        al_fallar(error)
+                    else:
+                        print(f"Error en operación de base de datos: {error}")
+                elif al_terminar:
+                    al_terminar(futuro.result())
+            except Exception as e:
+                print(f"Error entregando resultado a la interfaz: {e}")
+
+        if self._pendientes > 0:
+            self._programar()
+
+    def cerrar(self):
+        """Dejar de entregar resultados y detener el hilo de base de datos"""
+        if self._programado is not None:
+            try:
+                self.root.after_cancel(self._programado)
+            except Exception:
+                pass
+            self._programado = None
+        self.worker.detener()
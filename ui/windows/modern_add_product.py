@@ -15,9 +15,10 @@ from config.app_config import config
 class ModernAddProductWindow:
     """Ventana modernizada para agregar productos"""
 
-    def __init__(self, parent, db_manager):
+    def __init__(self, parent, db_manager, bridge=None):
         self.parent = parent
         self.db_manager = db_manager
+        self.bridge = bridge  # TkBridge opcional: guardar fuera del hilo de Tk
         self.producto_creado = False
 
         # Inicializar sistemas
@@ -63,7 +64,7 @@ class ModernAddProductWindow:
 
     def _setup_controller(self):
         """Configurar controlador"""
-        self.controller = AddProductController(self.db_manager)
+        self.controller = AddProductController(self.db_manager, bridge=self.bridge)
 
         # Configurar callbacks del controlador
         self.controller.set_callbacks(
@@ -341,13 +342,16 @@ Guía de impresión: {'Sí' if preview_data['tiene_guia'] else 'No'}"""
     def _on_success(self, message):
         """Manejar éxito"""
         self.producto_creado = True
+        if not self.window.winfo_exists():
+            return  # Con puente, la ventana pudo cerrarse mientras se guardaba
         self.notifications.show_notification(f"✓ {message}", 'success')
         # Cerrar ventana después de mostrar notificación
         self.window.after(2000, self.window.destroy)
 
     def _on_error(self, message):
         """Manejar error"""
-        self.notifications.show_notification(f"✕ {message}", 'error')
+        if self.window.winfo_exists():
+            self.notifications.show_notification(f"✕ {message}", 'error')
 
     def _on_warning(self, message):
         """Manejar advertencia"""
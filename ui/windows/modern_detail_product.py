@@ -405,8 +405,8 @@ class ModernProductDetailWindow:
                     'peso_total': 0,
                     'tiempo_adicional': color_spec.tiempo_adicional
                 }
-            color_groups[color_spec.color_hex]['piezas'].extend(color_spec.piezas)
-            color_groups[color_spec.color_hex]['peso_total'] += color_spec.peso_color
+            color_groups[color_spec.color_hex]['piezas'].extend(color_spec.get_piezas_como_objetos())
+            color_groups[color_spec.color_hex]['peso_total'] += color_spec.get_peso_calculado()
 
         # Mostrar cada grupo
         for i, (color_hex, group) in enumerate(color_groups.items()):
@@ -463,7 +463,7 @@ class ModernProductDetailWindow:
         chips_frame.pack(fill=tk.X)
 
         for pieza in group['piezas'][:8]:  # Mostrar máximo 8 piezas
-            chip = tk.Label(chips_frame, text=pieza,
+            chip = tk.Label(chips_frame, text=str(pieza),
                             font=self.fonts['caption'],
                             bg=self.colors['card'], fg=self.colors['text'],
                             padx=8, pady=2,
@@ -490,9 +490,15 @@ class ModernProductDetailWindow:
         total_colores = len(color_groups)
         total_piezas = sum(len(g['piezas']) for g in color_groups.values())
         tiempo_cambios = sum(g['tiempo_adicional'] for g in color_groups.values())
+        estadisticas = self.producto.get_estadisticas_avanzadas()
 
         summary_text = f"• {total_colores} colores diferentes\n"
         summary_text += f"• {total_piezas} piezas en total\n"
+        summary_text += f"• Dificultad general: {estadisticas['dificultad_general']}\n"
+        if estadisticas['requieren_soportes']:
+            summary_text += f"• {estadisticas['requieren_soportes']} piezas con soportes\n"
+        if estadisticas['piezas_criticas']:
+            summary_text += f"• ⚠️ {estadisticas['piezas_criticas']} piezas críticas\n"
         if tiempo_cambios > 0:
             summary_text += f"• +{tiempo_cambios} min por cambios de color"
 
@@ -9,6 +9,7 @@ from datetime import datetime
 import os
 from PIL import Image, ImageTk
 
+from database.db_escritura import BaseOcupadaError
 from database.db_manager import DatabaseManager
 from models.producto import Producto
 
@@ -16,9 +17,11 @@ from models.producto import Producto
 class ModernEditProductWindow:
     """Ventana de edición de productos con diseño moderno y mejorado"""
 
-    def __init__(self, parent, db_manager: DatabaseManager, producto: Producto):
+    def __init__(self, parent, db_manager: DatabaseManager, producto: Producto, bridge=None):
         self.parent = parent
         self.db_manager = db_manager
+        self.bridge = bridge  # TkBridge opcional: guardar fuera del hilo de Tk
+        self.guardando = False
         self.producto = producto
         self.producto_actualizado = False
 
@@ -586,6 +589,9 @@ class ModernEditProductWindow:
 
     def _save_changes(self):
         """Guardar cambios en el producto"""
+        if self.guardando:
+            return
+
         try:
             # Validar campos requeridos
             if not self.vars['nombre'].get().strip():
@@ -607,21 +613,41 @@ class ModernEditProductWindow:
             if self.guia_text:
                 self.producto.guia_impresion = self.guia_text.get('1.0', 'end-1c').strip()
 
-            # Actualizar en base de datos
-            success, message = self.db_manager.actualizar_producto(self.producto)
-
-            if success:
-                self.producto_actualizado = True
-                messagebox.showinfo("✅ Éxito",
-                                    "Producto actualizado correctamente")
-                self.window.destroy()
+            # Actualizar en base de datos (con puente, en el hilo de base de datos)
+            if self.bridge is not None:
+                self.guardando = True
+                self.bridge.ejecutar(self.db_manager.actualizar_producto, self.producto,
+                                     al_terminar=self._on_guardado, al_fallar=self._on_error_guardado)
             else:
-                messagebox.showerror("❌ Error",
-                                     f"Error al actualizar: {message}")
+                self._on_guardado(self.db_manager.actualizar_producto(self.producto))
 
         except Exception as e:
+            self._on_error_guardado(e)
+
+    def _on_guardado(self, success):
+        """Resultado de guardar los cambios"""
+        self.guardando = False
+        if success:
+            self.producto_actualizado = True
+            if not self.window.winfo_exists():
+                return
+            messagebox.showinfo("✅ Éxito",
+                                "Producto actualizado correctamente")
+            self.window.destroy()
+        else:
+            messagebox.showerror("❌ Error",
+                                 "Error al actualizar: el producto ya no existe")
+
+    def _on_error_guardado(self, error):
+        """Guardado fallido"""
+        self.guardando = False
+        if isinstance(error, BaseOcupadaError):
+            messagebox.showerror("❌ Error",
+                                 "La base de datos está ocupada por otro equipo. "
+                                 "Espere unos segundos y vuelva a guardar.")
+        else:
             messagebox.showerror("❌ Error",
-                                 f"Error inesperado: {str(e)}")
+                                 f"Error inesperado: {str(error)}")
 
     def _on_close(self):
         """Manejar cierre de ventana"""
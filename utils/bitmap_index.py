@@ -0,0 +1,212 @@
+"""
+Bitmaps de IDs de productos para combinar filtros de color con operaciones de bits
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Los IDs se reparten en contenedores de 2**16 por sus bits altos
+BITS_CONTENEDOR = 16
+_MASCARA = (1 << BITS_CONTENEDOR) - 1
+_BYTES_CONTENEDOR = (1 << BITS_CONTENEDOR) // 8
+
+# Posiciones de los bits encendidos de cada byte, para recorrer un bitmap
+_POSICIONES = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def separar_colores(colores_hex: Optional[str]) -> List[str]:
+    """Colores de una lista separada por comas, como la arma group_concat"""
+    return [color for color in (colores_hex or "").split(',') if color]
+
+
+class Bitmap:
+    """
+    Conjunto de IDs (enteros no negativos) guardado como bits, al estilo Roaring
+
+    Cada contenedor es un int de Python con un bit por ID, así que la
+    unión, la intersección, la diferencia y el conteo (int.bit_count) se
+    hacen en C, de a 64 bits. Los contenedores vacíos no se guardan.
+    """
+
+    __slots__ = ('_contenedores',)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        bytes_por_contenedor: Dict[int, bytearray] = {}
+        for producto_id in ids:
+            alto, bajo = producto_id >> BITS_CONTENEDOR, producto_id & _MASCARA
+            datos = bytes_por_contenedor.get(alto)
+            if datos is None:
+                datos = bytes_por_contenedor[alto] = bytearray(_BYTES_CONTENEDOR)
+            datos[bajo >> 3] |= 1 << (bajo & 7)
+        self._contenedores: Dict[int, int] = {
+            alto: int.from_bytes(datos, 'little') for alto, datos in bytes_por_contenedor.items()
+        }
+
+    @classmethod
+    def _desde(cls, contenedores: Dict[int, int]) -> 'Bitmap':
+        bitmap = cls()
+        bitmap._contenedores = {alto: bits for alto, bits in contenedores.items() if bits}
+        return bitmap
+
+    @classmethod
+    def union(cls, *bitmaps: 'Bitmap') -> 'Bitmap':
+        """Unión de varios bitmaps de una sola pasada"""
+        contenedores: Dict[int, int] = {}
+        for bitmap in bitmaps:
+            for alto, bits in bitmap._contenedores.items():
+                contenedores[alto] = contenedores.get(alto, 0) | bits
+        return cls._desde(contenedores)
+
+    def __len__(self) -> int:
+        return sum(bits.bit_count() for bits in self._contenedores.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._contenedores)
+
+    def __contains__(self, producto_id: int) -> bool:
+        return bool(self._contenedores.get(producto_id >> BITS_CONTENEDOR, 0) >> (producto_id & _MASCARA) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        """IDs de menor a mayor"""
+        for alto in sorted(self._contenedores):
+            bits = self._contenedores[alto]
+            base = alto << BITS_CONTENEDOR
+            for posicion, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')):
+                if byte:
+                    inicio = base + (posicion << 3)
+                    for bit in _POSICIONES[byte]:
+                        yield inicio + bit
+
+    def __and__(self, otro: 'Bitmap') -> 'Bitmap':
+        otros = otro._contenedores
+        return Bitmap._desde({
+            alto: bits & otros[alto] for alto, bits in self._contenedores.items() if alto in otros
+        })
+
+    def __or__(self, otro: 'Bitmap') -> 'Bitmap':
+        return Bitmap.union(self, otro)
+
+    def __sub__(self, otro: 'Bitmap') -> 'Bitmap':
+        otros = otro._contenedores
+        return Bitmap._desde({
+            alto: bits & ~otros.get(alto, 0) for alto, bits in self._contenedores.items()
+        })
+
+    def agregar(self, producto_id: int):
+        """Encender el bit de un ID"""
+        alto = producto_id >> BITS_CONTENEDOR
+        self._contenedores[alto] = self._contenedores.get(alto, 0) | (1 << (producto_id & _MASCARA))
+
+    def quitar(self, producto_id: int):
+        """Apagar el bit de un ID (no hace nada si no estaba)"""
+        alto = producto_id >> BITS_CONTENEDOR
+        bits = self._contenedores.get(alto, 0) & ~(1 << (producto_id & _MASCARA))
+        if bits:
+            self._contenedores[alto] = bits
+        else:
+            self._contenedores.pop(alto, None)
+
+    def filtrar(self, ids: Iterable[int]) -> List[int]:
+        """Los IDs dados que están en el bitmap, en el mismo orden"""
+        bytes_por_contenedor: Dict[int, bytes] = {}
+        resultado = []
+        for producto_id in ids:
+            alto, bajo = producto_id >> BITS_CONTENEDOR, producto_id & _MASCARA
+            datos = bytes_por_contenedor.get(alto)
+            if datos is None:
+                datos = bytes_por_contenedor[alto] = self._contenedores.get(alto, 0).to_bytes(
+                    _BYTES_CONTENEDOR, 'little')
+            if datos[bajo >> 3] >> (bajo & 7) & 1:
+                resultado.append(producto_id)
+        return resultado
+
+
+class BitmapColores:
+    """
+    Color hex -> Bitmap de los productos que lo usan
+
+    Las combinaciones de "alguno", "todos" y "ninguno" de FiltroProductos
+    y la cantidad de productos por color salen de operaciones entre
+    bitmaps, sin recorrer los productos. ``productos`` tiene a todos los
+    registrados (con o sin colores), para "ninguno".
+
+    No es seguro entre hilos, como IndiceInvertido.
+    """
+
+    def __init__(self):
+        self._bitmaps: Dict[str, Bitmap] = {}
+        self.productos = Bitmap()
+
+    @classmethod
+    def desde_filas(cls, filas: Iterable[Tuple[int, Optional[str]]]) -> 'BitmapColores':
+        """Construir desde (producto_id, colores hex separados por comas) de todo el catálogo"""
+        ids: List[int] = []
+        por_color: Dict[str, List[int]] = {}
+        for producto_id, colores_hex in filas:
+            ids.append(producto_id)
+            for color in separar_colores(colores_hex):
+                por_color.setdefault(color, []).append(producto_id)
+
+        bitmaps = cls()
+        bitmaps.productos = Bitmap(ids)
+        bitmaps._bitmaps = {color: Bitmap(ids_color) for color, ids_color in por_color.items()}
+        return bitmaps
+
+    def __len__(self) -> int:
+        return len(self.productos)
+
+    def colores(self) -> List[str]:
+        """Colores que usa al menos un producto"""
+        return list(self._bitmaps)
+
+    def asignar(self, producto_id: int, colores: Iterable[str]):
+        """Registrar los colores de un producto (reemplaza los que tenía)"""
+        self.quitar(producto_id)
+        self.productos.agregar(producto_id)
+        for color in set(colores):
+            self._bitmaps.setdefault(color, Bitmap()).agregar(producto_id)
+
+    def quitar(self, producto_id: int):
+        """Sacar un producto de todos los bitmaps (no hace nada si no estaba)"""
+        if producto_id not in self.productos:
+            return
+        self.productos.quitar(producto_id)
+        for color in [color for color, bitmap in self._bitmaps.items() if producto_id in bitmap]:
+            bitmap = self._bitmaps[color]
+            bitmap.quitar(producto_id)
+            if not bitmap:
+                del self._bitmaps[color]
+
+    def actualizar(self, filas: Iterable[Tuple[int, Optional[str]]], eliminados: Iterable[int] = ()):
+        """Aplicar los productos modificados (filas como en desde_filas) y eliminados"""
+        for producto_id in eliminados:
+            self.quitar(producto_id)
+        for producto_id, colores_hex in filas:
+            self.asignar(producto_id, separar_colores(colores_hex))
+
+    def filtrar(self, alguno: Iterable[str] = (), todos: Iterable[str] = (),
+                ninguno: Iterable[str] = ()) -> Optional[Bitmap]:
+        """
+        Productos que cumplen las condiciones de color
+
+        Returns:
+            None si no hay ninguna condición (valen todos)
+        """
+        alguno, todos, ninguno = set(alguno), set(todos), set(ninguno)
+        if not (alguno or todos or ninguno):
+            return None
+
+        vacio = Bitmap()
+        resultado = self.productos
+        for color in todos:
+            resultado = resultado & self._bitmaps.get(color, vacio)
+        if alguno:
+            resultado = resultado & Bitmap.union(*(self._bitmaps.get(color, vacio) for color in alguno))
+        if ninguno:
+            resultado = resultado - Bitmap.union(*(self._bitmaps.get(color, vacio) for color in ninguno))
+        return resultado
+
+    def conteos(self, dentro: Optional[Bitmap] = None) -> Dict[str, int]:
+        """Productos por color; con ``dentro``, solo los que están en ese bitmap"""
+        if dentro is None:
+            return {color: len(bitmap) for color, bitmap in self._bitmaps.items()}
+        return {color: len(bitmap & dentro) for color, bitmap in self._bitmaps.items()}
@@ -0,0 +1,192 @@
+"""
+Espacio de color CIELAB y búsqueda de colores parecidos
+"""
+
+import heapq
+import math
+import re
+from typing import Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Sin NumPy se busca con el árbol k-d en Python puro
+    np = None
+
+Lab = Tuple[float, float, float]
+
+# Diferencia ΔE*ab a partir de la cual dos colores se distinguen a simple
+# vista (aproximada); por debajo, "#FF0000" y "#FE0101" son la misma bobina
+DELTA_E_PERCEPTIBLE = 2.3
+
+_HEX = re.compile(r'#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})')
+
+# Blanco de referencia D65
+_XN, _YN, _ZN = 0.95047, 1.0, 1.08883
+
+
+def _lineal(canal: int) -> float:
+    """Canal sRGB (0-255) sin la corrección gamma (0-1)"""
+    c = canal / 255
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+_LINEAL = [_lineal(canal) for canal in range(256)]
+
+
+def _f(t: float) -> float:
+    return t ** (1 / 3) if t > (6 / 29) ** 3 else t / (3 * (6 / 29) ** 2) + 4 / 29
+
+
+def normalizar_hex(color: Optional[str]) -> Optional[str]:
+    """Código "#RRGGBB" en mayúsculas de "#rgb", "rrggbb", etc. (None si no es un color)"""
+    coincidencia = _HEX.fullmatch(color.strip()) if color else None
+    if coincidencia is None:
+        return None
+    digitos = coincidencia.group(1).upper()
+    if len(digitos) == 3:
+        digitos = ''.join(d * 2 for d in digitos)
+    return f'#{digitos}'
+
+
+def rgb_a_lab(r: int, g: int, b: int) -> Lab:
+    """Color sRGB (0-255 por canal) en CIELAB, con blanco D65"""
+    rl, gl, bl = _LINEAL[r], _LINEAL[g], _LINEAL[b]
+    fx = _f((0.4124564 * rl + 0.3575761 * gl + 0.1804375 * bl) / _XN)
+    fy = _f((0.2126729 * rl + 0.7151522 * gl + 0.0721750 * bl) / _YN)
+    fz = _f((0.0193339 * rl + 0.1191920 * gl + 0.9503041 * bl) / _ZN)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def hex_a_lab(color: str) -> Lab:
+    """Código hex en CIELAB (ValueError si no es un color)"""
+    codigo = normalizar_hex(color)
+    if codigo is None:
+        raise ValueError(f"Color inválido: '{color}'")
+    return rgb_a_lab(int(codigo[1:3], 16), int(codigo[3:5], 16), int(codigo[5:7], 16))
+
+
+def delta_e(a: Lab, b: Lab) -> float:
+    """Diferencia ΔE*ab (CIE76) entre dos colores CIELAB: la distancia euclídea"""
+    return math.dist(a, b)
+
+
+class IndiceColores:
+    """
+    Colores indexados por su posición en CIELAB
+
+    Responde "qué colores están a menos de ΔE de este" y "cuáles son los k
+    más parecidos". Usa ΔE*ab (CIE76), la distancia euclídea en CIELAB, que
+    es la que permite indexar los puntos en un árbol k-d. Con NumPy la
+    distancia se calcula de una vez para todos los colores (son pocos
+    cientos o miles); sin NumPy se recorre el árbol.
+
+    Se guardan los códigos tal como vienen (p. ej. de color_especificaciones),
+    así que sirven para filtrar por igualdad; los que no son un color se
+    ignoran.
+    """
+
+    def __init__(self, colores: Iterable[str]):
+        self.colores: List[str] = []
+        self.puntos: List[Lab] = []
+        for color in sorted(set(colores)):
+            if normalizar_hex(color) is not None:
+                self.colores.append(color)
+                self.puntos.append(hex_a_lab(color))
+
+        self._matriz = None
+        self._arbol = None
+        if np is not None:
+            self._matriz = np.array(self.puntos, dtype=float).reshape(-1, 3)
+        else:
+            self._arbol = self._construir(list(range(len(self.puntos))), 0)
+
+    def __len__(self) -> int:
+        return len(self.colores)
+
+    def _construir(self, indices: List[int], profundidad: int):
+        """Nodo (índice, eje, izquierda, derecha) del árbol k-d, partido por la mediana"""
+        if not indices:
+            return None
+        eje = profundidad % 3
+        indices.sort(key=lambda i: self.puntos[i][eje])
+        medio = len(indices) // 2
+        return (indices[medio], eje,
+                self._construir(indices[:medio], profundidad + 1),
+                self._construir(indices[medio + 1:], profundidad + 1))
+
+    def _resultado(self, punto: Lab, indices: Iterable[int]) -> List[Tuple[str, float]]:
+        """(código, ΔE) de los índices, del más parecido al menos"""
+        return sorted(((self.colores[i], delta_e(punto, self.puntos[i])) for i in indices),
+                      key=lambda par: (par[1], par[0]))
+
+    def dentro_de(self, color: str, delta_max: float) -> List[Tuple[str, float]]:
+        """
+        Colores a lo sumo a ``delta_max`` ΔE*ab de un código hex
+
+        Returns:
+            (código, ΔE) del más parecido al menos
+        """
+        punto = hex_a_lab(color)
+        if self._matriz is not None:
+            distancias = np.sqrt(((self._matriz - punto) ** 2).sum(axis=1))
+            return self._resultado(punto, np.flatnonzero(distancias <= delta_max).tolist())
+
+        encontrados: List[int] = []
+        pendientes = [self._arbol]
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo is None:
+                continue
+            i, eje, izquierda, derecha = nodo
+            if delta_e(punto, self.puntos[i]) <= delta_max:
+                encontrados.append(i)
+            diferencia = punto[eje] - self.puntos[i][eje]
+            pendientes.append(izquierda if diferencia < 0 else derecha)
+            # El otro lado solo si el plano de corte queda dentro del radio
+            if abs(diferencia) <= delta_max:
+                pendientes.append(derecha if diferencia < 0 else izquierda)
+        return self._resultado(punto, encontrados)
+
+    def cercanos(self, color: str, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Los ``k`` colores más parecidos a un código hex (incluido él, si está)
+
+        Returns:
+            (código, ΔE) del más parecido al menos
+        """
+        punto = hex_a_lab(color)
+        k = min(k, len(self.colores))
+        if k <= 0:
+            return []
+        if self._matriz is not None:
+            distancias = np.sqrt(((self._matriz - punto) ** 2).sum(axis=1))
+            indices = np.argpartition(distancias, k - 1)[:k] if k < len(distancias) else range(k)
+            return self._resultado(punto, [int(i) for i in indices])
+
+        # Montículo de los k mejores por -ΔE: la raíz es el peor de ellos
+        mejores: List[Tuple[float, int]] = []
+
+        def visitar(nodo):
+            if nodo is None:
+                return
+            i, eje, izquierda, derecha = nodo
+            distancia = delta_e(punto, self.puntos[i])
+            if len(mejores) < k:
+                heapq.heappush(mejores, (-distancia, i))
+            elif distancia < -mejores[0][0]:
+                heapq.heapreplace(mejores, (-distancia, i))
+            diferencia = punto[eje] - self.puntos[i][eje]
+            visitar(izquierda if diferencia < 0 else derecha)
+            if len(mejores) < k or abs(diferencia) < -mejores[0][0]:
+                visitar(derecha if diferencia < 0 else izquierda)
+
+        visitar(self._arbol)
+        return self._resultado(punto, [i for _, i in mejores])
+
+    def parecidos(self, colores: Iterable[str], delta_max: float) -> Set[str]:
+        """Los colores dados más los indexados a lo sumo a ``delta_max`` de alguno"""
+        resultado = set(colores)
+        for color in list(resultado):
+            if normalizar_hex(color) is not None:
+                resultado.update(codigo for codigo, _ in self.dentro_de(color, delta_max))
+        return resultado
@@ -0,0 +1,338 @@
+"""
+Índice invertido en memoria para buscar productos sin consultar SQLite
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .bitmap_index import BitmapColores, separar_colores
+
+# Una fila por producto, como la devuelve DatabaseManager.obtener_filas_indice:
+# (id, nombre, descripcion, material, color, colores_hex, nombres_color, piezas);
+# colores_hex separados por comas, el resto texto libre
+FilaIndice = Tuple[int, str, str, str, str, str, str, str]
+
+_PALABRA = re.compile(r'\w+')
+
+# Similitud mínima (trigramas en común / trigramas distintos) para tomar
+# una palabra como otra mal escrita: "sopote" ~ "soporte" es 0,5 y una
+# transposición como "robto" ~ "robot", 0,33
+UMBRAL_SIMILITUD = 0.3
+
+# Palabras parecidas que se consideran, como máximo, por palabra buscada
+MAX_SIMILARES = 8
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Texto en minúsculas y sin tildes ("Señal Azúl" -> "senal azul")"""
+    if not texto:
+        return ""
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    """Palabras normalizadas de un texto, como las indexa IndiceInvertido"""
+    return _PALABRA.findall(normalizar(texto))
+
+
+def trigramas(palabra: str) -> FrozenSet[str]:
+    """Trigramas de una palabra normalizada, con bordes ("sol" -> "  s", " so", "sol", "ol ")"""
+    relleno = f'  {palabra} '
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+
+def similitud(a: str, b: str) -> float:
+    """Trigramas en común sobre trigramas distintos de dos palabras normalizadas (0 a 1)"""
+    trigramas_a, trigramas_b = trigramas(a), trigramas(b)
+    return len(trigramas_a & trigramas_b) / len(trigramas_a | trigramas_b)
+
+
+def es_palabra_aproximable(palabra: str) -> bool:
+    """Las palabras que son solo números (códigos, medidas) no se buscan por parecido"""
+    return not palabra.isdigit()
+
+
+class IndiceInvertido:
+    """
+    Palabra -> conjunto de IDs de productos, para catálogos que caben en memoria
+
+    Indexa nombre, descripción, material, colores (nombres) y piezas, y
+    además guarda qué colores (hex) usa cada producto en ``colores``
+    (BitmapColores): el filtro de colores de una búsqueda es una operación
+    entre bitmaps. Como el índice FTS5, cada palabra buscada
+    se toma como prefijo y tienen que estar todas. ``buscar_aproximado``
+    tolera errores de tipeo con los trigramas de las palabras de los nombres.
+
+    No es seguro entre hilos: se consulta y se modifica desde un solo hilo
+    (el de Tk, en ProductController).
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._postings_nombre: Dict[str, Set[int]] = {}
+        self._palabras: Dict[int, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        self.colores = BitmapColores()
+        self._nombres: Dict[int, str] = {}
+        self._vocabulario: Optional[List[str]] = None  # Palabras ordenadas, para los prefijos
+        self._vocabulario_nombre: Optional[List[str]] = None
+        self._trigramas: Dict[str, Set[str]] = {}  # Trigrama -> palabras de nombres
+        self._cantidad_trigramas: Dict[str, int] = {}  # Palabra de nombres -> sus trigramas
+
+    @classmethod
+    def desde_filas(cls, filas: Iterable[FilaIndice]) -> 'IndiceInvertido':
+        """Construir el índice de todo el catálogo"""
+        indice = cls()
+        for fila in filas:
+            indice.agregar(fila)
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._nombres)
+
+    def __contains__(self, producto_id: int) -> bool:
+        return producto_id in self._nombres
+
+    def agregar(self, fila: FilaIndice):
+        """Indexar un producto (si ya estaba, se reemplaza)"""
+        producto_id, nombre, descripcion, material, color, colores_hex, nombres_color, piezas = fila
+        if producto_id in self._nombres:
+            self.quitar(producto_id)
+
+        palabras_nombre = frozenset(tokenizar(nombre))
+        palabras = palabras_nombre.union(tokenizar(' '.join(
+            texto for texto in (descripcion, material, color, nombres_color, piezas) if texto
+        )))
+
+        # Solo una palabra nueva obliga a rehacer el vocabulario ordenado
+        if any(palabra not in self._postings for palabra in palabras):
+            self._vocabulario = None
+        nuevas_nombre = [palabra for palabra in palabras_nombre if palabra not in self._postings_nombre]
+        if nuevas_nombre:
+            self._vocabulario_nombre = None
+            self._indexar_trigramas(nuevas_nombre, agregar=True)
+        self._agregar_postings(self._postings, palabras, producto_id)
+        self._agregar_postings(self._postings_nombre, palabras_nombre, producto_id)
+
+        self._palabras[producto_id] = (palabras, palabras_nombre)
+        self.colores.asignar(producto_id, separar_colores(colores_hex))
+        self._nombres[producto_id] = normalizar(nombre)
+
+    def quitar(self, producto_id: int):
+        """Sacar un producto del índice (no hace nada si no estaba)"""
+        if producto_id not in self._nombres:
+            return
+        palabras, palabras_nombre = self._palabras.pop(producto_id)
+        if self._quitar_postings(self._postings, palabras, producto_id):
+            self._vocabulario = None
+        borradas_nombre = self._quitar_postings(self._postings_nombre, palabras_nombre, producto_id)
+        if borradas_nombre:
+            self._vocabulario_nombre = None
+            self._indexar_trigramas(borradas_nombre, agregar=False)
+        self.colores.quitar(producto_id)
+        del self._nombres[producto_id]
+
+    def actualizar(self, filas: Iterable[FilaIndice], eliminados: Iterable[int] = ()):
+        """Aplicar al índice los productos modificados (filas) y eliminados"""
+        for producto_id in eliminados:
+            self.quitar(producto_id)
+        for fila in filas:
+            self.agregar(fila)
+
+    def buscar(self, texto: str, alguno: Iterable[str] = (), todos: Iterable[str] = (),
+               ninguno: Iterable[str] = (), limite: int = 500) -> List[int]:
+        """
+        IDs de los productos que contienen todas las palabras y cumplen los colores
+
+        Args:
+            texto: Palabras a buscar (cada una como prefijo)
+            alguno, todos, ninguno: Colores hex, como en FiltroProductos
+            limite: Cantidad máxima de resultados
+
+        Returns:
+            IDs ordenados: primero los que tienen las palabras en el nombre,
+            después el resto, y cada grupo por nombre
+        """
+        prefijos = sorted(set(tokenizar(texto)), key=len, reverse=True)
+        if not prefijos:
+            return []
+
+        candidatos = self._coincidencias(self._postings, prefijos, self._ordenado(False))
+        candidatos = self._filtrar_colores(candidatos, alguno, todos, ninguno)
+        if not candidatos:
+            return []
+
+        en_nombre = self._coincidencias(self._postings_nombre, prefijos, self._ordenado(True))
+        en_nombre &= candidatos
+        nombres = self._nombres
+        resultado = sorted(en_nombre, key=nombres.__getitem__)
+        if len(resultado) < limite:
+            resultado += sorted(candidatos - en_nombre, key=nombres.__getitem__)
+        return resultado[:limite]
+
+    def buscar_aproximado(self, texto: str, alguno: Iterable[str] = (), todos: Iterable[str] = (),
+                          ninguno: Iterable[str] = (), limite: int = 500,
+                          umbral: float = UMBRAL_SIMILITUD) -> List[int]:
+        """
+        Búsqueda tolerante a errores de tipeo ("sopote" encuentra "Soporte")
+
+        Cada palabra buscada vale como prefijo (igual que en ``buscar``) o
+        como cualquiera de las palabras de nombres que se le parecen
+        (``palabras_similares``), y tienen que estar todas, en cualquier
+        campo indexado. Los números no se corrigen.
+
+        Returns:
+            IDs ordenados por similitud (la suma, sobre las palabras buscadas,
+            de la mejor palabra parecida que tiene el producto) y por nombre
+        """
+        puntajes: Optional[Dict[int, float]] = None
+        for palabra in set(tokenizar(texto)):
+            ids = self._coincidencias(self._postings, [palabra], self._ordenado(False))
+            mejores = dict.fromkeys(ids, 1.0)
+            for similar, valor in self.palabras_similares(palabra, umbral):
+                # De mayor a menor similitud: cada producto queda con la mejor
+                nuevos = self._postings.get(similar, set()).difference(mejores)
+                mejores.update(dict.fromkeys(nuevos, valor))
+            if puntajes is None:
+                puntajes = mejores
+            else:
+                puntajes = {i: valor + mejores[i] for i, valor in puntajes.items() if i in mejores}
+            if not puntajes:
+                return []
+        if not puntajes:
+            return []
+
+        candidatos = self._filtrar_colores(set(puntajes), alguno, todos, ninguno)
+
+        # Pocos puntajes distintos: se ordena por nombre dentro de cada uno,
+        # del mejor al peor, hasta llenar el límite
+        niveles: Dict[float, List[int]] = {}
+        for producto_id in candidatos:
+            niveles.setdefault(puntajes[producto_id], []).append(producto_id)
+        resultado: List[int] = []
+        for puntaje in sorted(niveles, reverse=True):
+            resultado += sorted(niveles[puntaje], key=self._nombres.__getitem__)
+            if len(resultado) >= limite:
+                break
+        return resultado[:limite]
+
+    def palabras_similares(self, palabra: str, umbral: float = UMBRAL_SIMILITUD,
+                           limite: int = MAX_SIMILARES) -> List[Tuple[str, float]]:
+        """
+        Palabras de los nombres parecidas a una palabra normalizada
+
+        Returns:
+            (palabra, similitud) con similitud >= umbral, de mayor a menor
+        """
+        if not es_palabra_aproximable(palabra):
+            return []
+
+        buscados = trigramas(palabra)
+        comunes: Counter = Counter()
+        for trigrama in buscados:
+            comunes.update(self._trigramas.get(trigrama, ()))
+
+        # Con similitud >= umbral hay al menos umbral * len(buscados) en común
+        minimo = umbral * len(buscados)
+        cantidades = self._cantidad_trigramas
+        similares = []
+        for candidata, cantidad in comunes.items():
+            if cantidad < minimo:
+                continue
+            valor = cantidad / (len(buscados) + cantidades[candidata] - cantidad)
+            if valor >= umbral:
+                similares.append((candidata, valor))
+        similares.sort(key=lambda par: (-par[1], par[0]))
+        return similares[:limite]
+
+    def ids_con_colores(self, alguno: Iterable[str] = (), todos: Iterable[str] = (),
+                        ninguno: Iterable[str] = ()) -> Set[int]:
+        """IDs de los productos que cumplen las condiciones de color"""
+        permitidos = self.colores.filtrar(alguno, todos, ninguno)
+        return set(self.colores.productos if permitidos is None else permitidos)
+
+    def _filtrar_colores(self, candidatos: Set[int], alguno: Iterable[str],
+                         todos: Iterable[str], ninguno: Iterable[str]) -> Set[int]:
+        """Reducir los candidatos a los que cumplen los colores"""
+        permitidos = self.colores.filtrar(alguno, todos, ninguno)
+        if permitidos is None:
+            return candidatos
+        # Recorrer el bitmap cuesta por ID encendido; consultarlo, por candidato
+        if len(permitidos) <= len(candidatos):
+            return candidatos.intersection(permitidos)
+        return set(permitidos.filtrar(candidatos))
+
+    def _ordenado(self, de_nombre: bool) -> List[str]:
+        """Vocabulario ordenado (se rehace solo después de agregar o quitar palabras)"""
+        if de_nombre:
+            if self._vocabulario_nombre is None:
+                self._vocabulario_nombre = sorted(self._postings_nombre)
+            return self._vocabulario_nombre
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self._postings)
+        return self._vocabulario
+
+    @staticmethod
+    def _coincidencias(postings: Dict[str, Set[int]], prefijos: Sequence[str],
+                       vocabulario: List[str]) -> Set[int]:
+        """Intersección, para cada prefijo, de la unión de las palabras que empiezan con él"""
+        resultado: Optional[Set[int]] = None
+        for prefijo in prefijos:
+            inicio = bisect_left(vocabulario, prefijo)
+            fin = bisect_left(vocabulario, prefijo + '\uffff', inicio)
+            conjuntos = [postings[palabra] for palabra in vocabulario[inicio:fin]]
+            if not conjuntos:
+                return set()
+            if len(conjuntos) == 1 and resultado is not None:
+                resultado &= conjuntos[0]
+            else:
+                union = set().union(*conjuntos)
+                resultado = union if resultado is None else resultado & union
+            if not resultado:
+                return set()
+        return resultado
+
+    def _indexar_trigramas(self, palabras: Iterable[str], agregar: bool):
+        """Agregar o quitar palabras de nombres del índice de trigramas"""
+        for palabra in palabras:
+            if not es_palabra_aproximable(palabra):
+                continue
+            propios = trigramas(palabra)
+            if agregar:
+                self._cantidad_trigramas[palabra] = len(propios)
+            else:
+                self._cantidad_trigramas.pop(palabra, None)
+            for trigrama in propios:
+                if agregar:
+                    self._trigramas.setdefault(trigrama, set()).add(palabra)
+                    continue
+                palabras_trigrama = self._trigramas.get(trigrama)
+                if palabras_trigrama is not None:
+                    palabras_trigrama.discard(palabra)
+                    if not palabras_trigrama:
+                        del self._trigramas[trigrama]
+
+    @staticmethod
+    def _agregar_postings(postings: Dict[str, Set[int]], claves: Iterable[str], producto_id: int):
+        for clave in claves:
+            postings.setdefault(clave, set()).add(producto_id)
+
+    @staticmethod
+    def _quitar_postings(postings: Dict[str, Set[int]], claves: Iterable[str],
+                         producto_id: int) -> List[str]:
+        """Quitar el producto de las listas; devuelve las claves que quedaron vacías y se borraron"""
+        borradas = []
+        for clave in claves:
+            ids = postings.get(clave)
+            if ids is None:
+                continue
+            ids.discard(producto_id)
+            if not ids:
+                del postings[clave]
+                borradas.append(clave)
+        return borradas